@@ -8,8 +8,11 @@ better be compared with new RDF/XML generation.
 # Standard library
 import argparse
 import glob
+import os
 import sys
+import time
 import traceback
+from multiprocessing import Pool
 
 # Third-party
 from lxml import etree
@@ -45,7 +48,17 @@ def setup():
         f"{default_paths_string}",
         metavar="RDF_XML_FILE",
     )
+    ap.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of files normalized concurrently (default: number of"
+        " CPUs)",
+    )
     args = ap.parse_args()
+    if args.jobs < 1:
+        ap.error("--jobs must be at least 1")
     return args
 
 
@@ -159,19 +172,84 @@ def normalize_rdf_xml(serialized_rdf_content):
     return serialized_rdf_content
 
 
-def main():
-    args = setup()
-    rdf_paths = []
-    for path in args.paths:
-        rdf_paths += glob.glob(path, recursive=True)
-    rdf_paths.sort()
-    for path in rdf_paths:
-        rdf = ""
+def normalize_rdf_xml_file(path):
+    """Normalize the RDF/XML file in place (unless it is already normalized).
+    The normalized RDF/XML is written to a temporary file that then replaces
+    the file, so that an interrupted run does not leave a truncated file.
+
+    Return the path and its status: "normalized", "unchanged", or the error
+    message.
+    """
+    try:
         with open(path, "rt") as file_obj:
             rdf = file_obj.read()
-        rdf = normalize_rdf_xml(rdf)
-        with open(path, "wt") as file_obj:
-            file_obj.write(rdf)
+        normalized_rdf = normalize_rdf_xml(rdf)
+        if normalized_rdf == rdf:
+            return path, "unchanged"
+        temp_file = f"{path}.tmp"
+        with open(temp_file, "wt") as file_obj:
+            file_obj.write(normalized_rdf)
+        os.replace(temp_file, path)
+        return path, "normalized"
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}"
+
+
+def iter_rdf_paths(paths):
+    """Yield the real paths of the RDF/XML files matched by the paths (as
+    they are found).
+
+    Each file is yielded once, even if it is matched by more than one path or
+    symlink. Yielding the real path ensures the file is written in place of
+    the symlink target instead of the symlink.
+    """
+    seen = set()
+    for path in paths:
+        for rdf_path in glob.iglob(path, recursive=True):
+            real_path = os.path.realpath(rdf_path)
+            if real_path in seen:
+                continue
+            seen.add(real_path)
+            yield real_path
+
+
+def tally_results(results):
+    """Return the number of files by status and the errors."""
+    counts = {"normalized": 0, "unchanged": 0}
+    errors = []
+    for path, status in results:
+        if status in counts:
+            counts[status] += 1
+        else:
+            errors.append((path, status))
+    return counts, errors
+
+
+def main():
+    args = setup()
+    start = time.perf_counter()
+    rdf_paths = iter_rdf_paths(args.paths)
+    if args.jobs == 1:
+        counts, errors = tally_results(map(normalize_rdf_xml_file, rdf_paths))
+    else:
+        # Files are normalized as soon as they are found by the glob
+        with Pool(args.jobs) as pool:
+            counts, errors = tally_results(
+                pool.imap_unordered(
+                    normalize_rdf_xml_file, rdf_paths, chunksize=8
+                )
+            )
+    elapsed = time.perf_counter() - start
+    for path, error in sorted(errors):
+        print(f"ERROR {path}: {error}", file=sys.stderr)
+    total = counts["normalized"] + counts["unchanged"] + len(errors)
+    print(
+        f"INFO {total} files in {elapsed:.2f}s ({args.jobs} jobs):"
+        f" {counts['normalized']} normalized, {counts['unchanged']}"
+        f" unchanged, {len(errors)} errors"
+    )
+    if errors:
+        raise ScriptError(f"Failed to normalize {len(errors)} files")
 
 
 if __name__ == "__main__":
@@ -54,7 +54,8 @@ echo
 print_header 'Coverage tests'
 # shellcheck disable=SC2068
 docker compose exec app coverage run --debug=pytest \
-    manage.py test --noinput --parallel 4 ${@:-} \
+    manage.py test --settings cc_legal_tools.settings.test --noinput \
+    --parallel 4 ${@:-} \
     || exit
 echo
 
@@ -35,6 +35,39 @@ DISTILL_DIR = os.path.abspath(
 LEGACY_DIR = os.path.abspath(
     os.path.realpath(os.path.join(DATA_REPOSITORY_DIR, "legacy"))
 )
+# Content hash manifest of the files in DISTILL_DIR written by the publish
+# command (used to skip unchanged writes and to prune stale files)
+PUBLISH_MANIFEST_FILE = os.path.abspath(
+    os.path.realpath(
+        os.path.join(PROJECT_ROOT, "tmp", "publish-manifest.json")
+    )
+)
+# Canonical N-Triples hash of the RDF of each legal tool in DISTILL_DIR (see
+# the check_rdf command)
+RDF_HASHES_FILE = os.path.abspath(
+    os.path.realpath(os.path.join(PROJECT_ROOT, "tmp", "rdf-hashes.json"))
+)
+# Cache of HTML formatted by Prettier during publish (keyed by the hash of the
+# unformatted HTML) and its maximum size in bytes
+FORMAT_CACHE_FILE = os.path.abspath(
+    os.path.realpath(os.path.join(PROJECT_ROOT, "tmp", "format-cache.sqlite3"))
+)
+FORMAT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Maximum size in bytes of the RDF/XML fragments of legal tools cached in the
+# same database (in their own table)
+RDF_FRAGMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Whether the test suite is running (see the test settings)
+TESTING = False
+# Cache of the statistics of the Deeds & UX PO files (keyed by the path,
+# modification time, and size of each PO file). None disables the cache.
+PO_STATS_CACHE_FILE = os.path.abspath(
+    os.path.realpath(os.path.join(PROJECT_ROOT, "tmp", "po-stats.json"))
+)
+# Table of the language information from Babel (refreshed when the Babel
+# version changes). None disables the table.
+LANG_INFO_TABLE_FILE = os.path.abspath(
+    os.path.realpath(os.path.join(PROJECT_ROOT, "tmp", "lang-info.json"))
+)
 # Localication paths
 DEEDS_UX_LOCALE_PATH = os.path.abspath(
     os.path.realpath(os.path.join(DATA_REPOSITORY_DIR, "locale"))
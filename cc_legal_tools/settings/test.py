@@ -0,0 +1,21 @@
+# Settings of the test suite (ex. "./manage.py test --settings
+# cc_legal_tools.settings.test", or DJANGO_SETTINGS_MODULE for other test
+# runners).
+
+# First-party/Local
+from cc_legal_tools.settings.dev import *  # noqa: F401, F403
+
+TESTING = True
+
+# The Django Debug Toolbar can't be used with tests (dev.py only omits it when
+# "test" is in the command line arguments)
+if "debug_toolbar" in INSTALLED_APPS:  # noqa: F405
+    INSTALLED_APPS.remove("debug_toolbar")  # noqa: F405
+    MIDDLEWARE.remove(  # noqa: F405
+        "debug_toolbar.middleware.DebugToolbarMiddleware"
+    )
+    DEBUG = False
+
+# Tests don't read or write the caches of the app repository's tmp/ directory
+PO_STATS_CACHE_FILE = None
+LANG_INFO_TABLE_FILE = None
@@ -1,11 +1,14 @@
 # Standard library
 import datetime
+import json
 import os
+import tempfile
 from unittest import mock
 from unittest.mock import MagicMock
 
 # Third-party
 import polib
+from babel import Locale
 from dateutil.tz import tzutc
 from django.conf import settings
 from django.test import TestCase, override_settings
@@ -13,6 +16,8 @@ from django.test import TestCase, override_settings
 # First-party/Local
 from i18n.utils import (
     active_translation,
+    drain_translation_object_counters,
+    get_deeds_ux_pofile_stats,
     get_default_language_for_jurisdiction_deed,
     get_default_language_for_jurisdiction_naive,
     get_jurisdiction_name,
@@ -20,10 +25,15 @@ from i18n.utils import (
     get_pofile_path,
     get_pofile_revision_date,
     get_translation_object,
+    get_translation_object_counters,
+    load_lang_info_table,
     map_django_to_transifex_language_code,
     map_legacy_to_django_language_code,
     parse_date,
+    preload_translation_objects,
     save_content_as_pofile_and_mofile,
+    save_lang_info_table,
+    update_lang_infos,
     write_transstats_csv,
 )
 
@@ -272,6 +282,81 @@ class TranslationTest(TestCase):
         mock_trans.assert_called_with(settings.LANGUAGE_CODE)
         self.assertEqual(translation_object, result)
 
+    def test_get_translation_object_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mofile_dir = os.path.join(tmpdir, "nl", "LC_MESSAGES")
+            os.makedirs(mofile_dir)
+            mofile_path = os.path.join(mofile_dir, "GETTEXT_DOMAIN.mo")
+            polib.POFile().save_as_mofile(mofile_path)
+            with (
+                override_settings(
+                    LANGUAGES_MOSTLY_TRANSLATED=[],
+                    LEGAL_CODE_LOCALE_PATH=tmpdir,
+                ),
+                mock.patch(
+                    "i18n.utils.translation.trans_real.DjangoTranslation",
+                    side_effect=lambda **kwargs: MagicMock(),
+                ) as mock_djt,
+                mock.patch("i18n.utils.translation.trans_real.translation"),
+            ):
+                drain_translation_object_counters()
+                args = ("GETTEXT_DOMAIN", "nl", "LANGUAGE_DEFAULT")
+                result = get_translation_object(*args)
+                # The translation object of the same domain and languages is
+                # reused
+                self.assertIs(result, get_translation_object(*args))
+                self.assertEqual(1, mock_djt.call_count)
+                self.assertIsNot(
+                    result, get_translation_object("GETTEXT_DOMAIN", "de", "")
+                )
+                self.assertEqual(2, mock_djt.call_count)
+
+                # The translation object is invalidated when its MO file is
+                # modified
+                stat_result = os.stat(mofile_path)
+                os.utime(
+                    mofile_path,
+                    ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1),
+                )
+                self.assertIsNot(result, get_translation_object(*args))
+                self.assertEqual(3, mock_djt.call_count)
+                counters = {
+                    "hits": 1,
+                    "misses": 3,
+                    "invalidations": 1,
+                    "evictions": 0,
+                }
+                # (the counters are only reset when they are drained)
+                self.assertEqual(counters, get_translation_object_counters())
+                self.assertEqual(counters, drain_translation_object_counters())
+                self.assertEqual(0, get_translation_object_counters()["hits"])
+
+    @override_settings(LANGUAGES_MOSTLY_TRANSLATED=[])
+    def test_preload_translation_objects(self):
+        arguments = [
+            ("GETTEXT_DOMAIN", language_code, "")
+            for language_code in ("de", "fr", "nl")
+        ]
+        with (
+            mock.patch(
+                "i18n.utils.translation.trans_real.DjangoTranslation",
+                side_effect=lambda **kwargs: MagicMock(),
+            ),
+            mock.patch("i18n.utils.translation.trans_real.translation"),
+            mock.patch("i18n.utils.TRANSLATION_OBJECT_CACHE_SIZE", 2),
+        ):
+            drain_translation_object_counters()
+            # (duplicate arguments are loaded once)
+            self.assertEqual(
+                3, preload_translation_objects(arguments + arguments[:1])
+            )
+            for arguments_ in arguments:
+                get_translation_object(*arguments_)
+            self.assertEqual(
+                {"hits": 3, "misses": 3, "invalidations": 0, "evictions": 0},
+                drain_translation_object_counters(),
+            )
+
     def test_active_translation(self):
         # Third-party
         from django.utils.translation.trans_real import _active
@@ -361,6 +446,131 @@ class PofileTestSimple(TestCase):
         revision_date = get_pofile_revision_date(pofile_obj)
         self.assertEqual(None, revision_date)
 
+    def test_get_deeds_ux_pofile_stats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pofile_path = os.path.join(tmpdir, "django.po")
+            with open(pofile_path, "wt", encoding="utf-8") as file_obj:
+                file_obj.write(
+                    'msgid ""\n'
+                    'msgstr ""\n'
+                    '"PO-Revision-Date: 2020-06-29 12:54:48+00:00\\n"\n'
+                    "\n"
+                    'msgid "Attribution"\n'
+                    'msgstr "Namensnennung"\n'
+                    "\n"
+                    'msgid "Share"\n'
+                    'msgstr ""\n'
+                )
+            cache_file = os.path.join(tmpdir, "tmp", "po-stats.json")
+            pofile_obj = polib.pofile(pofile_path)
+            with override_settings(PO_STATS_CACHE_FILE=cache_file):
+                stats = get_deeds_ux_pofile_stats([pofile_path])[pofile_path]
+                self.assertEqual(50, stats["percent_translated"])
+                self.assertEqual(pofile_obj.metadata, stats["metadata"])
+                self.assertTrue(os.path.isfile(cache_file))
+
+                # Unchanged PO files are not parsed again
+                with mock.patch("i18n.utils.polib.pofile") as mock_pofile:
+                    self.assertEqual(
+                        stats,
+                        get_deeds_ux_pofile_stats([pofile_path])[pofile_path],
+                    )
+                mock_pofile.assert_not_called()
+
+                # Modified PO files are parsed again
+                with open(pofile_path, "at", encoding="utf-8") as file_obj:
+                    file_obj.write("\n")
+                with mock.patch(
+                    "i18n.utils.polib.pofile", return_value=pofile_obj
+                ) as mock_pofile:
+                    get_deeds_ux_pofile_stats([pofile_path])
+                mock_pofile.assert_called_once_with(pofile_path)
+
+    def test_get_deeds_ux_pofile_stats_without_cache(self):
+        # The cache is disabled while testing
+        self.assertIsNone(settings.PO_STATS_CACHE_FILE)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pofile_path = os.path.join(tmpdir, "django.po")
+            with open(pofile_path, "wt", encoding="utf-8") as file_obj:
+                file_obj.write('msgid "Share"\nmsgstr "Teilen"\n')
+            stats = get_deeds_ux_pofile_stats([pofile_path])[pofile_path]
+            self.assertEqual(100, stats["percent_translated"])
+            self.assertEqual(["django.po"], os.listdir(tmpdir))
+
+    def test_update_lang_infos(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            table_file = os.path.join(tmpdir, "tmp", "lang-info.json")
+            with (
+                override_settings(LANG_INFO_TABLE_FILE=table_file),
+                mock.patch("i18n.utils.LANG_INFO_TABLE", None),
+                mock.patch.dict(
+                    "i18n.utils.LANG_INFO",
+                    {"fr": {"name": "Frenchish"}},
+                    clear=True,
+                ) as lang_info,
+            ):
+                update_lang_infos(["ar", "fr", "zz"])
+                self.assertEqual(
+                    {
+                        "name": "Arabic",
+                        "name_local": "العربية",
+                        "bidi": True,
+                    },
+                    lang_info["ar"],
+                )
+                # Existing language information is retained
+                self.assertEqual("Frenchish", lang_info["fr"]["name"])
+                self.assertEqual("français", lang_info["fr"]["name_local"])
+                # Languages unknown to Babel are not added
+                self.assertNotIn("zz", lang_info)
+                self.assertTrue(os.path.isfile(table_file))
+
+                # Languages in the table are not parsed by Babel again
+                lang_info.clear()
+                with (
+                    mock.patch("i18n.utils.LANG_INFO_TABLE", None),
+                    mock.patch("i18n.utils.Locale.parse") as mock_parse,
+                ):
+                    update_lang_infos(["ar", "fr", "zz"])
+                mock_parse.assert_not_called()
+                self.assertEqual("Arabic", lang_info["ar"]["name"])
+                self.assertEqual("French", lang_info["fr"]["name"])
+
+                # An unchanged table is not written again
+                with mock.patch("i18n.utils.os.replace") as mock_replace:
+                    save_lang_info_table(
+                        table_file, load_lang_info_table(table_file)
+                    )
+                mock_replace.assert_not_called()
+
+                # The table is refreshed when the Babel version changes
+                with (
+                    mock.patch("i18n.utils.LANG_INFO_TABLE", None),
+                    mock.patch("i18n.utils.babel.__version__", "0.0"),
+                ):
+                    with mock.patch(
+                        "i18n.utils.Locale.parse", wraps=Locale.parse
+                    ) as mock_parse:
+                        update_lang_infos(["ar"])
+                    # (the table persisted for the other Babel version is
+                    # rebuilt)
+                    with open(table_file, "rt", encoding="utf-8") as file_obj:
+                        data = json.load(file_obj)
+                self.assertEqual(mock.call("ar"), mock_parse.call_args_list[0])
+                self.assertEqual("0.0", data["babel"])
+                self.assertEqual(["ar"], list(data["languages"]))
+
+    def test_update_lang_infos_without_table(self):
+        # The table is disabled while testing
+        self.assertIsNone(settings.LANG_INFO_TABLE_FILE)
+        with (
+            mock.patch("i18n.utils.LANG_INFO_TABLE", None),
+            mock.patch.dict("i18n.utils.LANG_INFO", {}, clear=True),
+            mock.patch("i18n.utils.os.replace") as mock_replace,
+        ):
+            update_lang_infos(["ar"])
+        mock_replace.assert_not_called()
+
     def test_save_content_as_pofile_and_mofile(self):
         path = "/foo/bar.po"
         content = b"xxxxxyyyyy"
@@ -1,16 +1,23 @@
 # Standard library
 import csv
+import gettext
+import json
 import os
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
+from functools import lru_cache
 
 # Third-party
+import babel
 import dateutil.parser
 import polib
 from babel import Locale
 from babel.core import UnknownLocaleError
 from django.conf import settings
 from django.conf.locale import LANG_INFO
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
 from django.utils import translation
 
 # First-party/Local
@@ -24,6 +31,32 @@ from i18n import (
 CACHED_APPLICABLE_LANGS = {}
 CACHED_WELL_TRANSLATED_LANGS = {}
 
+# Increment if the statistics of get_pofile_stats() are changed (see
+# get_deeds_ux_pofile_stats())
+PO_STATS_VERSION = 1
+# Increment if the language information of get_babel_lang_info() is changed
+# (see update_lang_infos())
+LANG_INFO_TABLE_VERSION = 1
+# Language information from Babel, keyed by language code (loaded from
+# settings.LANG_INFO_TABLE_FILE by update_lang_infos())
+LANG_INFO_TABLE = None
+
+# Sent by get_translation_object() with the domain and language_code (ex. so
+# that the publish command can record the translations used by each page)
+translation_object_requested = Signal()
+
+# Maximum number of translation objects cached by get_translation_object()
+# in each process (least recently used are evicted first)
+TRANSLATION_OBJECT_CACHE_SIZE = 512
+# Settings that affect the translation objects of get_translation_object()
+TRANSLATION_OBJECT_SETTINGS = (
+    "LANGUAGE_CODE",
+    "LANGUAGES_MOSTLY_TRANSLATED",
+    "LEGAL_CODE_LOCALE_PATH",
+    "LOCALE_PATHS",
+)
+TRANSLATION_OBJECT_CACHE = OrderedDict()
+
 
 # def get_locale_dir(locale_name):
 #     localedir = settings.LOCALE_PATHS[0]
@@ -75,10 +108,43 @@ def get_translation_object(
     This fuction requires the legal code locales path to have been added to
     Django settings.LOCALE_PATHS
 
+    Translation objects are cached per process (see
+    TRANSLATION_OBJECT_CACHE_SIZE) and rebuilt when their MO files are
+    modified. The hits and misses are counted (see
+    drain_translation_object_counters()).
+
     WARNING: this *does* make assumptions about the internals of Django's
     translation system that could change on us.  It doesn't seem likely,
     though.
     """
+    translation_object_requested.send(
+        sender=None, domain=domain, language_code=language_code
+    )
+
+    # Add a fallback to the standard Django translation for this language. This
+    # gets us the non-legal-code parts of the pages.
+    if language_code in settings.LANGUAGES_MOSTLY_TRANSLATED:
+        fallback_language = language_code
+    elif language_default in settings.LANGUAGES_MOSTLY_TRANSLATED:
+        fallback_language = language_default
+    else:
+        fallback_language = settings.LANGUAGE_CODE
+
+    # Reuse the cached translation object unless the fallback language or the
+    # MO files have changed
+    key = (domain, language_code, language_default)
+    signature = (
+        fallback_language,
+        get_translation_mofiles_signature(domain, language_code),
+    )
+    cached = TRANSLATION_OBJECT_CACHE.get(key)
+    if cached is not None:
+        if cached[0] == signature:
+            TRANSLATION_OBJECT_CACHE.move_to_end(key)
+            TRANSLATION_OBJECT_COUNTERS["hits"] += 1
+            return cached[1]
+        TRANSLATION_OBJECT_COUNTERS["invalidations"] += 1
+    TRANSLATION_OBJECT_COUNTERS["misses"] += 1
 
     # Start with a translation object for the domain for this tool.
     tool_translation_object = translation.trans_real.DjangoTranslation(
@@ -86,23 +152,120 @@ def get_translation_object(
         domain=domain,
         localedirs=settings.LEGAL_CODE_LOCALE_PATH,
     )
+    tool_translation_object.add_fallback(
+        translation.trans_real.translation(fallback_language)
+    )
 
-    # Add a fallback to the standard Django translation for this language. This
-    # gets us the non-legal-code parts of the pages.
-    if language_code in settings.LANGUAGES_MOSTLY_TRANSLATED:
-        tool_translation_object.add_fallback(
-            translation.trans_real.translation(language_code)
-        )
-    elif language_default in settings.LANGUAGES_MOSTLY_TRANSLATED:
-        tool_translation_object.add_fallback(
-            translation.trans_real.translation(language_default)
-        )
-    else:
-        tool_translation_object.add_fallback(
-            translation.trans_real.translation(settings.LANGUAGE_CODE)
+    TRANSLATION_OBJECT_CACHE[key] = (signature, tool_translation_object)
+    TRANSLATION_OBJECT_CACHE.move_to_end(key)
+    while len(TRANSLATION_OBJECT_CACHE) > TRANSLATION_OBJECT_CACHE_SIZE:
+        TRANSLATION_OBJECT_CACHE.popitem(last=False)
+        TRANSLATION_OBJECT_COUNTERS["evictions"] += 1
+    return tool_translation_object
+
+
+def preload_translation_objects(arguments):
+    """
+    Load the translation objects of the (domain, language_code,
+    language_default) arguments into the cache of get_translation_object()
+    (ex. before forking worker processes, which then inherit them). The cache
+    is enlarged, if necessary, to hold all of them.
+    """
+    global TRANSLATION_OBJECT_CACHE_SIZE
+    arguments = list(dict.fromkeys(arguments))
+    TRANSLATION_OBJECT_CACHE_SIZE = max(
+        TRANSLATION_OBJECT_CACHE_SIZE, len(arguments)
+    )
+    for domain, language_code, language_default in arguments:
+        get_translation_object(domain, language_code, language_default)
+    return len(arguments)
+
+
+@lru_cache(maxsize=None)
+def get_translation_mofile_candidates(domain, localedirs, languages):
+    """
+    Return the paths of the MO files of the domain that gettext may find in
+    the locale directories for the languages (memoized, as expanding the
+    locale names is slow).
+    """
+    locale_names = []
+    for language in languages:
+        # (the same expansion as gettext.find())
+        for locale_name in gettext._expand_lang(
+            translation.to_locale(language)
+        ):
+            if locale_name not in locale_names:
+                locale_names.append(locale_name)
+    return tuple(
+        os.path.join(localedir, locale_name, "LC_MESSAGES", f"{domain}.mo")
+        for localedir in localedirs
+        for locale_name in locale_names
+    )
+
+
+def get_translation_mofiles_signature(domain, language_code):
+    """
+    Return the paths and modification times of the MO files of the domain
+    that may be merged into the translation object of the language (or of its
+    English fallback).
+    """
+    localedirs = tuple(
+        dict.fromkeys(
+            [settings.LEGAL_CODE_LOCALE_PATH, *settings.LOCALE_PATHS]
         )
+    )
+    languages = (language_code, settings.LANGUAGE_CODE)
+    signature = []
+    for mofile in get_translation_mofile_candidates(
+        domain, localedirs, languages
+    ):
+        try:
+            signature.append((mofile, os.stat(mofile).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+    return tuple(signature)
+
+
+def new_translation_object_counters():
+    return {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+
+TRANSLATION_OBJECT_COUNTERS = new_translation_object_counters()
+
+
+def get_translation_object_counters():
+    """
+    Return a copy of the translation object cache counters of the current
+    process (without resetting them, see drain_translation_object_counters()).
+    """
+    return dict(TRANSLATION_OBJECT_COUNTERS)
+
+
+def drain_translation_object_counters():
+    """
+    Return and reset the translation object cache counters of the current
+    process.
+    """
+    global TRANSLATION_OBJECT_COUNTERS
+    counters = TRANSLATION_OBJECT_COUNTERS
+    TRANSLATION_OBJECT_COUNTERS = new_translation_object_counters()
+    return counters
+
+
+def format_translation_object_counters(counters):
+    lookups = counters["hits"] + counters["misses"]
+    rate = counters["hits"] / lookups * 100 if lookups else 0
+    return (
+        f"{counters['hits']} hits, {counters['misses']} misses"
+        f" ({rate:.1f}% hit rate), {counters['invalidations']} invalidations,"
+        f" {counters['evictions']} evictions"
+    )
 
-    return tool_translation_object
+
+@receiver(setting_changed)
+def clear_translation_object_cache(*, setting, **kwargs):
+    if setting in TRANSLATION_OBJECT_SETTINGS:
+        TRANSLATION_OBJECT_CACHE.clear()
 
 
 @contextmanager
@@ -304,6 +467,82 @@ def get_deeds_ux_pofiles():
     return deed_ux_pofiles
 
 
+def get_pofile_stats(pofile_path):
+    pofile_obj = polib.pofile(pofile_path)
+    return {
+        "percent_translated": pofile_obj.percent_translated(),
+        "metadata": pofile_obj.metadata,
+    }
+
+
+def load_po_stats_cache(cache_file):
+    if cache_file is None:
+        return {}
+    try:
+        with open(cache_file, "rt", encoding="utf-8") as file_obj:
+            data = json.load(file_obj)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != PO_STATS_VERSION:
+        return {}
+    return data["pofiles"]
+
+
+def save_po_stats_cache(cache_file, pofiles_stats):
+    if cache_file is None:
+        return
+    # (the order of the metadata of each PO file is retained)
+    data = {
+        "version": PO_STATS_VERSION,
+        "pofiles": dict(sorted(pofiles_stats.items())),
+    }
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, "wt", encoding="utf-8") as file_obj:
+            json.dump(data, file_obj, indent=0)
+        os.replace(temp_file, cache_file)
+    except OSError:  # pragma: no cover
+        # The cache is an optimization (ex. the directory may be read-only)
+        pass
+
+
+def get_deeds_ux_pofile_stats(pofile_paths):
+    """
+    Return the statistics of each of the Deed & UX PO files (see
+    get_pofile_stats()).
+
+    The statistics are cached in settings.PO_STATS_CACHE_FILE, keyed by the
+    path, modification time, and size of each PO file, so that only new or
+    modified PO files are parsed (the cache is disabled if the setting is
+    None, ex. while testing).
+    """
+    cache_file = settings.PO_STATS_CACHE_FILE
+    cached_stats = load_po_stats_cache(cache_file)
+    pofiles_stats = {}
+    stale = []
+    for pofile_path in pofile_paths:
+        stat_result = os.stat(pofile_path)
+        key = [stat_result.st_mtime_ns, stat_result.st_size]
+        stats = cached_stats.get(pofile_path)
+        if stats is not None and stats["key"] == key:
+            pofiles_stats[pofile_path] = stats
+        else:
+            stale.append((pofile_path, key))
+    if not stale:
+        return pofiles_stats
+
+    results = [get_pofile_stats(pofile_path) for pofile_path, _ in stale]
+    for (pofile_path, key), stats in zip(stale, results):
+        stats["key"] = key
+        pofiles_stats[pofile_path] = stats
+    # The statistics of other PO files (ex. of another data repository) are
+    # retained
+    cached_stats.update(pofiles_stats)
+    save_po_stats_cache(cache_file, cached_stats)
+    return pofiles_stats
+
+
 def load_deeds_ux_translations():
     """
     Process Deed & UX translations (store information on all and track those
@@ -311,16 +550,21 @@ def load_deeds_ux_translations():
     """
     deeds_ux_po_file_info = {}
     languages_mostly_translated = []
-    for language_code, pofile_path in get_deeds_ux_pofiles():
-        pofile_obj = polib.pofile(pofile_path)
-        percent_translated = pofile_obj.percent_translated()
+    deeds_ux_pofiles = get_deeds_ux_pofiles()
+    update_lang_infos([language_code for language_code, _ in deeds_ux_pofiles])
+    pofiles_stats = get_deeds_ux_pofile_stats(
+        [pofile_path for _, pofile_path in deeds_ux_pofiles]
+    )
+    for language_code, pofile_path in deeds_ux_pofiles:
+        stats = pofiles_stats[pofile_path]
+        percent_translated = stats["percent_translated"]
+        metadata = stats["metadata"]
         deeds_ux_po_file_info[language_code] = {
             "percent_translated": percent_translated,
-            "creation_date": get_pofile_creation_date(pofile_obj),
-            "revision_date": get_pofile_revision_date(pofile_obj),
-            "metadata": pofile_obj.metadata,
+            "creation_date": parse_date(metadata.get("POT-Creation-Date")),
+            "revision_date": parse_date(metadata.get("PO-Revision-Date")),
+            "metadata": metadata,
         }
-        update_lang_info(language_code)
         if (
             percent_translated < settings.TRANSLATION_THRESHOLD
             and language_code != settings.LANGUAGE_CODE
@@ -335,9 +579,10 @@ def load_deeds_ux_translations():
     )
 
 
-def update_lang_info(language_code):
+def get_babel_lang_info(language_code):
     """
-    Normalize language information using Babel
+    Return the name, local name, and bidi of the language from Babel (None if
+    Babel does not contain locale information for the language).
     """
     order_to_bidi = {
         "left-to-right": False,
@@ -346,17 +591,99 @@ def update_lang_info(language_code):
     locale_name = translation.to_locale(language_code)
     try:
         locale = Locale.parse(locale_name)
+    except UnknownLocaleError:
+        return None
+    return {
+        "name": locale.get_display_name("en"),
+        "name_local": locale.get_display_name(locale_name),
+        "bidi": order_to_bidi[locale.character_order],
+    }
+
+
+def load_lang_info_table(table_file):
+    if table_file is None:
+        return {}
+    try:
+        with open(table_file, "rt", encoding="utf-8") as file_obj:
+            data = json.load(file_obj)
+    except (OSError, ValueError):
+        return {}
+    if (
+        data.get("version") != LANG_INFO_TABLE_VERSION
+        or data.get("babel") != babel.__version__
+    ):
+        return {}
+    return data["languages"]
+
+
+def save_lang_info_table(table_file, lang_info_table):
+    if table_file is None:
+        return
+    data = {
+        "version": LANG_INFO_TABLE_VERSION,
+        "babel": babel.__version__,
+        "languages": dict(sorted(lang_info_table.items())),
+    }
+    content = json.dumps(data, ensure_ascii=False, indent=0)
+    # Skip the write if the table is unchanged (ex. it was written by another
+    # process)
+    try:
+        with open(table_file, "rt", encoding="utf-8") as file_obj:
+            if file_obj.read() == content:
+                return
+    except (OSError, ValueError):
+        pass
+    temp_file = f"{table_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(table_file), exist_ok=True)
+        with open(temp_file, "wt", encoding="utf-8") as file_obj:
+            file_obj.write(content)
+        os.replace(temp_file, table_file)
+    except OSError:  # pragma: no cover
+        # The table is an optimization (ex. the directory may be read-only)
+        pass
+
+
+def update_lang_infos(language_codes):
+    """
+    Normalize language information using Babel
+
+    The language information from Babel is generated into
+    settings.LANG_INFO_TABLE_FILE, which is refreshed when the Babel version
+    changes, so that only languages missing from the table are parsed by
+    Babel (the table is not written if the setting is None, ex. while
+    testing).
+    """
+    global LANG_INFO_TABLE
+    if LANG_INFO_TABLE is None:
+        LANG_INFO_TABLE = load_lang_info_table(settings.LANG_INFO_TABLE_FILE)
+    missing = [
+        language_code
+        for language_code in language_codes
+        if language_code not in LANG_INFO_TABLE
+    ]
+    for language_code in missing:
+        LANG_INFO_TABLE[language_code] = get_babel_lang_info(language_code)
+    if missing:
+        save_lang_info_table(settings.LANG_INFO_TABLE_FILE, LANG_INFO_TABLE)
+
+    for language_code in language_codes:
+        babel_lang_info = LANG_INFO_TABLE[language_code]
+        if babel_lang_info is None:
+            continue
         if language_code not in LANG_INFO:
             LANG_INFO[language_code] = {}
         lang_info = LANG_INFO[language_code]
-        if not lang_info.get("name"):
-            lang_info["name"] = locale.get_display_name("en")
-        if not lang_info.get("name_local"):
-            lang_info["name_local"] = locale.get_display_name(locale_name)
-        if not lang_info.get("bidi"):
-            lang_info["bidi"] = order_to_bidi[locale.character_order]
-    except UnknownLocaleError:
-        pass
+        for key in ("name", "name_local", "bidi"):
+            if not lang_info.get(key):
+                lang_info[key] = babel_lang_info[key]
+
+
+def update_lang_info(language_code):
+    """
+    Normalize language information using Babel (see update_lang_infos())
+    """
+    update_lang_infos([language_code])
 
 
 def write_transstats_csv(output_file):
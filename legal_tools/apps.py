@@ -3,7 +3,7 @@ from django.apps import AppConfig
 from django.conf import settings
 
 # First-party/Local
-from i18n.utils import load_deeds_ux_translations, update_lang_info
+from i18n.utils import load_deeds_ux_translations, update_lang_infos
 from legal_tools.git_utils import setup_to_call_git
 
 
@@ -19,8 +19,7 @@ class LegalToolsConfig(AppConfig):
         setup_to_call_git()
 
         # Normalize all currently loaded language information using Babel
-        for language_code in settings.LANG_INFO.keys():
-            update_lang_info(language_code)
+        update_lang_infos(list(settings.LANG_INFO.keys()))
 
         # Process Deed & UX translations (store information on all and track
         # those that meet or exceed the TRANSLATION_THRESHOLD).
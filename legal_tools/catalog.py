@@ -0,0 +1,342 @@
+# Standard library
+import types
+from functools import lru_cache
+
+# Third-party
+from django.utils import translation
+
+# First-party/Local
+import legal_tools.models
+from legal_tools.publish_utils import record_dependency
+
+TOOL_CATALOG = None
+
+# Tool and LegalCode fields (attnames) included in the catalog records
+TOOL_FIELDS = (
+    "id",
+    "base_url",
+    "unit",
+    "version",
+    "spdx_identifier",
+    "jurisdiction_code",
+    "creator_url",
+    "category",
+    "source_id",
+    "is_replaced_by_id",
+    "deprecated_on",
+    "deed_only",
+    "permits_derivative_works",
+    "permits_reproduction",
+    "permits_distribution",
+    "permits_sharing",
+    "requires_share_alike",
+    "requires_notice",
+    "requires_attribution",
+    "prohibits_commercial_use",
+    "prohibits_high_income_nation_use",
+)
+LEGAL_CODE_FIELDS = (  # LegalCode.html is omitted
+    "id",
+    "tool_id",
+    "language_code",
+    "html_file",
+    "html_file_hash",
+    "translation_last_update",
+    "title",
+    "legal_code_url",
+    "deed_url",
+    "plain_text_url",
+)
+
+
+def init_tool_catalog(catalog=None):
+    """
+    Set (or, if catalog is None, unset) the tool catalog used by the lookup
+    functions of this module
+    """
+    global TOOL_CATALOG
+    TOOL_CATALOG = catalog
+
+
+def get_tool_catalog():
+    return TOOL_CATALOG
+
+
+class CatalogRecord:
+    """
+    Read-only record of a model row. Methods and properties of the model that
+    are not defined by the record are used as if they were the record's own
+    (ex. Tool.identifier(), Tool.nc).
+    """
+
+    __slots__ = ()
+    model_name = None
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not defined by the record
+        model = getattr(legal_tools.models, self.model_name)
+        attribute = getattr(model, name)
+        if isinstance(attribute, types.FunctionType):
+            return types.MethodType(attribute, self)
+        if isinstance(attribute, property):
+            return attribute.fget(self)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}>"
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class ToolRecord(CatalogRecord):
+    __slots__ = TOOL_FIELDS + (
+        "source_record",
+        "is_replaced_by_record",
+        "legal_codes_by_language",
+    )
+    model_name = "Tool"
+
+    @property
+    def source(self):
+        # The related tools are inputs of the current task as well
+        if self.source_record is not None:
+            record_dependency(f"tool:{self.source_id}")
+        return self.source_record
+
+    @property
+    def is_replaced_by(self):
+        if self.is_replaced_by_record is not None:
+            record_dependency(f"tool:{self.is_replaced_by_id}")
+        return self.is_replaced_by_record
+
+    def get_legal_code_for_language_code(self, language_code):
+        """
+        Return the LegalCodeRecord for this tool and language.
+        """
+        if not language_code:
+            language_code = translation.get_language()
+        try:
+            legal_code = self.legal_codes_by_language[language_code]
+        except KeyError:
+            raise legal_tools.models.LegalCode.DoesNotExist(
+                "LegalCode matching query does not exist."
+                f" language_code={language_code}"
+            )
+        record_dependency(f"tool:{self.id}")
+        record_dependency(f"legalcode:{legal_code.id}")
+        return legal_code
+
+
+class LegalCodeRecord(CatalogRecord):
+    __slots__ = LEGAL_CODE_FIELDS + ("tool", "valid")
+    model_name = "LegalCode"
+
+    @property
+    def html(self):
+        # The legal code HTML is the only field that is not held in memory
+        record_dependency(f"legalcode:{self.id}")
+        return get_legal_code_html(self.id)
+
+
+@lru_cache(maxsize=1)
+def get_legal_code_html(legal_code_id):
+    # Only the HTML of the most recent legal code is kept (the legal code
+    # template uses it more than once)
+    return legal_tools.models.LegalCode.objects.values_list(
+        "html", flat=True
+    ).get(pk=legal_code_id)
+
+
+class ToolCatalog:
+    """
+    Frozen in-memory catalog of every Tool and LegalCode (without the legal
+    code HTML) indexed by:
+    - (unit, version, jurisdiction_code)
+    - (tool id, language_code)
+    - legal_code_url
+
+    The lookups of the catalog record the rows they return as inputs of the
+    current publish task (see legal_tools.publish_utils.DependencyRecorder).
+    """
+
+    def __init__(self, tool_rows, legal_code_rows, valid_legal_code_ids):
+        get_legal_code_html.cache_clear()
+        self.tools = {}
+        self.tools_by_key = {}
+        for row in tool_rows:
+            tool = ToolRecord(
+                **row,
+                source_record=None,
+                is_replaced_by_record=None,
+                legal_codes_by_language={},
+            )
+            self.tools[tool.id] = tool
+            self.tools_by_key[
+                (tool.unit, tool.version, tool.jurisdiction_code)
+            ] = tool
+        for tool in self.tools.values():
+            object.__setattr__(
+                tool, "source_record", self.tools.get(tool.source_id)
+            )
+            object.__setattr__(
+                tool,
+                "is_replaced_by_record",
+                self.tools.get(tool.is_replaced_by_id),
+            )
+
+        self.legal_codes = {}
+        self.legal_codes_by_tool_language = {}
+        self.legal_codes_by_url = {}
+        for row in legal_code_rows:
+            tool = self.tools[row["tool_id"]]
+            legal_code = LegalCodeRecord(
+                **row, tool=tool, valid=row["id"] in valid_legal_code_ids
+            )
+            self.legal_codes[legal_code.id] = legal_code
+            self.legal_codes_by_tool_language[
+                (tool.id, legal_code.language_code)
+            ] = legal_code
+            self.legal_codes_by_url.setdefault(
+                legal_code.legal_code_url, legal_code
+            )
+            tool.legal_codes_by_language[legal_code.language_code] = legal_code
+
+    @classmethod
+    def load(cls):
+        Tool = legal_tools.models.Tool
+        LegalCode = legal_tools.models.LegalCode
+        return cls(
+            Tool.objects.order_by("id").values(*TOOL_FIELDS),
+            # LegalCode Meta.ordering ensures the legal codes of each tool are
+            # ordered by language_code
+            LegalCode.objects.values(*LEGAL_CODE_FIELDS),
+            set(LegalCode.objects.valid().values_list("id", flat=True)),
+        )
+
+    def get_tool_by_id(self, tool_id):
+        record_dependency(f"tool:{tool_id}")
+        return self.tools[tool_id]
+
+    def get_legal_code_by_id(self, legal_code_id):
+        legal_code = self.legal_codes[legal_code_id]
+        record_dependency(f"tool:{legal_code.tool_id}")
+        record_dependency(f"legalcode:{legal_code_id}")
+        return legal_code
+
+    def get_tool(self, unit, version, jurisdiction_code):
+        try:
+            tool = self.tools_by_key[(unit, version, jurisdiction_code)]
+        except KeyError:
+            raise legal_tools.models.Tool.DoesNotExist(
+                "Tool matching query does not exist."
+            )
+        record_dependency(f"tool:{tool.id}")
+        return tool
+
+    def get_legal_code(self, tool_id, language_code, valid=False):
+        legal_code = self.legal_codes_by_tool_language.get(
+            (tool_id, language_code)
+        )
+        if legal_code is None or (valid and not legal_code.valid):
+            raise legal_tools.models.LegalCode.DoesNotExist(
+                "LegalCode matching query does not exist."
+            )
+        record_dependency(f"tool:{tool_id}")
+        record_dependency(f"legalcode:{legal_code.id}")
+        return legal_code
+
+    def get_legal_code_by_url(self, legal_code_url):
+        try:
+            legal_code = self.legal_codes_by_url[legal_code_url]
+        except KeyError:
+            raise legal_tools.models.LegalCode.DoesNotExist(
+                "LegalCode matching query does not exist."
+            )
+        record_dependency(f"tool:{legal_code.tool_id}")
+        record_dependency(f"legalcode:{legal_code.id}")
+        return legal_code
+
+    def get_legal_codes(self, tool):
+        tool = self.tools[tool.id]
+        legal_codes = list(tool.legal_codes_by_language.values())
+        for legal_code in legal_codes:
+            record_dependency(f"legalcode:{legal_code.id}")
+        return legal_codes
+
+
+def lookup_tool(unit, version, jurisdiction_code):
+    """
+    Return the Tool (or ToolRecord, if the catalog is enabled).
+    """
+    if TOOL_CATALOG is None:
+        return legal_tools.models.Tool.objects.get(
+            unit=unit, version=version, jurisdiction_code=jurisdiction_code
+        )
+    return TOOL_CATALOG.get_tool(unit, version, jurisdiction_code)
+
+
+def lookup_legal_code(
+    category, unit, version, jurisdiction_code, language_code
+):
+    """
+    Return the LegalCode (or LegalCodeRecord, if the catalog is enabled).
+    """
+    if TOOL_CATALOG is None:
+        return legal_tools.models.LegalCode.objects.get(
+            tool__category=category,
+            tool__version=version,
+            tool__unit=unit,
+            tool__jurisdiction_code=jurisdiction_code,
+            language_code=language_code,
+        )
+    tool = TOOL_CATALOG.get_tool(unit, version, jurisdiction_code)
+    if tool.category != category:
+        raise legal_tools.models.LegalCode.DoesNotExist(
+            "LegalCode matching query does not exist."
+        )
+    return TOOL_CATALOG.get_legal_code(tool.id, language_code)
+
+
+def lookup_valid_legal_code(tool, language_code):
+    """
+    Return the valid LegalCode (or LegalCodeRecord, if the catalog is enabled)
+    for the tool and language.
+    """
+    if TOOL_CATALOG is None:
+        return legal_tools.models.LegalCode.objects.valid().get(
+            tool=tool, language_code=language_code
+        )
+    return TOOL_CATALOG.get_legal_code(tool.id, language_code, valid=True)
+
+
+def lookup_legal_code_by_url(legal_code_url):
+    """
+    Return the LegalCode (or LegalCodeRecord, if the catalog is enabled) with
+    the legal_code_url.
+    """
+    if TOOL_CATALOG is None:
+        return legal_tools.models.LegalCode.objects.get(
+            legal_code_url=legal_code_url
+        )
+    return TOOL_CATALOG.get_legal_code_by_url(legal_code_url)
+
+
+def lookup_legal_codes(tool):
+    """
+    Return the LegalCode objects (or LegalCodeRecords, if the catalog is
+    enabled) of the tool.
+    """
+    if TOOL_CATALOG is None:
+        return tool.legal_codes.all()
+    return TOOL_CATALOG.get_legal_codes(tool)
@@ -0,0 +1,171 @@
+# Standard library
+import hashlib
+import os
+import sqlite3
+import time
+
+FORMAT_CACHE = None
+# Seconds to wait for the lock of a database that is being written by another
+# process
+FORMAT_CACHE_TIMEOUT = 60
+
+
+def init_format_cache(format_cache=None):
+    """
+    Set (or, if format_cache is None, unset) the formatted HTML cache used by
+    legal_tools.view_utils.pretty_html_bytes()
+    """
+    global FORMAT_CACHE
+    FORMAT_CACHE = format_cache
+
+
+def get_format_cache():
+    return FORMAT_CACHE
+
+
+def new_cache_counters():
+    return {"hits": 0, "misses": 0}
+
+
+def format_cache_counters(counters):
+    lookups = counters["hits"] + counters["misses"]
+    rate = counters["hits"] / lookups * 100 if lookups else 0
+    return (
+        f"{counters['hits']} hits, {counters['misses']} misses"
+        f" ({rate:.1f}% hit rate)"
+    )
+
+
+class FormatCache:
+    """
+    Persistent, size-bounded LRU cache of formatted HTML stored in a SQLite
+    database. Entries are keyed by the SHA-256 digest of the formatter version
+    and the raw (unformatted) HTML.
+
+    Each cache has its own table of the database (ex. the RDF/XML fragments
+    of legal tools are cached in the same database as the formatted HTML, but
+    their keys, size budget, and eviction are separate).
+
+    The cache may be used concurrently by multiple processes (ex. the publish
+    command's Pool workers): each process opens its own connection and the
+    database uses write-ahead logging, so readers are not blocked by a writer.
+    Entries are evicted, least recently used first, by prune().
+    """
+
+    def __init__(self, path, max_bytes, table="formatted"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.table = table
+        self.pid = None
+        self.connection = None
+        self.counters = new_cache_counters()
+
+    def connect(self):
+        """
+        Return the connection of the current process (connections can't be
+        shared with processes forked by the publish command's Pool).
+        """
+        if self.pid == os.getpid():
+            return self.connection
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=FORMAT_CACHE_TIMEOUT)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Commits aren't synced to disk (losing the most recent entries after
+        # a power failure is harmless)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            " key TEXT PRIMARY KEY,"
+            " html BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed INTEGER NOT NULL)"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_accessed"
+            f" ON {self.table} (accessed)"
+        )
+        self.pid = os.getpid()
+        self.connection = connection
+        return connection
+
+    @staticmethod
+    def key(html_bytes, version):
+        digest = hashlib.sha256(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(html_bytes)
+        return digest.hexdigest()
+
+    def get_many(self, keys):
+        """
+        Return a dictionary of the formatted HTML of the keys that are cached.
+        """
+        connection = self.connect()
+        found = {}
+        for key in keys:
+            row = connection.execute(
+                f"SELECT html FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                found[key] = row[0]
+        self.counters["hits"] += len(found)
+        self.counters["misses"] += len(keys) - len(found)
+        if found:
+            accessed = time.time_ns()
+            with connection:
+                connection.executemany(
+                    f"UPDATE {self.table} SET accessed = ? WHERE key = ?",
+                    [(accessed, key) for key in found],
+                )
+        return found
+
+    def put_many(self, entries):
+        """
+        Cache the formatted HTML of each key of the entries dictionary.
+        """
+        if not entries:
+            return
+        connection = self.connect()
+        accessed = time.time_ns()
+        with connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table}"
+                " (key, html, size, accessed) VALUES (?, ?, ?, ?)",
+                [
+                    (key, html, len(html), accessed)
+                    for key, html in entries.items()
+                ],
+            )
+
+    def prune(self):
+        """
+        Evict the least recently used entries until the size of the cached
+        HTML is at most max_bytes. Return the number of evicted entries.
+        """
+        connection = self.connect()
+        with connection:
+            total = connection.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            evicted = []
+            for key, size in connection.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed, key"
+            ):
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            connection.executemany(
+                f"DELETE FROM {self.table} WHERE key = ?", evicted
+            )
+        return len(evicted)
+
+    def drain_counters(self):
+        """
+        Return and reset the counters (used to send the counters of a worker
+        process to the parent process).
+        """
+        counters = self.counters
+        self.counters = new_cache_counters()
+        return counters
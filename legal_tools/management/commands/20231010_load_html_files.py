@@ -1,16 +1,20 @@
 # Standard library
 import datetime
+import hashlib
 import logging
 import os
 import socket
+import time
 import warnings
 from argparse import ArgumentParser
+from multiprocessing import Pool
 
 # Third-party
 from bs4 import BeautifulSoup, Tag
 from bs4.builder import XMLParsedAsHTMLWarning
 from django.conf import settings
 from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connections, transaction
 from django.utils.translation import to_locale
 from polib import POEntry, POFile
 
@@ -42,9 +46,91 @@ LOG_LEVELS = {
 }
 NOW = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S+0000")
 
+# Number of imported legal codes that are saved together
+SAVE_BATCH_SIZE = 500
+# Command of each worker process (see init_worker)
+WORKER_COMMAND = None
+
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
 
+def init_worker(
+    unwrapped, pomofiles, english_by_unit_version, disclaimers_english
+):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    global WORKER_COMMAND
+    WORKER_COMMAND = Command()
+    WORKER_COMMAND.unwrapped = unwrapped
+    WORKER_COMMAND.pomofiles = pomofiles
+    WORKER_COMMAND.english_by_unit_version = english_by_unit_version
+    WORKER_COMMAND.disclaimers_english = disclaimers_english
+
+
+def import_legal_code(legal_code):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    #
+    # The legal code is returned to be saved by the parent process (with its
+    # disclaimers, see Command.import_legal_code).
+    return legal_code, WORKER_COMMAND.import_legal_code(legal_code)
+
+
+def get_html_file_hash(legal_code):
+    """
+    Return the SHA-256 hash of the content of the legal code's HTML file (an
+    empty string for deed-only legal codes, which don't have one).
+    """
+    if legal_code.tool.deed_only:
+        return ""
+    with open(legal_code.html_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_changed_legal_code_ids(legal_codes, incremental):
+    """
+    Return the IDs of the legal codes to import (and set the html_file_hash
+    of those that changed). If incremental is True, only the legal codes whose
+    HTML file changed since it was last imported are returned, along with the
+    legal codes of the same unit and version as a changed English legal code
+    (the English messages are the keys of their .po files).
+    """
+    changed_ids = set()
+    changed_english = set()
+    for legal_code in legal_codes:
+        tool = legal_code.tool
+        html_file_hash = get_html_file_hash(legal_code)
+        if (
+            incremental
+            and html_file_hash == legal_code.html_file_hash
+            # (deed-only legal codes don't have an HTML file)
+            and not tool.deed_only
+        ):
+            continue
+        legal_code.html_file_hash = html_file_hash
+        changed_ids.add(legal_code.id)
+        if legal_code.language_code == "en":
+            changed_english.add((tool.unit, tool.version))
+    for legal_code in legal_codes:
+        if (legal_code.tool.unit, legal_code.tool.version) in changed_english:
+            changed_ids.add(legal_code.id)
+    return changed_ids
+
+
+def save_legal_codes(legal_codes):
+    # The legal codes are loaded without their HTML, which is only saved if it
+    # was set (see Command.simple_import_license_html)
+    for legal_code in legal_codes:
+        legal_code.update_urls()
+    LegalCode.objects.bulk_update(
+        legal_codes, ["title", "html_file_hash", "deed_url", "legal_code_url"]
+    )
+    LegalCode.objects.bulk_update(
+        [lc for lc in legal_codes if "html" not in lc.get_deferred_fields()],
+        ["html"],
+    )
+
+
 class Command(BaseCommand):
     """
     Read the HTML files from a directory, figure out which tools they are,
@@ -96,6 +182,22 @@ class Command(BaseCommand):
             help="Do not wrap lines in output .po files. Helpful if you need"
             " to copy messages. DON'T COMMIT THE UNWRAPPED FILES.",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            action="store",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes that parse the non-English legal code"
+            " HTML files. Default: the number of CPUs",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Skip the legal codes whose HTML file's content is unchanged"
+            " since it was last imported (the title and .po and .mo files of"
+            " a skipped legal code are not updated)",
+        )
 
     def handle(self, input_directory, **options):
         LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
@@ -103,6 +205,8 @@ class Command(BaseCommand):
             raise CommandError(f"invalid input_directory: {input_directory}")
         self.unwrapped = options["unwrapped"]
         self.pomofiles = options["pomofiles"]
+        if options["jobs"] < 1:
+            raise CommandError("--jobs must be at least 1")
         hostname = socket.gethostname()
         # category_to_include
         if options["category"]:
@@ -126,9 +230,8 @@ class Command(BaseCommand):
         else:
             versions_to_include = None
 
-        tools_created = 0
-        legal_codes_created = 0
-        legal_codes_to_import = []
+        planned_tools = {}
+        planned_legal_codes = {}
 
         # Get list of html filenames. We'll filter out the filenames for
         # unwanted versions later (see include variable).
@@ -228,12 +331,12 @@ class Command(BaseCommand):
                 requires_notice = False
                 requires_share_alike = False
 
-            # Find or create a Tool object
+            # Plan the Tool object (the first HTML file of a tool defines it)
             prohibits_hinu = prohibits_high_income_nation_use
-            tool, created = Tool.objects.get_or_create(
-                base_url=base_url,
-                category=category,
-                defaults=dict(
+            if base_url not in planned_tools:
+                planned_tools[base_url] = Tool(
+                    base_url=base_url,
+                    category=category,
                     unit=unit,
                     version=version,
                     jurisdiction_code=jurisdiction_code,
@@ -249,140 +352,335 @@ class Command(BaseCommand):
                     requires_attribution=requires_attribution,
                     prohibits_commercial_use=prohibits_commercial_use,
                     prohibits_high_income_nation_use=prohibits_hinu,
-                ),
-            )
-            if created:
-                tools_created += 1
-            # Find or create a LegalCode object
-            legal_code, created = LegalCode.objects.get_or_create(
-                tool=tool,
-                language_code=language_code,
-                defaults=dict(
-                    html_file=fullpath,
-                ),
-            )
-
-            if created:
-                legal_codes_created += 1
-            legal_codes_to_import.append(legal_code)
+                )
+            # Plan the LegalCode object
+            planned_legal_codes.setdefault((base_url, language_code), fullpath)
+
+        # Find or create the Tool and LegalCode objects (with bulk queries
+        # instead of a query per object)
+        with transaction.atomic():
+            tools, tools_created = self.get_or_create_tools(planned_tools)
+            (
+                legal_codes_to_import,
+                legal_codes_created,
+            ) = self.get_or_create_legal_codes(tools, planned_legal_codes)
+        LOG.info(
+            f"Created {tools_created} tools and {legal_codes_created} legal"
+            " codes"
+        )
 
-        # NOW parse the HTML and output message files
-        legal_codes_to_import = LegalCode.objects.filter(
-            pk__in=[lc.pk for lc in legal_codes_to_import]
+        # Parse the HTML and output message files outside of any transaction
+        # (the process pool must not be forked during one), then save the
+        # legal codes in a single transaction
+        legal_codes = self.import_all_legal_codes(
+            legal_codes_to_import,
+            options["jobs"],
+            options["incremental"],
         )
+        with transaction.atomic():
+            for start in range(0, len(legal_codes), SAVE_BATCH_SIZE):
+                end = start + SAVE_BATCH_SIZE
+                save_legal_codes(legal_codes[start:end])
+
+        call_command("update_is_replaced_by", verbosity=options["verbosity"])
+        call_command("update_source", verbosity=options["verbosity"])
+
+    def get_or_create_tools(self, planned_tools):
+        """
+        Return the Tool objects of the planned tools (by base URL), creating
+        the ones that don't exist, and the number of tools created.
+        """
+        base_urls = list(planned_tools.keys())
+        tools = Tool.objects.in_bulk(base_urls, field_name="base_url")
+        new_tools = [
+            tool
+            for base_url, tool in planned_tools.items()
+            if base_url not in tools
+        ]
+        if new_tools:
+            Tool.objects.bulk_create(new_tools)
+            tools = Tool.objects.in_bulk(base_urls, field_name="base_url")
+        return tools, len(new_tools)
+
+    def get_or_create_legal_codes(self, tools, planned_legal_codes):
+        """
+        Return the LegalCode objects of the planned legal codes (by base URL
+        and language code, without their HTML), creating the ones that don't
+        exist, and the number of legal codes created.
+        """
 
+        def get_legal_codes():
+            legal_codes = {}
+            for legal_code in LegalCode.objects.filter(
+                tool__in=tools.values()
+            ).defer("html"):
+                key = (legal_code.tool_id, legal_code.language_code)
+                legal_codes[key] = legal_code
+            return legal_codes
+
+        legal_codes = get_legal_codes()
+        new_legal_codes = []
+        for (
+            base_url,
+            language_code,
+        ), html_file in planned_legal_codes.items():
+            tool = tools[base_url]
+            if (tool.id, language_code) not in legal_codes:
+                legal_code = LegalCode(
+                    tool=tool,
+                    language_code=language_code,
+                    html_file=html_file,
+                )
+                legal_code.update_urls()
+                new_legal_codes.append(legal_code)
+        if new_legal_codes:
+            LegalCode.objects.bulk_create(new_legal_codes)
+            legal_codes = get_legal_codes()
+
+        legal_codes_to_import = []
+        for base_url, language_code in planned_legal_codes.keys():
+            tool = tools[base_url]
+            legal_code = legal_codes[(tool.id, language_code)]
+            legal_code.tool = tool
+            legal_codes_to_import.append(legal_code)
+        return legal_codes_to_import, len(new_legal_codes)
+
+    def import_all_legal_codes(self, legal_codes_to_import, jobs, incremental):
+        """
+        Parse the HTML of the legal codes and output message files, without
+        accessing the database, and return the legal codes to save. If
+        incremental is True, the legal codes whose HTML file is unchanged since
+        it was last imported are skipped.
+        """
         # What are the language codes we have HTML files for?
         language_codes = sorted(
             set(lc.language_code for lc in legal_codes_to_import)
         )
 
-        english_by_unit_version = {}
-        disclaimers_english = []
+        # Sort by tool (like the Tool model's ordering), then by language
+        # code
+        legal_codes_to_import = sorted(
+            legal_codes_to_import,
+            key=lambda lc: (lc.tool.unit, lc.tool.jurisdiction_code),
+        )
+        legal_codes_to_import.sort(
+            key=lambda lc: lc.tool.version, reverse=True
+        )
+        legal_codes_to_import.sort(key=lambda lc: lc.language_code)
+
+        changed_ids = get_changed_legal_code_ids(
+            legal_codes_to_import, incremental
+        )
+        if incremental:
+            LOG.info(
+                "Skipping"
+                f" {len(legal_codes_to_import) - len(changed_ids)} unchanged"
+                " legal code HTML files"
+            )
+        # The English messages of a unit and version are the keys of the .po
+        # files of its other languages, so unchanged English legal codes are
+        # parsed (without writing files) if they are required
+        required_keys = {
+            f"{lc.tool.unit}|{lc.tool.version}"
+            for lc in legal_codes_to_import
+            if lc.id in changed_ids and lc.language_code != "en"
+        }
+
+        self.english_by_unit_version = {}
+        self.disclaimers_english = []
 
         # We have to do English first. Django gets confused if you try to load
         # another language and it can't find English, I guess it's looking for
-        # something to fall back to.
+        # something to fall back to. (The English messages are also the keys
+        # of the other languages' .po files.)
         language_codes.remove(
             "en"
         )  # If english isn't in this list, something is wrong
-        for language_code in ["en"] + language_codes:
-            for legal_code in legal_codes_to_import.filter(
-                language_code=language_code,
-            ).order_by(
-                "-tool__version",
-                "tool__unit",
-                "tool__jurisdiction_code",
-            ):
-                tool = legal_code.tool
-                unit = tool.unit
-                version = tool.version
-                support_po_files = False
-                disclaimers_text = False
-
-                # Deed-only
-                if tool.deed_only:
-                    if unit == "mark":
-                        legal_code.title = "Public Domain Mark 1.0"
-                        legal_code.save()
-                    elif unit == "certification":
-                        legal_code.title = (
-                            "Copyright-Only Dedication* (based on United"
-                            " States law) or Public Domain Certification"
-                        )
-                        legal_code.save()
-                    else:
-                        raise CommandError(
-                            f"NotImplementedError: unit={unit}"
-                            f" version={version}"
-                        )
-                    continue
+        # The temporary Deeds & UX .po file of each language is written once,
+        # by this process, with the disclaimers of its last legal code (in the
+        # order above)
+        order = {
+            lc.id: index for index, lc in enumerate(legal_codes_to_import)
+        }
+        disclaimers = []
 
-                with open(legal_code.html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                if tool.category == "licenses":
-                    if version == "4.0":
-                        support_po_files = True
-                        (
-                            messages_text,
-                            disclaimers_text,
-                        ) = self.import_by_40_license_html(
-                            content=content,
-                            legal_code=legal_code,
-                        )
-                    elif version == "3.0" and not tool.jurisdiction_code:
-                        # 3.0 Unported license: we parse out the messages like
-                        # 4.0
-                        messages_text = (
-                            self.import_by_30_unported_license_html(
-                                content=content,
-                                legal_code=legal_code,
-                            )
-                        )
-                    else:
-                        # all others: we just save the HTML for now
-                        self.simple_import_license_html(
-                            content=content,
-                            legal_code=legal_code,
-                            version=version,
-                        )
-                        continue
-                elif unit == "zero":
-                    support_po_files = True
-                    messages_text = self.import_zero_license_html(
-                        content=content,
-                        legal_code=legal_code,
-                    )
-                else:
-                    raise CommandError(
-                        f"NotImplementedError: unit={unit} version={version}"
+        start = time.perf_counter()
+        imported = []
+        for legal_code in legal_codes_to_import:
+            if legal_code.language_code != "en":
+                continue
+            if legal_code.id in changed_ids:
+                disclaimers_text = self.import_legal_code(legal_code)
+                if disclaimers_text:
+                    disclaimers.append(
+                        (order[legal_code.id], "en", disclaimers_text)
                     )
+                imported.append(legal_code)
+            elif f"{legal_code.tool.unit}|{legal_code.tool.version}" in (
+                required_keys
+            ):
+                self.import_legal_code(legal_code, write_files=False)
+        LOG.info(
+            "Imported English legal code HTML in"
+            f" {time.perf_counter() - start:.1f} seconds"
+        )
 
-                if support_po_files:
-                    # Deeds & UX temporary
-                    if disclaimers_text:
-                        if language_code == "en":
-                            disclaimers_english = disclaimers_text
-                        self.write_temp_po_files(
-                            language_code,
-                            disclaimers_english,
-                            disclaimers_text,
-                        )
-
-                if support_po_files and self.pomofiles:
-                    # Legal Code
-                    if language_code == "en":
-                        key = f"{unit}|{version}"
-                        english_by_unit_version[key] = messages_text
-                    self.write_po_files(
-                        legal_code,
-                        language_code,
-                        english_by_unit_version,
-                        messages_text,
+        # The other languages are parsed (and their .po and .mo files written)
+        # by a process pool
+        start = time.perf_counter()
+        legal_codes = [
+            lc
+            for lc in legal_codes_to_import
+            if lc.language_code != "en" and lc.id in changed_ids
+        ]
+        jobs = min(jobs, len(legal_codes))
+        for legal_code, disclaimers_text in self.import_legal_codes(
+            legal_codes, jobs
+        ):
+            if disclaimers_text:
+                disclaimers.append(
+                    (
+                        order[legal_code.id],
+                        legal_code.language_code,
+                        disclaimers_text,
                     )
+                )
+            imported.append(legal_code)
+        LOG.info(
+            f"Imported {len(legal_codes)} other legal code HTML files"
+            f" ({len(language_codes)} languages, {max(jobs, 1)} processes) in"
+            f" {time.perf_counter() - start:.1f} seconds"
+        )
 
-        call_command("update_is_replaced_by", verbosity=options["verbosity"])
-        call_command("update_source", verbosity=options["verbosity"])
+        disclaimers_by_language = {
+            language_code: disclaimers_text
+            for _, language_code, disclaimers_text in sorted(disclaimers)
+        }
+        for language_code, disclaimers_text in disclaimers_by_language.items():
+            self.write_temp_po_files(
+                language_code,
+                self.disclaimers_english,
+                disclaimers_text,
+            )
+        return imported
+
+    def import_legal_codes(self, legal_codes, jobs):
+        """
+        Import the legal codes (see import_legal_code) with a process pool of
+        the number of jobs, yielding each legal code and its disclaimers (in
+        no particular order) once it is imported.
+        """
+        if jobs < 2:
+            for legal_code in legal_codes:
+                yield legal_code, self.import_legal_code(legal_code)
+            return
+        # The workers don't use the database: close the connections so that
+        # they aren't shared with the forked processes (they are reopened when
+        # needed)
+        connections.close_all()
+        with Pool(
+            jobs,
+            initializer=init_worker,
+            initargs=(
+                self.unwrapped,
+                self.pomofiles,
+                self.english_by_unit_version,
+                self.disclaimers_english,
+            ),
+        ) as pool:
+            yield from pool.imap_unordered(import_legal_code, legal_codes)
+
+    def import_legal_code(self, legal_code, write_files=True):
+        """
+        Parse the HTML of the legal code, updating its title (and, for legal
+        codes without translation files, its HTML), and write its .po and .mo
+        files (unless write_files is False). The legal code is not saved.
+
+        Return the disclaimers of the legal code (False if it has none), for
+        the caller to write them to the temporary Deeds & UX .po file of its
+        language (see write_temp_po_files).
+
+        The English legal codes must be imported first: their messages are
+        the keys of the other languages' .po files.
+        """
+        tool = legal_code.tool
+        unit = tool.unit
+        version = tool.version
+        language_code = legal_code.language_code
+        support_po_files = False
+        disclaimers_text = False
+
+        # Deed-only
+        if tool.deed_only:
+            if unit == "mark":
+                legal_code.title = "Public Domain Mark 1.0"
+            elif unit == "certification":
+                legal_code.title = (
+                    "Copyright-Only Dedication* (based on United"
+                    " States law) or Public Domain Certification"
+                )
+            else:
+                raise CommandError(
+                    f"NotImplementedError: unit={unit} version={version}"
+                )
+            return disclaimers_text
+
+        with open(legal_code.html_file, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        if tool.category == "licenses":
+            if version == "4.0":
+                support_po_files = True
+                (
+                    messages_text,
+                    disclaimers_text,
+                ) = self.import_by_40_license_html(
+                    content=content,
+                    legal_code=legal_code,
+                )
+            elif version == "3.0" and not tool.jurisdiction_code:
+                # 3.0 Unported license: we parse out the messages like 4.0
+                messages_text = self.import_by_30_unported_license_html(
+                    content=content,
+                    legal_code=legal_code,
+                )
+            else:
+                # all others: we just save the HTML for now
+                self.simple_import_license_html(
+                    content=content,
+                    legal_code=legal_code,
+                    version=version,
+                )
+                return disclaimers_text
+        elif unit == "zero":
+            support_po_files = True
+            messages_text = self.import_zero_license_html(
+                content=content,
+                legal_code=legal_code,
+            )
+        else:
+            raise CommandError(
+                f"NotImplementedError: unit={unit} version={version}"
+            )
+
+        if support_po_files and language_code == "en":
+            if disclaimers_text:
+                self.disclaimers_english = disclaimers_text
+            if self.pomofiles:
+                key = f"{unit}|{version}"
+                self.english_by_unit_version[key] = messages_text
+        if not write_files:
+            return disclaimers_text
+
+        if support_po_files and self.pomofiles:
+            # Legal Code
+            self.write_po_files(
+                legal_code,
+                language_code,
+                self.english_by_unit_version,
+                messages_text,
+            )
+        return disclaimers_text
 
     def write_temp_po_files(
         self,
@@ -426,8 +724,7 @@ class Command(BaseCommand):
         }
 
         directory = os.path.dirname(po_filename)
-        if not os.path.isdir(directory):
-            os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
         # Save mofile ourself. We could call 'compilemessages' but
         # it wants to compile everything, which is both overkill
         # and can fail if the venv or project source is not
@@ -489,8 +786,7 @@ class Command(BaseCommand):
         }
 
         directory = os.path.dirname(po_filename)
-        if not os.path.isdir(directory):
-            os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
         # Save mofile ourself. We could call 'compilemessages' but
         # it wants to compile everything, which is both overkill
         # and can fail if the venv or project source is not
@@ -512,7 +808,6 @@ class Command(BaseCommand):
             soup.find(id="deed-license").h2
         )
         legal_code.title = messages["license_medium"]
-        legal_code.save()
 
         # Big disclaimer (all caps)
         messages["disclaimer"] = clean_string(
@@ -700,7 +995,6 @@ class Command(BaseCommand):
             soup.find(id="deed-license").h2
         )
         legal_code.title = messages["license_medium"]
-        legal_code.save()
         messages["license_long"] = inner_html(deed_main_content.h3)
         messages["license_intro"] = inner_html(
             deed_main_content.h3.find_next_sibling("p")
@@ -1086,7 +1380,6 @@ class Command(BaseCommand):
             soup.find(id="deed-license").h2
         )
         legal_code.title = messages["license_medium"]
-        legal_code.save()
 
         deed_main_content = soup.find(id="deed-main-content")
 
@@ -1303,4 +1596,3 @@ class Command(BaseCommand):
 
         assert isinstance(html, str)
         legal_code.html = html
-        legal_code.save()
@@ -0,0 +1,112 @@
+# Standard library
+import glob
+import logging
+import os
+import time
+from argparse import ArgumentParser
+from itertools import cycle, islice
+
+# Third-party
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# First-party/Local
+from legal_tools.prettier_utils import PRETTIER_URL, PrettierClient
+
+LOG = logging.getLogger(__name__)
+LOG_LEVELS = {
+    0: logging.ERROR,
+    1: logging.WARNING,
+    2: logging.INFO,
+    3: logging.DEBUG,
+}
+BATCH_SIZES = "1,8,32,128"
+
+
+class Command(BaseCommand):
+    """
+    Compare the throughput of the Prettier service at different batch sizes
+    by formatting HTML files published to the data repository's docs
+    directory (a batch size of 1 uses the single document endpoint).
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        # Python defaults to lowercase starting character for the first
+        # character of help text, but Djano appears to use uppercase and so
+        # shall we
+        parser.description = self.__doc__
+        parser._optionals.title = "Django optional arguments"
+        parser.add_argument(
+            "--batch-sizes",
+            action="store",
+            default=BATCH_SIZES,
+            help=f"Comma separated batch sizes. Default: {BATCH_SIZES}",
+        )
+        parser.add_argument(
+            "--documents",
+            action="store",
+            type=int,
+            default=512,
+            help="Number of documents formatted for each batch size."
+            " Default: 512",
+        )
+
+    def load_documents(self, count):
+        output_dir = os.path.abspath(settings.DISTILL_DIR)
+        paths = sorted(
+            glob.glob(os.path.join(output_dir, "**", "*.html"), recursive=True)
+        )
+        paths = [path for path in paths if not os.path.islink(path)]
+        if not paths:
+            raise CommandError(
+                f"No HTML files in DISTILL_DIR={output_dir}. Run the"
+                " `publish` command first."
+            )
+        documents = []
+        for path in islice(cycle(paths), count):
+            with open(path, "rb") as file_obj:
+                documents.append(file_obj.read())
+        return documents
+
+    def handle(self, **options):
+        LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
+        try:
+            batch_sizes = [
+                int(size) for size in options["batch_sizes"].split(",")
+            ]
+        except ValueError:
+            raise CommandError(
+                "--batch-sizes must be comma separated integers"
+            )
+        if min(batch_sizes) < 1 or options["documents"] < 1:
+            raise CommandError("Batch sizes and documents must be at least 1")
+        documents = self.load_documents(options["documents"])
+        size = sum(len(document) for document in documents)
+        LOG.info(
+            f"Formatting {len(documents)} documents ({size} bytes) with"
+            f" {PRETTIER_URL}"
+        )
+        client = PrettierClient(PRETTIER_URL)
+        LOG.info(f"Prettier replicas: {len(client.urls)}")
+        # Warm up the connections (and each replica's Prettier)
+        for _ in client.urls:
+            client.format_html(documents[0])
+        client.drain_counters()
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            if batch_size == 1:
+                for document in documents:
+                    client.format_html(document)
+            else:
+                for index in range(0, len(documents), batch_size):
+                    end = index + batch_size
+                    client.format_html_batch(documents[index:end])
+            elapsed = time.perf_counter() - start
+            counters = client.drain_counters()
+            self.stdout.write(
+                f"batch size {batch_size:>4}:"
+                f" {len(documents) / elapsed:8.1f} documents/s,"
+                f" {counters['requests']:>4} requests,"
+                f" {counters['latency'] / counters['requests'] * 1000:8.1f}"
+                " ms mean request latency"
+            )
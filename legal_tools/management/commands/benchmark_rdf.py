@@ -0,0 +1,163 @@
+# Standard library
+import logging
+import time
+from argparse import ArgumentParser
+
+# Third-party
+from django.core.management import BaseCommand, CommandError
+from rdflib import Graph
+
+# First-party/Local
+from legal_tools.models import Tool
+from legal_tools.rdf_utils import (
+    generate_legal_code_rdf,
+    generate_legal_code_rdf_xml,
+    get_rdf_tools,
+    legal_tools_rdf_exports,
+    order_rdf_xml,
+)
+
+LOG = logging.getLogger(__name__)
+LOG_LEVELS = {
+    0: logging.ERROR,
+    1: logging.WARNING,
+    2: logging.INFO,
+    3: logging.DEBUG,
+}
+# rdflib parser of each RDF format published (by file extension)
+PARSE_FORMATS = {
+    ".rdf": "xml",
+    ".jsonld": "json-ld",
+    ".nt": "nt",
+    ".ttl": "turtle",
+}
+
+
+def rdflib_rdf_xml(*args, **kwargs):
+    graph = generate_legal_code_rdf(*args, **kwargs)
+    return order_rdf_xml(graph.serialize(format="pretty-xml"))
+
+
+class Command(BaseCommand):
+    """
+    Compare the time to generate the RDF/XML of each legal tool and of
+    index.rdf with rdflib (serialized with pretty-xml and ordered with lxml)
+    and with the direct RDF/XML writer (and check that the RDF/XML is
+    identical). Then compare the time to export index.rdf in the other RDF
+    formats and the time taken by consumers to parse each format (with
+    rdflib).
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        # Python defaults to lowercase starting character for the first
+        # character of help text, but Djano appears to use uppercase and so
+        # shall we
+        parser.description = self.__doc__
+        parser._optionals.title = "Django optional arguments"
+        parser.add_argument(
+            "--repeat",
+            action="store",
+            type=int,
+            default=3,
+            help="Number of times index.rdf is generated by each method (the"
+            " fastest time is reported). Default: 3",
+        )
+
+    def time_tools(self, generate, tools):
+        timings = []
+        documents = []
+        for tool in tools:
+            start = time.perf_counter()
+            documents.append(
+                generate(
+                    tool.category,
+                    tool.unit,
+                    tool.version,
+                    tool.jurisdiction_code,
+                )
+            )
+            timings.append(time.perf_counter() - start)
+        return timings, documents
+
+    def time_index(self, generate, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            document = generate(generate_all_licenses=True)
+            timings.append(time.perf_counter() - start)
+        return min(timings), document
+
+    def time_parse(self, documents, repeat):
+        """
+        Parse the index of each format and check that the graphs have the
+        same number of triples.
+        """
+        triples = set()
+        for extension, document in documents.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                graph = Graph().parse(
+                    data=document, format=PARSE_FORMATS[extension]
+                )
+                timings.append(time.perf_counter() - start)
+            triples.add(len(graph))
+            self.stdout.write(
+                f"parse index{extension:<7}:"
+                f" {len(document) / 1024:9.1f} KiB,"
+                f" {min(timings):7.2f} s"
+            )
+        if len(triples) > 1:
+            raise CommandError("Parsed RDF formats are not identical")
+
+    def handle(self, **options):
+        LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+        tools = list(Tool.objects.all())
+        if not tools:
+            raise CommandError("No legal tools in the database")
+        LOG.info(f"Generating RDF/XML of {len(tools)} legal tools")
+        methods = {
+            "rdflib": rdflib_rdf_xml,
+            "writer": generate_legal_code_rdf_xml,
+        }
+        results = {}
+        for name, generate in methods.items():
+            tool_timings, tool_documents = self.time_tools(generate, tools)
+            index_timing, index_document = self.time_index(
+                generate, options["repeat"]
+            )
+            results[name] = (tool_documents, index_document)
+            self.stdout.write(
+                f"{name:>6}: per tool"
+                f" {sum(tool_timings) / len(tools) * 1000:8.2f} ms mean,"
+                f" {max(tool_timings) * 1000:8.2f} ms max,"
+                f" {sum(tool_timings):7.2f} s total;"
+                f" index.rdf {index_timing:7.2f} s"
+            )
+        mismatches = sum(
+            rdflib_document != writer_document
+            for rdflib_document, writer_document in zip(
+                results["rdflib"][0], results["writer"][0]
+            )
+        )
+        if results["rdflib"][1] != results["writer"][1]:
+            mismatches += 1
+        if mismatches:
+            raise CommandError(
+                f"RDF/XML of {mismatches} documents is not identical"
+            )
+        self.stdout.write("RDF/XML is identical")
+
+        timings = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            exports = legal_tools_rdf_exports(
+                list(get_rdf_tools(generate_all_licenses=True))
+            )
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(f"export index.rdf formats: {min(timings):7.2f} s")
+        documents = {".rdf": results["writer"][1]}
+        documents.update(exports)
+        self.time_parse(documents, options["repeat"])
@@ -0,0 +1,106 @@
+# Standard library
+import logging
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+# Third-party
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# First-party/Local
+import i18n.utils
+from i18n.utils import get_deeds_ux_pofiles, load_deeds_ux_translations
+
+LOG = logging.getLogger(__name__)
+LOG_LEVELS = {
+    0: logging.ERROR,
+    1: logging.WARNING,
+    2: logging.INFO,
+    3: logging.DEBUG,
+}
+# Code run by each timed Python process (django.setup() normalizes the
+# language information and loads the Deeds & UX translations, see
+# LegalToolsConfig.ready)
+STARTUP_CODE = "import django; django.setup()"
+
+
+class Command(BaseCommand):
+    """
+    Compare the startup time of Django (in a new Python process, with the
+    settings of this process) and the time to load the Deeds & UX
+    translations with and without the cache of the statistics of the PO files
+    and the table of the language information from Babel (both are deleted
+    before each uncached run).
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        # Python defaults to lowercase starting character for the first
+        # character of help text, but Djano appears to use uppercase and so
+        # shall we
+        parser.description = self.__doc__
+        parser._optionals.title = "Django optional arguments"
+        parser.add_argument(
+            "--repeat",
+            action="store",
+            type=int,
+            default=5,
+            help="Number of runs of each method. Default: 5",
+        )
+
+    def clear_cache(self):
+        for cache_file in (
+            settings.PO_STATS_CACHE_FILE,
+            settings.LANG_INFO_TABLE_FILE,
+        ):
+            if os.path.isfile(cache_file):
+                os.remove(cache_file)
+
+    def time_startup(self, repeat, cached):
+        timings = []
+        for _ in range(repeat):
+            if not cached:
+                self.clear_cache()
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-c", STARTUP_CODE],
+                check=True,
+                cwd=settings.PROJECT_ROOT,
+            )
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def time_load(self, repeat, cached):
+        timings = []
+        for _ in range(repeat):
+            if not cached:
+                self.clear_cache()
+                i18n.utils.LANG_INFO_TABLE = None
+            start = time.perf_counter()
+            load_deeds_ux_translations()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def write_timings(self, name, timings):
+        self.stdout.write(
+            f"{name:>24}: {min(timings) * 1000:8.1f} ms min,"
+            f" {sum(timings) / len(timings) * 1000:8.1f} ms mean"
+        )
+
+    def handle(self, **options):
+        LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
+        repeat = options["repeat"]
+        if repeat < 1:
+            raise CommandError("--repeat must be at least 1")
+        LOG.info(f"Deeds & UX PO files: {len(get_deeds_ux_pofiles())}")
+        # (each uncached run writes the cache used by the cached runs)
+        for cached in (False, True):
+            label = "cached" if cached else "uncached"
+            self.write_timings(
+                f"startup ({label})", self.time_startup(repeat, cached)
+            )
+            self.write_timings(
+                f"translations ({label})", self.time_load(repeat, cached)
+            )
@@ -0,0 +1,179 @@
+# Standard library
+import glob
+import json
+import logging
+import os
+import time
+from argparse import ArgumentParser
+
+# Third-party
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from rdflib import Graph
+
+# First-party/Local
+from legal_tools.models import LegalCode
+from legal_tools.rdf_utils import (
+    get_rdf_tools,
+    legal_tool_triples,
+    legal_tools_rdf_exports,
+    legal_tools_rdf_xml,
+    rdf_hash,
+)
+from legal_tools.utils import init_utils_logger, save_rdf_documents
+
+LOG = logging.getLogger(__name__)
+LOG_LEVELS = {
+    0: logging.ERROR,
+    1: logging.WARNING,
+    2: logging.INFO,
+    3: logging.DEBUG,
+}
+# Increment if the canonical N-Triples of rdf_hash() are changed
+RDF_HASHES_VERSION = 1
+# Published RDF/XML of legal tools (relative to the output directory)
+PUBLISHED_RDF_PATHS = ["licenses/**/rdf", "publicdomain/**/rdf"]
+
+
+class Command(BaseCommand):
+    """
+    Report the legal tools whose RDF changed since it was published: the
+    canonical N-Triples hash of the graph of each legal tool is compared with
+    the hash recorded in the RDF hashes manifest. The RDF of the changed legal
+    tools (and index.rdf) can be rewritten with --write.
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        # Python defaults to lowercase starting character for the first
+        # character of help text, but Djano appears to use uppercase and so
+        # shall we
+        parser.description = self.__doc__
+        parser._optionals.title = "Django optional arguments"
+        parser.add_argument(
+            "--manifest",
+            action="store",
+            default=settings.RDF_HASHES_FILE,
+            help="RDF hashes manifest. Default: tmp/rdf-hashes.json",
+        )
+        parser.add_argument(
+            "--rebuild-manifest",
+            action="store_true",
+            help="Rebuild the manifest from the published RDF/XML (parsed"
+            " from the output directory) before comparing",
+        )
+        parser.add_argument(
+            "--write",
+            action="store_true",
+            help="Rewrite the RDF (RDF/XML and exported formats) of the"
+            " changed and added legal tools and of index.rdf, then update the"
+            " manifest",
+        )
+
+    def load_manifest(self, manifest_file):
+        if not os.path.isfile(manifest_file):
+            raise CommandError(
+                f"RDF hashes manifest not found: {manifest_file} (use"
+                " --rebuild-manifest to create it from the published RDF/XML)"
+            )
+        with open(manifest_file, "rt", encoding="utf-8") as file_obj:
+            data = json.load(file_obj)
+        if data.get("version") != RDF_HASHES_VERSION:
+            raise CommandError(
+                f"RDF hashes manifest version is outdated: {manifest_file}"
+                " (use --rebuild-manifest to recreate it)"
+            )
+        return data["hashes"]
+
+    def save_manifest(self, manifest_file, hashes):
+        data = {
+            "version": RDF_HASHES_VERSION,
+            "hashes": dict(sorted(hashes.items())),
+        }
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+        temp_file = f"{manifest_file}.tmp"
+        with open(temp_file, "wt", encoding="utf-8") as file_obj:
+            json.dump(data, file_obj, indent=0, separators=(",", ":"))
+        os.replace(temp_file, manifest_file)
+        LOG.info(f"Saved RDF hashes of {len(hashes)} legal tools")
+
+    def hash_published(self, output_dir):
+        """
+        Return the canonical N-Triples hash of each published RDF/XML file.
+        """
+        hashes = {}
+        for pattern in PUBLISHED_RDF_PATHS:
+            paths = glob.glob(
+                os.path.join(output_dir, pattern), recursive=True
+            )
+            for path in sorted(paths):
+                if not os.path.isfile(path):
+                    continue
+                relpath = os.path.relpath(path, output_dir)
+                graph = Graph().parse(path, format="xml")
+                hashes[relpath] = rdf_hash(graph)
+        LOG.info(f"Hashed {len(hashes)} published RDF/XML files")
+        return hashes
+
+    def handle(self, **options):
+        LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
+        init_utils_logger(LOG)
+        output_dir = settings.DISTILL_DIR
+        manifest_file = options["manifest"]
+        if options["rebuild_manifest"]:
+            published = self.hash_published(output_dir)
+            self.save_manifest(manifest_file, published)
+        else:
+            published = self.load_manifest(manifest_file)
+
+        start = time.perf_counter()
+        tools = list(get_rdf_tools(generate_all_licenses=True))
+        # Only the legal tools of the valid groups are distilled by the
+        # publish command (but index.rdf includes every legal tool)
+        published_tool_ids = set()
+        for legal_codes in LegalCode.objects.validgroups().values():
+            published_tool_ids.update(
+                legal_codes.values_list("tool_id", flat=True)
+            )
+        current = {}
+        tools_by_relpath = {}
+        for tool in tools:
+            if tool.id not in published_tool_ids:
+                continue
+            relpath = os.path.join(tool._get_save_path(), "rdf")
+            current[relpath] = rdf_hash(legal_tool_triples(tool))
+            tools_by_relpath[relpath] = tool
+        changed = sorted(
+            relpath
+            for relpath, digest in current.items()
+            if relpath in published and published[relpath] != digest
+        )
+        added = sorted(set(current) - set(published))
+        removed = sorted(set(published) - set(current))
+        elapsed = time.perf_counter() - start
+        for status, relpaths in (("M", changed), ("A", added), ("D", removed)):
+            for relpath in relpaths:
+                self.stdout.write(f"{status} {relpath}")
+        LOG.info(
+            f"Checked the RDF of {len(current)} published legal tools in"
+            f" {elapsed:.2f} s: {len(changed)} changed, {len(added)} added,"
+            f" {len(removed)} removed"
+        )
+
+        if not options["write"]:
+            return
+        # (the RDF of removed legal tools is pruned by the publish command)
+        for relpath in changed + added:
+            tool = tools_by_relpath[relpath]
+            LOG.debug(f"    {relpath}")
+            documents = {"": legal_tools_rdf_xml([tool])}
+            documents.update(legal_tools_rdf_exports([tool]))
+            save_rdf_documents(output_dir, relpath, documents)
+        if changed or added or removed:
+            # index.rdf is the RDF of all legal tools
+            LOG.debug("    rdf/index.rdf")
+            documents = {".rdf": legal_tools_rdf_xml(tools)}
+            documents.update(legal_tools_rdf_exports(tools))
+            save_rdf_documents(
+                output_dir, os.path.join("rdf", "index"), documents
+            )
+        self.save_manifest(manifest_file, current)
@@ -1,5 +1,7 @@
 # Standard library
+import gc
 import logging
+import math
 import os
 import socket
 from argparse import SUPPRESS, ArgumentParser
@@ -7,28 +9,92 @@ from copy import copy
 from multiprocessing import Pool
 from pathlib import Path
 from pprint import pprint
-from shutil import copyfile, copytree, rmtree
+from shutil import copytree, rmtree
 
 # Third-party
+import git
 from django.conf import settings
 from django.core.management import BaseCommand, CommandError, call_command
+from django.db.models.functions import Length
 from django.urls import reverse
+from django.utils import translation
 
 # First-party/Local
 from i18n import DEFAULT_CSV_FILE
 from i18n.utils import (
+    drain_translation_object_counters,
+    format_translation_object_counters,
     get_default_language_for_jurisdiction_deed,
+    get_default_language_for_jurisdiction_naive,
+    new_translation_object_counters,
+    preload_translation_objects,
     write_transstats_csv,
 )
-from legal_tools.models import LegalCode, build_path
+from legal_tools.catalog import (
+    ToolCatalog,
+    get_tool_catalog,
+    init_tool_catalog,
+)
+from legal_tools.format_cache import (
+    FormatCache,
+    format_cache_counters,
+    get_format_cache,
+    init_format_cache,
+    new_cache_counters,
+)
+from legal_tools.models import LegalCode, Tool, build_path
+from legal_tools.prettier_utils import (
+    PrettierBatch,
+    PrettierProcessPool,
+    add_counters,
+    drain_prettier_counters,
+    format_counters,
+    get_prettier_batch,
+    init_prettier_batch,
+    init_prettier_process_pool,
+    new_counters,
+)
+from legal_tools.publish_timings import (
+    PublishTimings,
+    get_publish_timings,
+    init_publish_timings,
+    page_timer,
+    phase_timer,
+    stage_timer,
+)
+from legal_tools.publish_utils import (
+    DependencyRecorder,
+    PublishManifest,
+    get_changed_inputs,
+    get_changed_paths,
+    get_dependency_recorder,
+    get_publish_manifest,
+    get_publish_manifest_file,
+    init_dependency_recorder,
+    init_publish_manifest,
+)
+from legal_tools.rdf_utils import (
+    get_rdf_fragment_cache,
+    get_rdf_tools,
+    init_rdf_fragment_cache,
+    legal_tools_rdf_exports,
+    legal_tools_rdf_xml,
+)
 from legal_tools.utils import (
+    copy_file_to_output,
+    get_unique_rss,
     init_utils_logger,
     relative_symlink,
     save_bytes_to_file,
+    save_rdf_documents,
     save_redirect,
     save_url_as_static_file,
     update_title,
 )
+from legal_tools.view_utils import (
+    get_formatter_version,
+    pretty_html_bytes_batch,
+)
 from legal_tools.views import render_redirect
 
 LOG = logging.getLogger(__name__)
@@ -43,6 +109,19 @@ LOG_LEVELS = {
 # CNAME
 # https://docs.github.com/en/pages/configuring-a-custom-domain-for-your-github-pages-site
 DOCS_IGNORE = [".nojekyll", "CNAME"]
+# Number of pool tasks run by each worker call. The HTML of the pages distilled
+# by these tasks is formatted with a single request to the Prettier service.
+PRETTIER_BATCH_SIZE = 32
+# Approximate cost (mean milliseconds) of the pool tasks of each function. The
+# most expensive tasks are run first so that the pool isn't left waiting on a
+# few long tasks at the end of the queue.
+TASK_COSTS = {
+    "save_list": 120,
+    "save_legal_code": 40,
+    "save_deed": 25,
+    "save_rdf": 30,
+    "save_rdf_index_exports": 1000,
+}
 
 
 def wrap_relative_symlink(output_dir, relpath, symlink):
@@ -52,6 +131,85 @@ def wrap_relative_symlink(output_dir, relpath, symlink):
         raise CommandError(f"[Errno {e.errno}] {e.strerror}: {relpath}")
 
 
+def init_worker(batch_size, record_dependencies):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    #
+    # Each worker inherits a copy of the parent's publish manifest. Discard the
+    # records of the parent so that only the worker's own records are drained.
+    manifest = get_publish_manifest()
+    if manifest is not None:
+        manifest.reset_pending()
+    if record_dependencies:
+        init_dependency_recorder(DependencyRecorder())
+    # Load the read-only catalog of tools and legal codes once per worker so
+    # that pool tasks only carry primary keys and the views don't query the
+    # database for each page
+    init_tool_catalog(ToolCatalog.load())
+    if batch_size > 1:
+        init_prettier_batch(PrettierBatch(pretty_html_bytes_batch))
+    # Discard the timings of the parent (the worker's own timings are drained
+    # by run_tasks)
+    if get_publish_timings() is not None:
+        init_publish_timings(PublishTimings())
+    # Each worker inherits a copy of the parent's translation objects, but
+    # only the worker's own translation object cache counters are drained
+    drain_translation_object_counters()
+    if settings.PRETTIER_SLOW:
+        # Each worker formats with its own Prettier process (the workers are
+        # the pool)
+        init_prettier_process_pool(PrettierProcessPool(1))
+
+
+def run_task(task_key, function, *args):
+    # If task_key is not None and dependencies are recorded, the inputs read by
+    # the function are recorded in the publish manifest (see the
+    # --record-dependencies and --changed-since options).
+    manifest = get_publish_manifest()
+    recorder = get_dependency_recorder()
+    if manifest is None or recorder is None or task_key is None:
+        return function(*args)
+    manifest.start_task()
+    recorder.start()
+    try:
+        result = function(*args)
+    finally:
+        inputs = recorder.stop()
+    manifest.record_task(task_key, inputs)
+    return result
+
+
+def run_tasks(tasks):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    #
+    # Run the (index, task_key, function, args) tasks, then format and save the
+    # HTML deferred by the Prettier batch. The result of each task is returned
+    # with its index (the tasks of a queue are run in no particular order).
+    results = [
+        (index, run_task(task_key, function, *args))
+        for index, task_key, function, args in tasks
+    ]
+    batch = get_prettier_batch()
+    if batch is not None:
+        batch.flush()
+    manifest = get_publish_manifest()
+    if manifest is None:
+        return results, None
+    report = manifest.drain()
+    report["prettier"] = drain_prettier_counters()
+    report["translation_objects"] = drain_translation_object_counters()
+    report["unique_rss"] = {os.getpid(): get_unique_rss()}
+    format_cache = get_format_cache()
+    if format_cache is None:
+        report["format_cache"] = new_cache_counters()
+    else:
+        report["format_cache"] = format_cache.drain_counters()
+    timings = get_publish_timings()
+    report["timings"] = {} if timings is None else timings.drain()
+    return results, report
+
+
 def save_list(output_dir, category, language_code):
     # Function is at top level of module so that it can be pickled by
     # multiprocessing.
@@ -69,9 +227,10 @@ def save_list(output_dir, category, language_code):
     )
 
 
-def save_deed(output_dir, tool, language_code, opt_filter_apache_redirects):
+def save_deed(output_dir, tool_id, language_code, opt_filter_apache_redirects):
     # Function is at top level of module so that it can be pickled by
     # multiprocessing.
+    tool = get_tool_catalog().get_tool_by_id(tool_id)
     if not opt_filter_apache_redirects:
         relpath, symlinks = tool.get_publish_files(language_code)
         save_url_as_static_file(
@@ -84,9 +243,10 @@ def save_deed(output_dir, tool, language_code, opt_filter_apache_redirects):
     return tool.get_redirect_pairs(language_code)
 
 
-def save_legal_code(output_dir, legal_code, opt_filter_apache_redirects):
+def save_legal_code(output_dir, legal_code_id, opt_filter_apache_redirects):
     # Function is at top level of module so that it can be pickled by
     # multiprocessing.
+    legal_code = get_tool_catalog().get_legal_code_by_id(legal_code_id)
     if not opt_filter_apache_redirects:
         (
             relpath,
@@ -114,15 +274,43 @@ def save_legal_code(output_dir, legal_code, opt_filter_apache_redirects):
     return legal_code.get_redirect_pairs()
 
 
-def save_rdf(output_dir, tool):
+def save_rdf(output_dir, tool_id):
     # Function is at top level of module so that it can be pickled by
     # multiprocessing.
+    #
+    # The RDF/XML and the exported RDF formats (see legal_tools_rdf_exports)
+    # are written from the same retrieval of the legal tool's data.
+    tool = get_tool_catalog().get_tool_by_id(tool_id)
     relpath = os.path.join(tool._get_save_path(), "rdf")
-    save_url_as_static_file(
-        output_dir,
-        url=build_path(tool.base_url, "rdf", None),
-        relpath=relpath,
-    )
+    url = build_path(tool.base_url, "rdf", None)
+    LOG.debug(f"    {relpath}")
+    with page_timer(url):
+        with phase_timer("render"):
+            rdf_tools = list(
+                get_rdf_tools(
+                    tool.category,
+                    tool.unit,
+                    tool.version,
+                    tool.jurisdiction_code,
+                )
+            )
+            documents = {"": legal_tools_rdf_xml(rdf_tools)}
+            documents.update(legal_tools_rdf_exports(rdf_tools))
+        save_rdf_documents(output_dir, relpath, documents)
+
+
+def save_rdf_index_exports(output_dir):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    #
+    # (index.rdf is distilled after the pool, see distill_and_symlink_rdf_meta)
+    relpath = os.path.join("rdf", "index")
+    LOG.debug(f"    {relpath}")
+    with page_timer("/rdf/index"):
+        with phase_timer("render"):
+            rdf_tools = list(get_rdf_tools(generate_all_licenses=True))
+            documents = legal_tools_rdf_exports(rdf_tools)
+        save_rdf_documents(output_dir, relpath, documents)
 
 
 class Command(BaseCommand):
@@ -165,6 +353,71 @@ class Command(BaseCommand):
             help="Only copy and distill RDF/XML files",
             dest="filter_rdfxml",
         )
+        filter_args.add_argument(
+            "--changed-since",
+            action="store",
+            metavar="GIT_REF",
+            help="Only distill the deeds, legal codes, lists, and RDF/XML"
+            " whose inputs (templates, translations, and database rows) have"
+            " changed since the specified git ref (ex. HEAD) of the app and"
+            " data repositories (requires a previous unfiltered publish with"
+            " --record-dependencies; the inputs of the distilled pages are"
+            " recorded again)",
+            dest="changed_since",
+        )
+        parser.add_argument(
+            "--record-dependencies",
+            action="store_true",
+            help="Record the inputs of each deed, legal code, list, and"
+            " RDF/XML in the publish manifest (for a later --changed-since)",
+            dest="record_dependencies",
+        )
+
+        parser.add_argument(
+            "--no-format-cache",
+            action="store_false",
+            help="Don't use (or update) the cache of formatted HTML",
+            dest="format_cache",
+        )
+        parser.add_argument(
+            "--timings",
+            action="store",
+            metavar="FILE",
+            help="Write the wall time of each stage and the slowest pages"
+            " (with percentiles of the time spent rendering, cleaning up,"
+            " formatting, and writing pages) to a JSON file",
+            dest="timings",
+        )
+        parser.add_argument(
+            "--prettier-batch-size",
+            action="store",
+            type=int,
+            default=PRETTIER_BATCH_SIZE,
+            metavar="N",
+            help="Number of pages formatted by each request to the Prettier"
+            " service (1 formats each page with its own request). Default:"
+            f" {PRETTIER_BATCH_SIZE}",
+            dest="prettier_batch_size",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            action="store",
+            type=int,
+            metavar="N",
+            help="Number of pool tasks run by each worker call (the pages"
+            " distilled by a worker call are formatted together). Default:"
+            " the Prettier batch size, decreasing towards the end of the task"
+            " queue",
+            dest="chunk_size",
+        )
+        parser.add_argument(
+            "--preload-translations",
+            action="store_true",
+            help="Load the Deeds & UX and legal code translations before the"
+            " pool's worker processes are started (the workers share them"
+            " copy-on-write instead of each loading them)",
+            dest="preload_translations",
+        )
 
         # Hidden argparse troubleshooting option
         parser.add_argument(
@@ -185,22 +438,339 @@ class Command(BaseCommand):
                 " command."
             )
 
-    def purge_output_dir(self):
+    def load_manifest(self):
+        self.manifest = PublishManifest(
+            self.output_dir,
+            get_publish_manifest_file(
+                settings.PUBLISH_MANIFEST_FILE, self.output_dir
+            ),
+        )
+        init_publish_manifest(self.manifest)
+        if self.manifest.loaded:
+            LOG.info(
+                "Loaded publish manifest:"
+                f" {len(self.manifest.previous)} files"
+            )
+            return
         if not self.options["run"]["purge_output_dir"]:
             return
+        # Without a manifest of the previous run (into the same output
+        # directory), the only way to ensure stale files are removed is to
+        # purge everything
         output_dir = self.output_dir
-        LOG.info(f"Purging output_dir: {output_dir}")
+        LOG.info(
+            "No publish manifest of output_dir. Purging output_dir:"
+            f" {output_dir}"
+        )
         output_dir_items = [
             os.path.join(output_dir, item)
             for item in os.listdir(output_dir)
             if item not in DOCS_IGNORE
         ]
         for item in output_dir_items:
-            if os.path.isdir(item):
+            if os.path.isdir(item) and not os.path.islink(item):
                 rmtree(item)
             else:
                 os.remove(item)
 
+    def load_format_cache(self):
+        if not self.options["format_cache"]:
+            return
+        format_cache = FormatCache(
+            settings.FORMAT_CACHE_FILE, settings.FORMAT_CACHE_MAX_BYTES
+        )
+        format_cache.connect()
+        init_format_cache(format_cache)
+        # The RDF/XML fragments of legal tools are cached in their own table
+        # of the same database (with their own size budget and counters)
+        init_rdf_fragment_cache(
+            FormatCache(
+                settings.FORMAT_CACHE_FILE,
+                settings.RDF_FRAGMENT_CACHE_MAX_BYTES,
+                table="rdf_fragments",
+            )
+        )
+        # Workers inherit the formatter version
+        LOG.info(f"Formatted HTML cache: {get_formatter_version()}")
+
+    def save_format_cache(self):
+        format_cache = get_format_cache()
+        if format_cache is None:
+            return
+        fragment_cache = get_rdf_fragment_cache()
+        init_format_cache(None)
+        init_rdf_fragment_cache(None)
+        add_counters(self.format_cache_counters, format_cache.drain_counters())
+        LOG.info(
+            "Formatted HTML cache:"
+            f" {format_cache_counters(self.format_cache_counters)}"
+        )
+        evicted = format_cache.prune()
+        if evicted:
+            LOG.info(f"Evicted {evicted} formatted HTML cache entries")
+        evicted = fragment_cache.prune()
+        if evicted:
+            LOG.info(f"Evicted {evicted} RDF/XML fragment cache entries")
+
+    def save_timings(self):
+        timings = get_publish_timings()
+        if timings is None:
+            return
+        init_publish_timings(None)
+        timings.save(self.options["timings"])
+        LOG.info(
+            f"Wrote timings of {len(timings.pages)} pages:"
+            f" {self.options['timings']}"
+        )
+
+    def fingerprint_rows(self):
+        """
+        Return the digest of each Tool and LegalCode row (keyed like the row
+        dependencies recorded by DependencyRecorder).
+
+        The (large) legal code HTML is not loaded. It is fingerprinted by the
+        hash of the HTML file it was imported from and its length.
+        """
+        fingerprints = {}
+        for model in (Tool, LegalCode):
+            model_name = model._meta.model_name
+            fields = [
+                field.attname
+                for field in model._meta.concrete_fields
+                if field.name != "html"
+            ]
+            rows = model.objects.order_by("pk")
+            if model is LegalCode:
+                rows = rows.annotate(html_length=Length("html"))
+                fields.append("html_length")
+            for row in rows.values(*fields).iterator():
+                row_bytes = repr(sorted(row.items())).encode("utf-8")
+                fingerprints[f"{model_name}:{row['id']}"] = (
+                    PublishManifest.digest(row_bytes)
+                )
+        return fingerprints
+
+    def load_changed_inputs(self):
+        """
+        Determine the inputs that changed since the --changed-since git ref.
+        If self.changed_inputs is None, all tasks are distilled.
+        """
+        self.changed_inputs = None
+        options = self.options
+        filtered = (
+            options["filter_apache_redirects"]
+            or options["filter_license_html"]
+            or options["filter_rdfxml"]
+        )
+        ref = options["changed_since"]
+        if not filtered and (options["record_dependencies"] or ref):
+            # Filtered runs do not distill every page that depends on a row,
+            # so only unfiltered and selective runs update the fingerprints
+            # (which are only compared by selective runs)
+            self.manifest.current_rows = self.fingerprint_rows()
+        if not ref:
+            return
+        if not self.manifest.previous_tasks:
+            raise CommandError(
+                "--changed-since requires the publish manifest of a previous"
+                " unfiltered publish with --record-dependencies"
+            )
+        try:
+            app_paths = get_changed_paths(settings.PROJECT_ROOT, ref)
+            data_paths = get_changed_paths(settings.DATA_REPOSITORY_DIR, ref)
+        except git.exc.GitCommandError as e:
+            raise CommandError(
+                f"Unable to compare with git ref {ref}: {e.stderr.strip()}"
+            )
+        changed_inputs = get_changed_inputs(app_paths, data_paths)
+        if changed_inputs is None:
+            LOG.warning(
+                f"App code has changed since {ref}. Distilling all pages."
+            )
+            return
+        changed_inputs |= self.manifest.changed_rows()
+        LOG.info(f"Inputs changed since {ref}: {len(changed_inputs)}")
+        for key in sorted(changed_inputs):
+            LOG.debug(f"    {key}")
+        self.changed_inputs = changed_inputs
+
+    def task_selected(self, task_key):
+        """
+        Return True if the task must be distilled (its inputs changed since
+        the --changed-since git ref, or the option was not specified).
+        """
+        if self.changed_inputs is None:
+            return True
+        if self.manifest.task_is_dirty(task_key, self.changed_inputs):
+            self.selected_count += 1
+            return True
+        return False
+
+    def purge_output_dir(self):
+        """
+        Delete the files of the output_dir that were not produced by this run
+        (see PublishManifest.prune).
+        """
+        if not self.options["run"]["purge_output_dir"]:
+            return
+        if not self.manifest.loaded:
+            # The output_dir was purged before publishing
+            return
+        LOG.info(f"Pruning stale files from output_dir: {self.output_dir}")
+        for relpath in self.manifest.prune(ignore=DOCS_IGNORE):
+            LOG.debug(f"    -{relpath}")
+
+    def save_manifest(self):
+        # Retain the records of files not produced by filtered runs
+        self.manifest.save(merge=not self.options["run"]["purge_output_dir"])
+        init_publish_manifest(None)
+        add_counters(self.prettier_counters, drain_prettier_counters())
+        LOG.info(f"Prettier: {format_counters(self.prettier_counters)}")
+        counters = self.translation_object_counters
+        add_counters(counters, drain_translation_object_counters())
+        counters_text = format_translation_object_counters(counters)
+        LOG.info(f"Translation objects: {counters_text}")
+        counts = self.manifest.counts
+        if self.changed_inputs is not None:
+            LOG.info(
+                f"Distilled {self.selected_count} pages with inputs changed"
+                f" since {self.options['changed_since']}"
+            )
+        LOG.info(
+            f"Published files: {counts['written']} written,"
+            f" {counts['unchanged']} unchanged, {counts['deleted']} deleted"
+        )
+
+    def queue_tasks(self, function, arguments, task_keys=None):
+        """
+        Add a task to the pool's task queue for each of the arguments. The
+        inputs of each task with a (not None) task key are recorded.
+        """
+        if task_keys is None:
+            task_keys = [None] * len(arguments)
+        for task_key, args in zip(task_keys, arguments):
+            self.task_queue.append((task_key, function, args))
+
+    def task_chunks(self, tasks):
+        """
+        Split the tasks into the chunks run by each worker call (see
+        run_tasks). Unless --chunk-size is specified, chunks are at most the
+        Prettier batch size and shrink as the end of the queue nears, so that
+        every worker stays busy until the last tasks.
+        """
+        chunk_size = self.options["chunk_size"]
+        workers = os.cpu_count()
+        chunks = []
+        start = 0
+        while start < len(tasks):
+            size = chunk_size
+            if size is None:
+                remaining = len(tasks) - start
+                size = max(
+                    1,
+                    min(
+                        self.options["prettier_batch_size"],
+                        math.ceil(remaining / (2 * workers)),
+                    ),
+                )
+            end = start + size
+            chunks.append(tasks[start:end])
+            start = end
+        return chunks
+
+    def run_task_queue(self):
+        """
+        Run the queued tasks with the pool, most expensive first, and merge
+        the publish manifest records of the workers. Yield the function and
+        result of each task as it completes.
+        """
+        queue = self.task_queue
+        self.task_queue = []
+        tasks = [
+            (index, task_key, function, args)
+            for index, (task_key, function, args) in enumerate(queue)
+        ]
+        # Sorting is stable, so tasks of equal cost keep their queue order
+        tasks.sort(key=lambda task: -TASK_COSTS.get(task[2].__name__, 0))
+        LOG.info(f"Distilling {len(tasks)} pool tasks")
+        for results, report in self.pool.imap_unordered(
+            run_tasks, self.task_chunks(tasks)
+        ):
+            self.manifest.absorb(report)
+            add_counters(self.prettier_counters, report["prettier"])
+            add_counters(
+                self.translation_object_counters,
+                report["translation_objects"],
+            )
+            for pid, unique_rss in report["unique_rss"].items():
+                if unique_rss is not None:
+                    self.worker_unique_rss[pid] = max(
+                        unique_rss, self.worker_unique_rss.get(pid, 0)
+                    )
+            add_counters(self.format_cache_counters, report["format_cache"])
+            timings = get_publish_timings()
+            if timings is not None:
+                timings.absorb(report["timings"])
+            for index, result in results:
+                yield queue[index][1], result
+
+    def preload_translations(self):
+        """
+        Load the Deeds & UX translations and the translation objects of the
+        legal codes that will be distilled before the pool's worker processes
+        are forked, so that the workers inherit them (copy-on-write) instead
+        of each loading them.
+        """
+        if not self.options["preload_translations"]:
+            return
+        LOG.info("Preloading translations")
+        # Django caches the translation object of each language
+        for language_code in [
+            settings.LANGUAGE_CODE,
+            *settings.LANGUAGES_MOSTLY_TRANSLATED,
+        ]:
+            translation.trans_real.translation(language_code)
+        arguments = []
+        if (
+            self.options["run"]["pool_distill_legal_tools"]
+            and not self.options["filter_rdfxml"]
+        ):
+            filter_license_html = self.options["filter_license_html"]
+            for group, legal_codes in LegalCode.objects.validgroups().items():
+                if (
+                    filter_license_html
+                    and group != f"Licenses {filter_license_html}"
+                ):
+                    continue
+                for legal_code in legal_codes.select_related("tool"):
+                    tool = legal_code.tool
+                    arguments.append(
+                        (
+                            tool.resource_slug,
+                            legal_code.language_code,
+                            get_default_language_for_jurisdiction_naive(
+                                tool.jurisdiction_code
+                            ),
+                        )
+                    )
+        count = preload_translation_objects(arguments)
+        LOG.info(f"Preloaded {count} legal code translation objects")
+        # Move the preloaded objects to the garbage collector's permanent
+        # generation so that the workers' collections don't write to (and so
+        # copy) the memory pages that hold them
+        gc.freeze()
+
+    def log_worker_unique_rss(self):
+        if not self.worker_unique_rss:
+            return
+        unique_rss = self.worker_unique_rss.values()
+        mean = sum(unique_rss) / len(unique_rss)
+        LOG.info(
+            f"Worker unique RSS: {len(unique_rss)} workers,"
+            f" {mean / 2**20:.1f} MiB mean,"
+            f" {max(unique_rss) / 2**20:.1f} MiB max"
+        )
+
     def call_collectstatic(self):
         if not self.options["run"]["call_collectstatic"]:
             return
@@ -230,7 +800,12 @@ class Command(BaseCommand):
             path,
         )
         destination = os.path.join(output_dir, path)
-        copytree(source, destination)
+        copytree(
+            source,
+            destination,
+            copy_function=copy_file_to_output,
+            dirs_exist_ok=True,
+        )
 
     def copy_static_cc_legal_tools_files(self):
         if not self.options["run"]["copy_static_cc_legal_tools_files"]:
@@ -247,7 +822,12 @@ class Command(BaseCommand):
             "cc-legal-tools",
         )
         destination = os.path.join(output_dir, path)
-        copytree(source, destination)
+        copytree(
+            source,
+            destination,
+            copy_function=copy_file_to_output,
+            dirs_exist_ok=True,
+        )
 
     def copy_static_rdf_files(self):
         if not self.options["run"]["copy_static_rdf_files"]:
@@ -264,7 +844,12 @@ class Command(BaseCommand):
             path,
         )
         destination = os.path.join(output_dir, path)
-        copytree(source, destination, dirs_exist_ok=True)
+        copytree(
+            source,
+            destination,
+            copy_function=copy_file_to_output,
+            dirs_exist_ok=True,
+        )
 
     def distill_and_symlink_rdf_meta(self):
         """
@@ -279,14 +864,23 @@ class Command(BaseCommand):
         LOG.debug(f"{hostname}:{output_dir}")
 
         # Distill RDF/XML meta files
+        fragment_cache = get_rdf_fragment_cache()
         for meta_file in ["index.rdf", "images.rdf", "ns.html"]:
             # (schema.rdf is handled by the copy_static_rdf_files function)
             LOG.info(f"Distilling {meta_file}")
+            if meta_file == "index.rdf" and fragment_cache is not None:
+                fragment_cache.drain_counters()
             save_url_as_static_file(
                 output_dir=dest_dir,
                 url=f"/rdf/{meta_file}",
                 relpath=meta_file,
             )
+            if meta_file == "index.rdf" and fragment_cache is not None:
+                counters = fragment_cache.drain_counters()
+                LOG.info(
+                    "index.rdf RDF/XML fragments:"
+                    f" {format_cache_counters(counters)}"
+                )
 
         # Symlink RDF/XML meta files
         for meta_file in ["index.rdf", "ns.html", "schema.rdf"]:
@@ -302,9 +896,11 @@ class Command(BaseCommand):
                 symlink = meta_file
                 symlink_dest = dest_relative
                 symlink_path = os.path.join(output_dir, symlink)
-            if os.path.islink(symlink_path):
+            # (ex. a file published by a previous run)
+            if os.path.islink(symlink_path) or os.path.isfile(symlink_path):
                 os.remove(symlink_path)
             Path(symlink_path).symlink_to(Path(symlink_dest))
+            self.manifest.record_symlink(symlink_path)
             LOG.debug(f"   ^{symlink}")
 
     def copy_legal_code_plaintext(self):
@@ -336,8 +932,7 @@ class Command(BaseCommand):
                 "legalcode.txt",
             )
             dest_file = os.path.join(output_dir, relative_name)
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            copyfile(os.path.join(plaintext_dir, text), dest_file)
+            copy_file_to_output(os.path.join(plaintext_dir, text), dest_file)
             LOG.debug(f"    {relative_name}")
 
     def distill_dev_index(self):
@@ -354,21 +949,70 @@ class Command(BaseCommand):
             relpath="index.html",
         )
 
-    def pool_distill_lists(self):
+    def pool_distill(self):
+        """
+        Distill the lists and the legal tools of every group with a single
+        stream of pool tasks (the pool doesn't wait for each group or type of
+        page to complete before starting the next).
+        """
+        self.task_queue = []
+        with stage_timer("queue_lists"):
+            self.queue_lists()
+        with stage_timer("queue_legal_tools"):
+            default_languages_deeds = self.queue_legal_tools()
+        self.queue_rdf_index_exports()
+        redirect_pairs_data = []
+        with stage_timer("run_task_queue"):
+            for function, result in self.run_task_queue():
+                if function in (save_deed, save_legal_code):
+                    redirect_pairs_data.append(result)
+        with stage_timer("symlink_lists"):
+            self.symlink_lists()
+        if self.options["run"]["pool_distill_legal_tools"]:
+            with stage_timer("distill_language_redirects"):
+                self.distill_language_redirects(
+                    default_languages_deeds, redirect_pairs_data
+                )
+
+    def queue_lists(self):
         if not self.options["run"]["pool_distill_lists"]:
             return
         hostname = socket.gethostname()
         output_dir = self.output_dir
 
         LOG.debug(f"{hostname}:{output_dir}")
-        LOG.info("Distilling lists")
+        LOG.info("Queuing lists")
 
         arguments = []
+        task_keys = []
         for category in ["licenses", "publicdomain"]:
             for language_code in settings.LANGUAGES_MOSTLY_TRANSLATED:
+                task_key = f"list:{category}:{language_code}"
+                if not self.task_selected(task_key):
+                    continue
                 arguments.append((output_dir, category, language_code))
-        self.pool.starmap(save_list, arguments)
+                task_keys.append(task_key)
+        self.queue_tasks(save_list, arguments, task_keys)
+
+    def queue_rdf_index_exports(self):
+        """
+        Queue the task that exports the RDF of all legal tools in the formats
+        of legal_tools_rdf_exports (next to index.rdf).
+        """
+        if not self.options["run"]["distill_and_symlink_rdf_meta"]:
+            return
+        task_key = "rdf:index"
+        if not self.task_selected(task_key):
+            return
+        LOG.info("Queuing index.rdf exports")
+        self.queue_tasks(
+            save_rdf_index_exports, [(self.output_dir,)], [task_key]
+        )
 
+    def symlink_lists(self):
+        if not self.options["run"]["pool_distill_lists"]:
+            return
+        output_dir = self.output_dir
         for category in ["licenses", "publicdomain"]:
             relpath = f"{category}/list.{settings.LANGUAGE_CODE}.html"
             symlink = "index.html"
@@ -376,52 +1020,79 @@ class Command(BaseCommand):
             symlink = "list.html"
             wrap_relative_symlink(output_dir, relpath, symlink)
 
-    def pool_distill_legal_tools(self):
+    def queue_legal_tools(self):
+        """
+        Queue the deed, legal code, and RDF/XML tasks of each group. Return
+        the default deed language of each ported license jurisdiction (by
+        version).
+        """
         options = self.options
+        default_languages_deeds = {}
         if not options["run"]["pool_distill_legal_tools"]:
-            return
+            return default_languages_deeds
         hostname = socket.gethostname()
         output_dir = self.output_dir
         legal_codes = LegalCode.objects.validgroups()
-        redirect_pairs_data = []
-        default_languages_deeds = {}
         for group in legal_codes.keys():
-            tools = set()
             LOG.debug(f"{hostname}:{output_dir}")
             if options["filter_license_html"]:
                 if group != f"Licenses {options['filter_license_html']}":
                     continue
-                LOG.info(f"Distilling {group} deed/legal code HTML")
+                LOG.info(f"Queuing {group} deed/legal code HTML")
             elif options["filter_rdfxml"]:
-                LOG.info(f"Distilling {group} legal code RDF/XML")
+                LOG.info(f"Queuing {group} legal code RDF/XML")
             else:
                 LOG.info(
-                    f"Distilling {group} deed/legal code HTML and legal code"
+                    f"Queuing {group} deed/legal code HTML and legal code"
                     " RDF/XML"
                 )
             legal_code_arguments = []
+            legal_code_task_keys = []
             deed_arguments = []
+            deed_task_keys = []
             rdf_arguments = []
-            for legal_code in legal_codes[group]:
-                tools.add(legal_code.tool)
+            rdf_task_keys = []
+            # Only the fields required to build the task arguments are loaded
+            # (the workers load their own catalog, see init_worker)
+            group_legal_codes = list(
+                legal_codes[group].values_list(
+                    "id", "tool_id", "language_code"
+                )
+            )
+            tool_ids = {tool_id for _, tool_id, _ in group_legal_codes}
+            tools = Tool.objects.only(
+                "base_url", "jurisdiction_code", "version"
+            ).in_bulk(tool_ids)
+            for legal_code_id, tool_id, language_code in group_legal_codes:
+                task_key = self.legal_tool_task_key(
+                    "legal_code", tools[tool_id], language_code
+                )
                 legal_code_arguments.append(
                     (
                         output_dir,
-                        legal_code,
-                        options["filter_apache_redirects"],
+                        legal_code_id,
+                        task_key is None,
                     )
                 )
-            for tool in tools:
+                legal_code_task_keys.append(task_key)
+            for tool_id, tool in sorted(tools.items()):
                 for language_code in settings.LANGUAGES_MOSTLY_TRANSLATED:
+                    task_key = self.legal_tool_task_key(
+                        "deed", tool, language_code
+                    )
                     deed_arguments.append(
                         (
                             output_dir,
-                            tool,
+                            tool_id,
                             language_code,
-                            options["filter_apache_redirects"],
+                            task_key is None,
                         )
                     )
-                rdf_arguments.append((output_dir, tool))
+                    deed_task_keys.append(task_key)
+                task_key = f"rdf:{tool.base_url}"
+                if self.task_selected(task_key):
+                    rdf_arguments.append((output_dir, tool_id))
+                    rdf_task_keys.append(task_key)
                 if (
                     tool.jurisdiction_code
                     and tool.jurisdiction_code not in default_languages_deeds
@@ -435,21 +1106,29 @@ class Command(BaseCommand):
                     )
 
             if not options["filter_rdfxml"]:
-                redirect_pairs_data += self.pool.starmap(
-                    save_deed, deed_arguments
-                )
-                redirect_pairs_data += self.pool.starmap(
-                    save_legal_code, legal_code_arguments
+                self.queue_tasks(save_deed, deed_arguments, deed_task_keys)
+                self.queue_tasks(
+                    save_legal_code, legal_code_arguments, legal_code_task_keys
                 )
             if (
                 not options["filter_apache_redirects"]
                 and not options["filter_license_html"]
             ):
-                self.pool.starmap(save_rdf, rdf_arguments)
+                self.queue_tasks(save_rdf, rdf_arguments, rdf_task_keys)
 
-        self.distill_language_redirects(
-            default_languages_deeds, redirect_pairs_data
-        )
+        return default_languages_deeds
+
+    def legal_tool_task_key(self, page, tool, language_code):
+        """
+        Return the task key of a deed or legal code page or None if only its
+        Apache2 language redirects are required.
+        """
+        if self.options["filter_apache_redirects"]:
+            return None
+        task_key = f"{page}:{tool.base_url}:{language_code}"
+        if not self.task_selected(task_key):
+            return None
+        return task_key
 
     def distill_language_redirects(
         self, default_languages_deeds, redirect_pairs_data
@@ -621,6 +1300,10 @@ class Command(BaseCommand):
         # Unfiltered/default
         else:
             options["run"] = dict.fromkeys(options["run"], True)
+            # Selective runs only distill some of the pages, so stale files
+            # can't be determined
+            if options["changed_since"]:
+                options["run"]["purge_output_dir"] = False
 
     def handle(self, *args, **options):
         LOG.setLevel(LOG_LEVELS[int(options["verbosity"])])
@@ -632,10 +1315,10 @@ class Command(BaseCommand):
             pprint(options)
             return
 
-        if settings.PRETTIER_SLOW:
-            raise CommandError(
-                "PRETTIER_SLOW mustn't be enabled during publish"
-            )
+        if options["prettier_batch_size"] < 1:
+            raise CommandError("--prettier-batch-size must be at least 1")
+        if options["chunk_size"] is not None and options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
 
         self.output_dir = os.path.abspath(settings.DISTILL_DIR)
         self.config_dir = os.path.abspath(
@@ -651,18 +1334,50 @@ class Command(BaseCommand):
             )
         self.relpath = os.path.relpath(self.output_dir, git_dir)
 
-        self.check_titles()
-        self.purge_output_dir()
-        self.call_collectstatic()
-        self.write_robots_txt()
-        self.copy_static_wp_content_files()
-        self.copy_static_cc_legal_tools_files()
-        self.copy_static_rdf_files()
-        self.distill_and_symlink_rdf_meta()
-        self.copy_legal_code_plaintext()
-        self.distill_dev_index()
-        with Pool() as self.pool:
-            self.pool_distill_lists()
-            self.pool_distill_legal_tools()
-        self.distill_metadata_csv()
-        # DISABLED # self.distill_transstats_csv()
+        self.selected_count = 0
+        self.prettier_counters = new_counters()
+        self.translation_object_counters = new_translation_object_counters()
+        self.worker_unique_rss = {}
+        self.format_cache_counters = new_cache_counters()
+        if options["timings"]:
+            init_publish_timings(PublishTimings())
+        for stage in (
+            self.check_titles,
+            self.load_manifest,
+            self.load_changed_inputs,
+            self.load_format_cache,
+            self.call_collectstatic,
+            self.write_robots_txt,
+            self.copy_static_wp_content_files,
+            self.copy_static_cc_legal_tools_files,
+            self.copy_static_rdf_files,
+            self.copy_legal_code_plaintext,
+            self.distill_dev_index,
+            self.preload_translations,
+        ):
+            with stage_timer(stage.__name__):
+                stage()
+        with stage_timer("pool"):
+            with Pool(
+                initializer=init_worker,
+                initargs=(
+                    options["prettier_batch_size"],
+                    options["record_dependencies"]
+                    or bool(options["changed_since"]),
+                ),
+            ) as self.pool:
+                self.pool_distill()
+        self.log_worker_unique_rss()
+        for stage in (
+            # index.rdf is assembled from the RDF/XML fragments of the legal
+            # tools cached by the pool's RDF/XML tasks
+            self.distill_and_symlink_rdf_meta,
+            self.distill_metadata_csv,
+            # DISABLED # self.distill_transstats_csv,
+            self.purge_output_dir,
+            self.save_manifest,
+            self.save_format_cache,
+        ):
+            with stage_timer(stage.__name__):
+                stage()
+        self.save_timings()
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:54
+
+# Third-party
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("legal_tools", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="legalcode",
+            name="html_file_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="SHA-256 hash of the content of the HTML file when"
+                " it was last imported",
+                max_length=64,
+                verbose_name="HTML file hash",
+            ),
+        ),
+    ]
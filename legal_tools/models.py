@@ -185,6 +185,14 @@ class LegalCode(models.Model):
         blank=True,
         default="",
     )
+    html_file_hash = models.CharField(
+        "HTML file hash",
+        max_length=64,
+        help_text="SHA-256 hash of the content of the HTML file when it was"
+        " last imported",
+        blank=True,
+        default="",
+    )
     translation_last_update = models.DateTimeField(
         help_text="The last_updated field from Transifex for this translation",
         blank=True,
@@ -218,6 +226,14 @@ class LegalCode(models.Model):
         return f"LegalCode<{self.language_code}, {self.tool}>"
 
     def save(self, *args, **kwargs):
+        self.update_urls()
+        super().save(*args, **kwargs)
+
+    def update_urls(self):
+        """
+        Set the URLs derived from the tool and language code (called by
+        save(), but not by bulk_create() or bulk_update()).
+        """
         self.deed_url = build_path(
             self.tool.base_url,
             "deed",
@@ -239,7 +255,6 @@ class LegalCode(models.Model):
         #         "legalcode.txt",
         #         self.language_code,
         #     )
-        super().save(*args, **kwargs)
 
     def get_publish_files(self):
         """
@@ -0,0 +1,637 @@
+# Standard library
+import os
+import select
+import socket
+import subprocess
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+
+# Third-party
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# First-party/Local
+from legal_tools.publish_timings import page_timer
+
+# The prettier service has multiple replicas (see docker-compose.yml). Its
+# hostname resolves to the address of each replica.
+PRETTIER_URL = "http://prettier:3000"
+PRETTIER_TIMEOUT = 5
+PRETTIER_RETRIES = 4
+PRETTIER_BACKOFF = 0.1  # seconds, doubled for each retry
+PRETTIER_BACKOFF_MAX = 2.0  # seconds
+# Only failures that may succeed on another attempt (or replica) are retried.
+# Prettier errors (ex. invalid HTML) are HTTP 500 responses.
+RETRY_STATUS_CODES = (502, 503, 504)
+# Path of the batch endpoint (see prettier-server.js)
+PRETTIER_BATCH_PATH = "batch"
+PRETTIER_VERSION_PATH = "version"
+# The response to a batch request is only sent once every document has been
+# formatted
+PRETTIER_BATCH_TIMEOUT = 0.5  # seconds, added for each document
+
+# Long-lived Prettier processes (used if PRETTIER_SLOW is enabled)
+PRETTIER_WORKER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "prettier-worker.js",
+)
+PRETTIER_PROCESSES = os.cpu_count()
+PRETTIER_PROCESS_TIMEOUT = 30  # seconds, includes the start of the process
+
+PRETTIER_CLIENT = None
+PRETTIER_BATCH = None
+PRETTIER_PROCESS_POOL = None
+
+
+def get_prettier_client():
+    """
+    Return the Prettier client of the current process. Processes forked by the
+    publish command's Pool get their own client (connections can't be shared
+    between processes).
+    """
+    global PRETTIER_CLIENT
+    if PRETTIER_CLIENT is None or PRETTIER_CLIENT.pid != os.getpid():
+        if settings.TESTING:
+            # Tests don't wait for an unavailable service
+            PRETTIER_CLIENT = PrettierClient(PRETTIER_URL, retries=0)
+        else:
+            PRETTIER_CLIENT = PrettierClient(PRETTIER_URL)
+    return PRETTIER_CLIENT
+
+
+def init_prettier_process_pool(process_pool=None):
+    """
+    Set (or, if process_pool is None, unset) the Prettier process pool of the
+    current process
+    """
+    global PRETTIER_PROCESS_POOL
+    PRETTIER_PROCESS_POOL = process_pool
+
+
+def get_prettier_process_pool():
+    """
+    Return the Prettier process pool of the current process. Processes forked
+    by the publish command's Pool get their own pool (pipes can't be shared
+    between processes).
+    """
+    global PRETTIER_PROCESS_POOL
+    if (
+        PRETTIER_PROCESS_POOL is None
+        or PRETTIER_PROCESS_POOL.pid != os.getpid()
+    ):
+        PRETTIER_PROCESS_POOL = PrettierProcessPool(PRETTIER_PROCESSES)
+    return PRETTIER_PROCESS_POOL
+
+
+def init_prettier_batch(batch=None):
+    """
+    Set (or, if batch is None, unset) the batch that defers the formatting of
+    the HTML saved by the current process (see PrettierBatch)
+    """
+    global PRETTIER_BATCH
+    PRETTIER_BATCH = batch
+
+
+def get_prettier_batch():
+    return PRETTIER_BATCH
+
+
+def drain_prettier_counters():
+    """
+    Return and reset the counters of the current process's Prettier client
+    and process pool.
+    """
+    counters = new_counters()
+    for formatter in (PRETTIER_CLIENT, PRETTIER_PROCESS_POOL):
+        if formatter is not None and formatter.pid == os.getpid():
+            add_counters(counters, formatter.drain_counters())
+    return counters
+
+
+def new_counters():
+    return {
+        "requests": 0,
+        "documents": 0,
+        "retries": 0,
+        "failures": 0,
+        "bytes_sent": 0,
+        "bytes_received": 0,
+        "latency": 0.0,  # seconds, total of successful requests
+        "latency_max": 0.0,  # seconds
+    }
+
+
+def add_counters(counters, other):
+    """
+    Add the other counters (ex. drained from a worker process) to counters.
+    """
+    for key, value in other.items():
+        if key == "latency_max":
+            counters[key] = max(counters[key], value)
+        else:
+            counters[key] += value
+
+
+def format_counters(counters):
+    requests_count = counters["requests"]
+    mean = counters["latency"] / requests_count if requests_count else 0
+    return (
+        f"{counters['documents']} documents, {requests_count} requests,"
+        f" {counters['retries']} retries,"
+        f" {counters['failures']} failures,"
+        f" {counters['bytes_sent']} bytes sent,"
+        f" {counters['bytes_received']} bytes received,"
+        f" {mean * 1000:.1f} ms mean latency,"
+        f" {counters['latency_max'] * 1000:.1f} ms max latency"
+    )
+
+
+class PrettierBatch:
+    """
+    Deferred formatting of the HTML saved by a publish worker, so that it's
+    formatted with a single request to the Prettier service's batch endpoint.
+
+    While a batch is set (see init_prettier_batch()),
+    legal_tools.view_utils.pretty_html_bytes() returns the HTML as is and
+    defers it. Saving the deferred HTML (see
+    legal_tools.utils.save_bytes_to_file()) adds it to the batch instead.
+    flush() formats the added documents and saves them.
+    """
+
+    def __init__(self, format_batch):
+        # format_batch returns the formatted HTML of (path, html_bytes)
+        # documents (ex. legal_tools.view_utils.pretty_html_bytes_batch)
+        self.format_batch = format_batch
+        self.deferred = None
+        self.documents = []
+
+    def __len__(self):
+        return len(self.documents)
+
+    def defer(self, path, html_bytes):
+        """
+        Defer the HTML (until it is saved) and return it.
+        """
+        self.check_deferred()
+        self.deferred = (path, html_bytes)
+        return html_bytes
+
+    def check_deferred(self):
+        if self.deferred is not None:
+            raise RuntimeError(
+                f"Deferred HTML was not saved: {self.deferred[0]}"
+            )
+
+    def add(self, data, save):
+        """
+        If data is the deferred HTML, add it to the batch and return True. Once
+        formatted, the HTML is passed to save().
+        """
+        if self.deferred is None:
+            return False
+        path, html_bytes = self.deferred
+        if data != html_bytes:
+            raise RuntimeError(f"Deferred HTML was modified: {path}")
+        self.deferred = None
+        self.documents.append((path, html_bytes, save))
+        return True
+
+    def flush(self):
+        """
+        Format and save the documents added to the batch.
+        """
+        self.check_deferred()
+        documents = self.documents
+        self.documents = []
+        if not documents:
+            return
+        formatted = self.format_batch(
+            [(path, html_bytes) for path, html_bytes, _ in documents]
+        )
+        for (path, _, save), data in zip(documents, formatted):
+            with page_timer(path):
+                save(data)
+
+
+def encode_batch(documents):
+    """
+    Frame the documents for the batch endpoint: each document is preceded by
+    its length in bytes and a newline.
+    """
+    frames = []
+    for document in documents:
+        frames.append(f"{len(document)}\n".encode("ascii"))
+        frames.append(document)
+    return b"".join(frames)
+
+
+def decode_batch(data):
+    """
+    Return the (status, document) pairs framed in a batch endpoint response:
+    each document is preceded by its status, a space, its length in bytes, and
+    a newline.
+    """
+    results = []
+    offset = 0
+    while offset < len(data):
+        newline = data.index(b"\n", offset)
+        status, length = data[offset:newline].split(b" ")
+        start = newline + 1
+        end = start + int(length)
+        if end > len(data):
+            raise ValueError(f"Truncated Prettier batch response: {end}")
+        results.append((int(status), data[start:end]))
+        offset = end
+    return results
+
+
+class PrettierClient:
+    """
+    Keep-alive HTTP client for the Prettier service.
+
+    The addresses of the service's replicas are resolved once and requests
+    are spread round-robin across them, reusing a persistent connection to
+    each. Connection errors, timeouts, and unavailable responses are retried
+    on the next replica with bounded exponential backoff. Connection errors
+    aren't retried if the hostname can't be resolved (ex. the service isn't
+    running).
+    """
+
+    def __init__(
+        self,
+        url,
+        timeout=PRETTIER_TIMEOUT,
+        retries=PRETTIER_RETRIES,
+        backoff=PRETTIER_BACKOFF,
+        backoff_max=PRETTIER_BACKOFF_MAX,
+    ):
+        self.pid = os.getpid()
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.counters = new_counters()
+        # Start each process at a different replica
+        self.next_url_index = self.pid
+        self.resolve()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(self.urls), pool_maxsize=1, max_retries=0
+        )
+        self.session.mount(f"{self.scheme}://", adapter)
+
+    def resolve(self):
+        """
+        Resolve the address of each replica (falling back to the hostname,
+        ex. if it can't be resolved yet).
+        """
+        self.resolved = True
+        try:
+            addresses = sorted(
+                {
+                    info[4][0]
+                    for info in socket.getaddrinfo(
+                        self.host, self.port, type=socket.SOCK_STREAM
+                    )
+                }
+            )
+        except socket.gaierror:
+            self.resolved = False
+            addresses = [self.host]
+        self.urls = []
+        for address in addresses:
+            if ":" in address:  # IPv6
+                address = f"[{address}]"
+            self.urls.append(
+                f"{self.scheme}://{address}:{self.port}{self.path}"
+            )
+
+    def next_url(self):
+        url = self.urls[self.next_url_index % len(self.urls)]
+        self.next_url_index += 1
+        return url
+
+    def format_html(self, data):
+        """
+        Return the HTML data formatted by the service.
+        """
+        self.counters["documents"] += 1
+        return self.post("", data, "text/html", self.timeout)
+
+    def format_html_batch(self, documents):
+        """
+        Return the HTML documents formatted by the service's batch endpoint
+        (with a single request). The documents are formatted concurrently and
+        returned in order.
+        """
+        if not documents:
+            return []
+        counters = self.counters
+        counters["documents"] += len(documents)
+        results = decode_batch(
+            self.post(
+                PRETTIER_BATCH_PATH,
+                encode_batch(documents),
+                "application/octet-stream",
+                self.timeout + PRETTIER_BATCH_TIMEOUT * len(documents),
+            )
+        )
+        if len(results) != len(documents):
+            counters["failures"] += 1
+            raise ValueError(
+                f"Prettier batch response has {len(results)} documents"
+                f" (expected {len(documents)})"
+            )
+        formatted = []
+        for index, (status, document) in enumerate(results):
+            if status != 200:
+                counters["failures"] += 1
+                raise requests.HTTPError(
+                    f"Batch document {index}: {document.decode('utf-8')}"
+                )
+            formatted.append(document)
+        return formatted
+
+    def get_version(self):
+        """
+        Return the version of Prettier used by the service.
+        """
+        response = self.session.get(
+            urljoin(self.next_url(), PRETTIER_VERSION_PATH),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.text.strip()
+
+    def post(self, path, data, content_type, timeout):
+        """
+        Return the content of the response to the data POSTed to the path
+        (relative to the service URL) of the next replica.
+        """
+        headers = {"Content-Type": content_type}
+        counters = self.counters
+        for attempt in range(self.retries + 1):
+            if attempt:
+                counters["retries"] += 1
+                time.sleep(
+                    min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+                )
+            url = urljoin(self.next_url(), path)
+            counters["requests"] += 1
+            counters["bytes_sent"] += len(data)
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    url, data=data, headers=headers, timeout=timeout
+                )
+            except requests.ConnectionError:
+                # A replica may have been restarted with a new address
+                if attempt < self.retries:
+                    self.resolve()
+                if attempt == self.retries or not self.resolved:
+                    counters["failures"] += 1
+                    raise
+                continue
+            except requests.Timeout:
+                if attempt == self.retries:
+                    counters["failures"] += 1
+                    raise
+                continue
+            counters["bytes_received"] += len(response.content)
+            if (
+                response.status_code in RETRY_STATUS_CODES
+                and attempt < self.retries
+            ):
+                continue
+            if not response.ok:
+                counters["failures"] += 1
+            response.raise_for_status()
+            latency = time.perf_counter() - start
+            counters["latency"] += latency
+            counters["latency_max"] = max(counters["latency_max"], latency)
+            return response.content
+
+    def drain_counters(self):
+        """
+        Return and reset the counters (used to send the counters of a worker
+        process to the parent process).
+        """
+        counters = self.counters
+        self.counters = new_counters()
+        return counters
+
+
+@lru_cache(maxsize=None)
+def get_node_environment():
+    """
+    Return the environment of the Prettier processes: the globally installed
+    Node.js modules (ex. `npm install --global prettier`) are added to the
+    NODE_PATH.
+    """
+    environment = dict(os.environ)
+    try:
+        completed = subprocess.run(
+            ["npm", "root", "--global"], capture_output=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return environment
+    node_path = [completed.stdout.decode("utf-8").strip()]
+    if environment.get("NODE_PATH"):
+        node_path.append(environment["NODE_PATH"])
+    environment["NODE_PATH"] = os.pathsep.join(node_path)
+    return environment
+
+
+class PrettierProcessError(Exception):
+    pass
+
+
+class PrettierProcess:
+    """
+    Long-lived Prettier (Node.js) child process that formats the documents
+    framed on its stdin (see prettier-worker.js). The process is started by
+    the first send() and, if it has crashed, restarted by the next one.
+    """
+
+    def __init__(self, command=None, timeout=PRETTIER_PROCESS_TIMEOUT):
+        if command is None:
+            command = ["node", PRETTIER_WORKER_SCRIPT]
+        self.command = command
+        self.timeout = timeout
+        self.process = None
+        self.buffer = b""
+        self.starts = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=get_node_environment(),
+        )
+        self.buffer = b""
+        self.starts += 1
+
+    def stop(self):
+        if self.process is None:
+            return
+        process = self.process
+        self.process = None
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        process.kill()
+        process.wait()
+
+    def send(self, data):
+        if self.process is None or self.process.poll() is not None:
+            self.stop()
+            self.start()
+        try:
+            self.process.stdin.write(encode_batch([data]))
+            self.process.stdin.flush()
+        except OSError as e:
+            self.stop()
+            raise PrettierProcessError(f"Unable to send document: {e}")
+
+    def read(self, size):
+        """
+        Return the next size bytes of the output of the process.
+        """
+        fd = self.process.stdout.fileno()
+        deadline = time.monotonic() + self.timeout
+        while len(self.buffer) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.stop()
+                raise PrettierProcessError("Timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                self.stop()
+                raise PrettierProcessError("Process exited")
+            self.buffer += chunk
+        data = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return data
+
+    def receive(self):
+        """
+        Return the (status, document) of the next formatted document.
+        """
+        header = b""
+        while not header.endswith(b"\n"):
+            header += self.read(1)
+        status, length = header.split(b" ")
+        return int(status), self.read(int(length))
+
+
+class PrettierProcessPool:
+    """
+    Pool of long-lived Prettier processes. The documents of a batch are
+    formatted concurrently, one per process. A document whose process crashes
+    (or times out) is retried with a restarted process.
+    """
+
+    def __init__(self, size, retries=PRETTIER_RETRIES, command=None):
+        self.pid = os.getpid()
+        self.processes = [PrettierProcess(command) for _ in range(size)]
+        self.retries = retries
+        self.counters = new_counters()
+
+    def format_html(self, data):
+        """
+        Return the HTML data formatted by Prettier (or empty bytes if Prettier
+        was unable to format it).
+        """
+        return self.format_html_batch([data])[0]
+
+    def format_html_batch(self, documents):
+        """
+        Return the HTML documents formatted by Prettier, in order.
+        """
+        counters = self.counters
+        counters["documents"] += len(documents)
+        formatted = [None] * len(documents)
+        attempts = [0] * len(documents)
+        pending = deque(range(len(documents)))
+
+        def retry(index, error):
+            attempts[index] += 1
+            if attempts[index] > self.retries:
+                counters["failures"] += 1
+                raise error
+            counters["retries"] += 1
+            pending.appendleft(index)
+
+        try:
+            while pending:
+                sent = []
+                for process in self.processes:
+                    if not pending:
+                        break
+                    index = pending.popleft()
+                    counters["requests"] += 1
+                    counters["bytes_sent"] += len(documents[index])
+                    try:
+                        process.send(documents[index])
+                    except PrettierProcessError as e:
+                        retry(index, e)
+                        continue
+                    sent.append((process, index, time.perf_counter()))
+                for process, index, start in sent:
+                    try:
+                        status, data = process.receive()
+                    except PrettierProcessError as e:
+                        retry(index, e)
+                        continue
+                    counters["bytes_received"] += len(data)
+                    if status != 200:
+                        # Like the output of `prettier` for invalid HTML
+                        counters["failures"] += 1
+                        data = b""
+                    latency = time.perf_counter() - start
+                    counters["latency"] += latency
+                    counters["latency_max"] = max(
+                        counters["latency_max"], latency
+                    )
+                    formatted[index] = data
+        except BaseException:
+            # Discard the output of documents that were sent but not received
+            self.close()
+            raise
+        return formatted
+
+    def get_version(self):
+        """
+        Return the version of Prettier used by the processes.
+        """
+        completed = subprocess.run(
+            ["node", "--print", "require('prettier').version"],
+            capture_output=True,
+            check=True,
+            env=get_node_environment(),
+        )
+        return completed.stdout.decode("utf-8").strip()
+
+    def close(self):
+        for process in self.processes:
+            process.stop()
+
+    def drain_counters(self):
+        """
+        Return and reset the counters (used to send the counters of a worker
+        process to the parent process).
+        """
+        counters = self.counters
+        self.counters = new_counters()
+        return counters
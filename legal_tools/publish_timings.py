@@ -0,0 +1,199 @@
+# Standard library
+import json
+import math
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+PUBLISH_TIMINGS = None
+# Phases of distilling a page (see PublishTimings)
+PAGE_PHASES = ("render", "cleanup", "prettier", "write")
+SLOWEST_PAGES = 50
+
+
+def init_publish_timings(timings=None):
+    """
+    Set (or, if timings is None, unset) the timings recorded by the publish
+    command's --timings option
+    """
+    global PUBLISH_TIMINGS
+    PUBLISH_TIMINGS = timings
+
+
+def get_publish_timings():
+    return PUBLISH_TIMINGS
+
+
+def stage_timer(name):
+    """
+    Return a context manager that measures a stage of the publish command (a
+    no-op unless timings are recorded).
+    """
+    timings = get_publish_timings()
+    if timings is None:
+        return nullcontext()
+    return timings.stage(name)
+
+
+def page_timer(path):
+    """
+    Return a context manager that attributes the phases measured while it is
+    active to the page path (a no-op unless timings are recorded).
+    """
+    timings = get_publish_timings()
+    if timings is None:
+        return nullcontext()
+    return timings.page(path)
+
+
+def phase_timer(phase, paths=None, weights=None):
+    """
+    Return a context manager that measures a phase of the paths (or of the
+    current page) (a no-op unless timings are recorded).
+    """
+    timings = get_publish_timings()
+    if timings is None:
+        return nullcontext()
+    return timings.measure(phase, paths, weights)
+
+
+def percentile(values, fraction):
+    """
+    Return the nearest-rank percentile of the sorted values.
+    """
+    if not values:
+        return 0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "max": values[-1] if values else 0,
+    }
+
+
+class PublishTimings:
+    """
+    Wall time of the publish command's stages and of the phases of distilling
+    each page:
+
+    - ``render``: the view (excluding the phases below)
+    - ``cleanup``: the clean-up of the HTML by BeautifulSoup
+    - ``prettier``: the formatted HTML cache and the Prettier round trip (the
+      time of a batch is shared by its pages in proportion to their size)
+    - ``write``: saving the file
+
+    Time measured by a nested phase is excluded from the enclosing phase.
+
+    Worker processes record the page timings into their own (forked) copy.
+    Their timings are returned to the parent process with drain() and merged
+    with absorb().
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self.current = None
+        self.frames = []
+
+    @contextmanager
+    def stage(self, name):
+        # Stages are reported in the order they start
+        self.stages.setdefault(name, 0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    @contextmanager
+    def page(self, path):
+        previous = self.current
+        self.current = path
+        try:
+            yield
+        finally:
+            self.current = previous
+
+    @contextmanager
+    def measure(self, phase, paths=None, weights=None):
+        if paths is None:
+            if self.current is None:
+                yield
+                return
+            paths = [self.current]
+        # Each frame is [start, time measured by nested phases]
+        frame = [time.perf_counter(), 0]
+        self.frames.append(frame)
+        try:
+            yield
+        finally:
+            self.frames.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if self.frames:
+                self.frames[-1][1] += elapsed
+            self.add(phase, paths, elapsed - frame[1], weights)
+
+    def add(self, phase, paths, seconds, weights=None):
+        if not paths:
+            return
+        if weights is None or not sum(weights):
+            weights = [1] * len(paths)
+        total = sum(weights)
+        for path, weight in zip(paths, weights):
+            phases = self.pages.setdefault(path, {})
+            phases[phase] = phases.get(phase, 0) + seconds * weight / total
+
+    def drain(self):
+        """
+        Return and reset the page timings (used to send the timings of a
+        worker process to the parent process).
+        """
+        pages = self.pages
+        self.pages = {}
+        return pages
+
+    def absorb(self, pages):
+        for path, phases in pages.items():
+            page = self.pages.setdefault(path, {})
+            for phase, seconds in phases.items():
+                page[phase] = page.get(phase, 0) + seconds
+
+    def report(self, slowest=SLOWEST_PAGES):
+        totals = {
+            path: sum(phases.values()) for path, phases in self.pages.items()
+        }
+        phases = {
+            phase: summarize(
+                [page[phase] for page in self.pages.values() if phase in page]
+            )
+            for phase in PAGE_PHASES
+        }
+        phases["total"] = summarize(list(totals.values()))
+        ranked = sorted(totals, key=lambda path: (-totals[path], path))
+        slowest_pages = []
+        for path in ranked[:slowest]:
+            page = {"path": path, "total": totals[path]}
+            for phase in PAGE_PHASES:
+                if phase in self.pages[path]:
+                    page[phase] = self.pages[path][phase]
+            slowest_pages.append(page)
+        return {
+            "stages": self.stages,
+            "pages": phases,
+            "slowest_pages": slowest_pages,
+        }
+
+    def save(self, timings_file):
+        dirname = os.path.dirname(timings_file)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(timings_file, "wt", encoding="utf-8") as file_obj:
+            json.dump(self.report(), file_obj, indent=2)
+            file_obj.write("\n")
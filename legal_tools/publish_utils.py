@@ -0,0 +1,566 @@
+# Standard library
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+# Third-party
+import git
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_init
+from django.template.base import Template
+from django.utils.translation import to_language, trans_real
+
+# First-party/Local
+from i18n.utils import translation_object_requested
+
+MANIFEST_VERSION = 2
+
+PUBLISH_MANIFEST = None
+DEPENDENCY_RECORDER = None
+
+# Models whose rows read by a task are recorded as its inputs
+MODELS_RECORDED = ("legal_tools.Tool", "legal_tools.LegalCode")
+
+# Paths (and directories) of the app repository whose changes don't change the
+# output of the distilled pages. Changes to templates are mapped to their
+# dependency keys. Changes to any other path (ex. code, Pipfile.lock, or data
+# files read while rendering) may change the output of any page, so every page
+# is distilled.
+APP_IGNORED_PATHS = (
+    ".cc-metadata.yml",
+    ".flake8",
+    ".github/",
+    ".gitignore",
+    ".pre-commit-config.yaml",
+    ".tx/",
+    "LICENSE",
+    "README.md",
+    "bin/",
+    # (copied in full by every publish)
+    "cc_legal_tools/static/",
+    "docs/",
+)
+
+
+def init_publish_manifest(manifest=None):
+    """
+    Set (or, if manifest is None, unset) the publish manifest consulted by
+    legal_tools.utils.save_bytes_to_file()
+    """
+    global PUBLISH_MANIFEST
+    PUBLISH_MANIFEST = manifest
+
+
+def get_publish_manifest():
+    return PUBLISH_MANIFEST
+
+
+def get_publish_manifest_file(manifest_file, output_dir):
+    """
+    Return the path of the manifest of the output directory (derived from
+    manifest_file, ex. settings.PUBLISH_MANIFEST_FILE), so that each output
+    directory has its own manifest.
+    """
+    root, ext = os.path.splitext(manifest_file)
+    key = hashlib.sha256(os.path.abspath(output_dir).encode("utf-8"))
+    return f"{root}-{key.hexdigest()[:16]}{ext}"
+
+
+def get_output_root(output_dir):
+    """
+    Return the identity of the output directory: its path, device, and inode
+    (ex. a freshly cloned data repository has a new output directory at the
+    same path).
+    """
+    try:
+        stat = os.stat(output_dir)
+    except FileNotFoundError:
+        return None
+    return {"path": output_dir, "device": stat.st_dev, "inode": stat.st_ino}
+
+
+class PublishManifest:
+    """
+    Content hash manifest of the files written by the publish command.
+
+    The manifest maps the path of each published file (relative to the output
+    directory) to the SHA-256 digest, size, and modification time of the bytes
+    last written there. Writes whose bytes are unchanged (and whose file on
+    disk still matches the manifest) are skipped. Files of the output
+    directory that were not produced by the current run can then be pruned.
+
+    The manifest is only loaded if it was saved for the same output directory
+    (see get_output_root()). Otherwise, the output directory must be purged.
+
+    Worker processes record into their own (forked) copy of the manifest.
+    Their records are returned to the parent process with drain() and merged
+    with absorb().
+    """
+
+    def __init__(self, output_dir, manifest_file):
+        self.output_dir = os.path.abspath(output_dir)
+        self.manifest_file = manifest_file
+        self.previous = {}
+        self.current = {}
+        self.previous_tasks = {}
+        self.current_tasks = {}
+        self.previous_rows = {}
+        self.current_rows = None
+        self.loaded = False
+        self.task_files = None
+        self.reset_pending()
+        if os.path.isfile(manifest_file):
+            with open(manifest_file, "rt", encoding="utf-8") as file_obj:
+                data = json.load(file_obj)
+            if data.get("version") == MANIFEST_VERSION and data.get(
+                "output_root"
+            ) == get_output_root(self.output_dir):
+                self.previous = data["files"]
+                self.previous_tasks = data.get("tasks", {})
+                self.previous_rows = data.get("rows", {})
+                self.loaded = True
+
+    def reset_pending(self):
+        self.pending = {}
+        self.pending_tasks = {}
+        self.counts = {"written": 0, "unchanged": 0, "deleted": 0}
+
+    def relpath(self, output_filename):
+        """
+        Return the path relative to the output directory or None if the file
+        is outside of the output directory (and therefore not tracked).
+        """
+        relpath = os.path.relpath(
+            os.path.abspath(output_filename), self.output_dir
+        )
+        if relpath == os.pardir or relpath.startswith(f"{os.pardir}{os.sep}"):
+            return None
+        return relpath
+
+    @staticmethod
+    def digest(filebytes):
+        return hashlib.sha256(filebytes).hexdigest()
+
+    def produce(self, relpath, entry):
+        self.current[relpath] = entry
+        self.pending[relpath] = entry
+        if self.task_files is not None:
+            self.task_files.add(relpath)
+
+    def expect(self, output_filename):
+        """
+        Record a file of the current task whose write has been deferred (see
+        legal_tools.prettier_utils.PrettierBatch).
+        """
+        relpath = self.relpath(output_filename)
+        if relpath is not None and self.task_files is not None:
+            self.task_files.add(relpath)
+
+    def is_unchanged(self, output_filename, digest):
+        """
+        Return True (and record the file as produced) if the file on disk
+        already contains the bytes with the given digest.
+        """
+        relpath = self.relpath(output_filename)
+        if relpath is None:
+            return False
+        entry = self.previous.get(relpath)
+        if not entry or entry.get("sha256") != digest:
+            return False
+        try:
+            stat = os.stat(output_filename, follow_symlinks=False)
+        except FileNotFoundError:
+            return False
+        if (
+            stat.st_size != entry["size"]
+            or stat.st_mtime_ns != entry["mtime_ns"]
+        ):
+            return False
+        self.produce(relpath, entry)
+        self.counts["unchanged"] += 1
+        return True
+
+    def record(self, output_filename, digest):
+        """
+        Record a file that has just been written.
+        """
+        self.counts["written"] += 1
+        relpath = self.relpath(output_filename)
+        if relpath is None:
+            return
+        stat = os.stat(output_filename, follow_symlinks=False)
+        self.produce(
+            relpath,
+            {
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            },
+        )
+
+    def record_symlink(self, symlink_path):
+        """
+        Record a symlink that has just been created (so that it is not pruned).
+        """
+        relpath = self.relpath(symlink_path)
+        if relpath is None:
+            return
+        self.produce(relpath, {"symlink": os.readlink(symlink_path)})
+
+    def start_task(self):
+        """
+        Start collecting the files produced by a task.
+        """
+        self.task_files = set()
+
+    def record_task(self, task_key, inputs):
+        """
+        Record the inputs of a task and the files it produced since
+        start_task().
+        """
+        self.pending_tasks[task_key] = {
+            "inputs": sorted(inputs),
+            "files": sorted(self.task_files),
+        }
+        self.task_files = None
+
+    def task_is_dirty(self, task_key, changed_inputs):
+        """
+        Return True if the task was not recorded by a previous run or if any
+        of its recorded inputs are in changed_inputs.
+        """
+        task = self.previous_tasks.get(task_key)
+        if task is None:
+            return True
+        for key in task["inputs"]:
+            prefix, _, language_code = key.rpartition(":")
+            if key in changed_inputs:
+                return True
+            # gettext also loads the catalog of the generic language (ex. "es"
+            # for "es-ar")
+            if prefix.startswith(("locale", "legalcode")) and (
+                f"{prefix}:{language_code.split('-')[0]}" in changed_inputs
+            ):
+                return True
+        return False
+
+    def changed_rows(self):
+        """
+        Return the keys of the database rows whose fingerprints differ from
+        those recorded by the previous run.
+        """
+        rows = self.current_rows or {}
+        return {
+            key
+            for key in set(self.previous_rows) | set(rows)
+            if self.previous_rows.get(key) != rows.get(key)
+        }
+
+    def drain(self):
+        """
+        Return and reset the records made since the last drain (used to send
+        the records of a worker process to the parent process).
+        """
+        report = {
+            "files": self.pending,
+            "tasks": self.pending_tasks,
+            "counts": self.counts,
+        }
+        self.reset_pending()
+        return report
+
+    def absorb(self, report):
+        """
+        Merge the records drained from a worker process.
+        """
+        self.current.update(report["files"])
+        self.current_tasks.update(report["tasks"])
+        for key, value in report["counts"].items():
+            self.counts[key] += value
+
+    def prune(self, ignore=()):
+        """
+        Delete the files and symlinks of the output directory that were not
+        produced by the current run (ex. recorded by a previous run, or not
+        written by the publish command), except the items of the output
+        directory in ignore, and any directories left empty.
+        """
+        stale = []
+        for dirpath, dirnames, filenames in os.walk(self.output_dir):
+            reldir = os.path.relpath(dirpath, self.output_dir)
+            # (symlinks to directories are listed as directories)
+            names = filenames + [
+                name
+                for name in dirnames
+                if os.path.islink(os.path.join(dirpath, name))
+            ]
+            dirnames[:] = [
+                name
+                for name in dirnames
+                if not os.path.islink(os.path.join(dirpath, name))
+                and not (reldir == os.curdir and name in ignore)
+            ]
+            for name in names:
+                if reldir == os.curdir and name in ignore:
+                    continue
+                relpath = os.path.normpath(os.path.join(reldir, name))
+                if relpath not in self.current:
+                    stale.append(relpath)
+        stale.sort(reverse=True)
+        for relpath in stale:
+            path = os.path.join(self.output_dir, relpath)
+            os.remove(path)
+            self.counts["deleted"] += 1
+            dirname = os.path.dirname(path)
+            while dirname != self.output_dir and not os.listdir(dirname):
+                os.rmdir(dirname)
+                dirname = os.path.dirname(dirname)
+        return stale
+
+    def save(self, merge=False):
+        """
+        Persist the manifest. If merge is True (ex. a filtered publish that
+        only produced some of the files), the records of the previous run are
+        retained for the files that were not produced.
+        """
+        if merge:
+            files = dict(self.previous)
+            files.update(self.current)
+            tasks = dict(self.previous_tasks)
+            tasks.update(self.current_tasks)
+        else:
+            files = self.current
+            tasks = self.current_tasks
+        if self.current_rows is None:
+            rows = self.previous_rows
+        else:
+            rows = self.current_rows
+        data = {
+            "version": MANIFEST_VERSION,
+            "output_root": get_output_root(self.output_dir),
+            "files": dict(sorted(files.items())),
+            "tasks": dict(sorted(tasks.items())),
+            "rows": dict(sorted(rows.items())),
+        }
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        temp_file = f"{self.manifest_file}.tmp"
+        with open(temp_file, "wt", encoding="utf-8") as file_obj:
+            json.dump(data, file_obj, indent=0, separators=(",", ":"))
+        os.replace(temp_file, self.manifest_file)
+
+
+class DependencyRecorder:
+    """
+    Record the inputs read while rendering a page:
+
+    - ``template:<name>`` for each template rendered
+    - ``locale:<language_code>`` for each Deeds & UX translation activated
+    - ``legalcode:<domain>:<language_code>`` for each legal code translation
+      object requested from i18n.utils.get_translation_object()
+    - ``<model>:<pk>`` for each Tool and LegalCode row read
+
+    The inputs of the values cached while recording (see get_cached()) are
+    recorded again by the tasks that read them from the cache.
+
+    The keys of changed inputs are derived from git changes by
+    get_changed_inputs().
+    """
+
+    def __init__(self):
+        self.inputs = None
+        self.cached_inputs = {}
+        self.hooks = None
+
+    def start(self):
+        self.inputs = set()
+
+    def stop(self):
+        inputs = self.inputs
+        self.inputs = None
+        return inputs
+
+    def add(self, key):
+        if self.inputs is not None:
+            self.inputs.add(key)
+
+    def add_translation(self, prefix, language_code):
+        self.add(f"{prefix}:{language_code}")
+        # Translations fall back to the default language
+        self.add(f"{prefix}:{settings.LANGUAGE_CODE}")
+
+    @contextmanager
+    def caching(self, cache_key):
+        """
+        Record the inputs read while computing the value cached with the
+        cache key (in addition to the inputs of the current task).
+        """
+        if self.inputs is None:
+            yield
+            return
+        task_inputs = self.inputs
+        self.inputs = set()
+        try:
+            yield
+            self.cached_inputs[cache_key] = self.inputs
+        finally:
+            self.inputs = task_inputs | self.inputs
+
+    def read_cached(self, cache_key):
+        """
+        Record the inputs of the value cached with the cache key. Return False
+        if they are unknown (the value was cached without recording).
+        """
+        if self.inputs is None:
+            return True
+        if cache_key not in self.cached_inputs:
+            return False
+        self.inputs |= self.cached_inputs[cache_key]
+        return True
+
+    def install_hooks(self):
+        original_render = Template._render
+        original_translation = trans_real.translation
+
+        def _render(template, context):
+            if template.origin.template_name:
+                self.add(f"template:{template.origin.template_name}")
+            return original_render(template, context)
+
+        def translation(language):
+            self.add_translation("locale", language)
+            return original_translation(language)
+
+        def translation_object_receiver(sender, domain, language_code, **kw):
+            self.add_translation(f"legalcode:{domain}", language_code)
+
+        def post_init_receiver(sender, instance, **kwargs):
+            if instance.pk is not None:
+                self.add(f"{sender._meta.model_name}:{instance.pk}")
+
+        Template._render = _render
+        trans_real.translation = translation
+        translation_object_requested.connect(
+            translation_object_receiver, weak=False
+        )
+        for sender in MODELS_RECORDED:
+            post_init.connect(post_init_receiver, sender=sender, weak=False)
+        self.hooks = (
+            original_render,
+            original_translation,
+            translation_object_receiver,
+            post_init_receiver,
+        )
+
+    def uninstall_hooks(self):
+        (
+            original_render,
+            original_translation,
+            translation_object_receiver,
+            post_init_receiver,
+        ) = self.hooks
+        Template._render = original_render
+        trans_real.translation = original_translation
+        translation_object_requested.disconnect(translation_object_receiver)
+        for sender in MODELS_RECORDED:
+            post_init.disconnect(post_init_receiver, sender=sender)
+        self.hooks = None
+
+
+def init_dependency_recorder(recorder=None):
+    """
+    Set (or, if recorder is None, unset) the dependency recorder of this
+    process, installing (or uninstalling) its hooks. Inputs are only recorded
+    by publish runs that record dependencies (see the --record-dependencies
+    option).
+    """
+    global DEPENDENCY_RECORDER
+    if DEPENDENCY_RECORDER is not None:
+        DEPENDENCY_RECORDER.uninstall_hooks()
+    DEPENDENCY_RECORDER = recorder
+    if recorder is not None:
+        recorder.install_hooks()
+
+
+def get_dependency_recorder():
+    return DEPENDENCY_RECORDER
+
+
+def record_dependency(key):
+    """
+    Record an input of the current task (if inputs are being recorded).
+    """
+    if DEPENDENCY_RECORDER is not None:
+        DEPENDENCY_RECORDER.add(key)
+
+
+def get_cached(cache_key, default=None):
+    """
+    Return the value cached with the cache key (computed within caching()),
+    or default. While inputs are recorded, the inputs of the value are
+    recorded as well and values cached without recording their inputs are
+    invalidated.
+    """
+    if DEPENDENCY_RECORDER is not None and not (
+        DEPENDENCY_RECORDER.read_cached(cache_key)
+    ):
+        cache.delete(cache_key)
+        return default
+    return cache.get(cache_key, default)
+
+
+@contextmanager
+def caching(cache_key):
+    """
+    Record the inputs read while computing the value to cache with the cache
+    key (see get_cached()).
+    """
+    if DEPENDENCY_RECORDER is None:
+        yield
+    else:
+        with DEPENDENCY_RECORDER.caching(cache_key):
+            yield
+
+
+def get_changed_paths(repo_dir, ref):
+    """
+    Return the paths (relative to the top of the repository) of the files
+    that differ between the git ref and the working tree, including untracked
+    files.
+    """
+    repo = git.Repo(repo_dir)
+    paths = set(repo.git.diff("--name-only", ref, "--").splitlines())
+    paths.update(repo.untracked_files)
+    return sorted(paths)
+
+
+def get_changed_inputs(app_paths, data_paths):
+    """
+    Return the set of changed dependency keys (see DependencyRecorder) for
+    the changed paths of the app repository and the data repository. Returns
+    None if a path of the app repository that isn't a template or in
+    APP_IGNORED_PATHS changed (every page must be rebuilt).
+    """
+    changed_inputs = set()
+    for path in app_paths:
+        parts = path.split("/")
+        if parts[0] == "templates":
+            changed_inputs.add(f"template:{'/'.join(parts[1:])}")
+        elif not (path.startswith(APP_IGNORED_PATHS) or "tests" in parts[:-1]):
+            return None
+    for path in data_paths:
+        parts = path.split("/")
+        if (
+            len(parts) != 4
+            or parts[2] != "LC_MESSAGES"
+            or not parts[3].endswith((".po", ".mo"))
+        ):
+            continue
+        language_code = to_language(parts[1])
+        domain = parts[3][:-3]
+        if parts[0] == "locale" and domain == "django":
+            changed_inputs.add(f"locale:{language_code}")
+        elif parts[0] == "legalcode":
+            changed_inputs.add(f"legalcode:{domain}:{language_code}")
+    return changed_inputs
@@ -1,8 +1,13 @@
 # Standard library
+import hashlib
+import json
 import os.path
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse
+from xml.sax.saxutils import escape
 
 # Third-party
+from django.db.models import Prefetch
 from lxml import etree
 from rdflib import Graph, Literal, Namespace, URIRef
 from rdflib.namespace import DCTERMS, FOAF, OWL, RDF, XSD
@@ -15,6 +20,82 @@ FOAF_LOGO_URL = "http://licensebuttons.net/l/"
 SMALL_LOGO = "80x15.png"
 LARGE_LOGO = "88x31.png"
 
+# Fields read to generate the RDF of legal tools (see get_rdf_tools())
+RDF_TOOL_FIELDS = [
+    "base_url",
+    "category",
+    "creator_url",
+    "deprecated_on",
+    "jurisdiction_code",
+    "permits_derivative_works",
+    "permits_distribution",
+    "permits_reproduction",
+    "permits_sharing",
+    "prohibits_commercial_use",
+    "prohibits_high_income_nation_use",
+    "requires_attribution",
+    "requires_notice",
+    "requires_share_alike",
+    "unit",
+    "version",
+]
+# Fields read from the tools a legal tool is replaced by or sourced from
+RDF_RELATED_TOOL_FIELDS = ["is_replaced_by__base_url", "source__base_url"]
+RDF_LEGAL_CODE_FIELDS = ["tool", "language_code", "legal_code_url", "title"]
+
+# Increment if the RDF/XML written by legal_tool_rdf_xml_fragment() is changed
+# (the version is part of the key of the RDF/XML fragment cache)
+RDF_XML_VERSION = 1
+RDF_FRAGMENT_CACHE = None
+
+# The relevant namespaces for RDF elements
+CC = Namespace("http://creativecommons.org/ns#")
+# Namespaces declared by the RDF/XML of legal tools (in the order written by
+# order_rdf_xml())
+RDF_XML_NAMESPACES = [
+    ("cc", CC),
+    ("dcterms", DCTERMS),
+    ("foaf", FOAF),
+    ("owl", OWL),
+    ("rdf", RDF),
+]
+# Characters escaped by lxml in text and attribute values (in addition to &,
+# <, and >)
+XML_TEXT_ENTITIES = {"\r": "&#13;"}
+XML_ATTRIBUTE_ENTITIES = {
+    '"': "&quot;",
+    "\n": "&#10;",
+    "\r": "&#13;",
+    "\t": "&#9;",
+}
+# Namespaces of the prefixed names written by the RDF exports (see
+# legal_tools_rdf_exports())
+RDF_EXPORT_NAMESPACES = [
+    (prefix, str(namespace))
+    for prefix, namespace in RDF_XML_NAMESPACES + [("xsd", XSD)]
+]
+# File extensions of the RDF formats exported next to the RDF/XML of legal
+# tools
+RDF_EXPORT_EXTENSIONS = [".jsonld", ".nt", ".ttl"]
+# Characters escaped in N-Triples and Turtle string literals
+NTRIPLES_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"}
+)
+
+
+def init_rdf_fragment_cache(fragment_cache=None):
+    """
+    Set (or, if fragment_cache is None, unset) the cache of the RDF/XML
+    fragment of each legal tool used by generate_legal_code_rdf_xml() (a
+    legal_tools.format_cache.FormatCache)
+    """
+    global RDF_FRAGMENT_CACHE
+    RDF_FRAGMENT_CACHE = fragment_cache
+
+
+def get_rdf_fragment_cache():
+    return RDF_FRAGMENT_CACHE
+
 
 def convert_https_to_http(url):
     parsed_url = urlparse(url)
@@ -62,33 +143,207 @@ def generate_images_rdf():
     return image_graph
 
 
-def generate_legal_code_rdf(
+def get_rdf_tools(
     category=None,
     unit=None,
     version=None,
     jurisdiction=None,
     generate_all_licenses=False,
 ):
+    """
+    Return the legal tools selected by the arguments. The tools, the tools
+    they are replaced by or sourced from, and their legal codes are retrieved
+    with two queries (regardless of the number of tools).
+    """
     # Retrieving license data from the database based on the arguments.
+    tools = (
+        Tool.objects.select_related("is_replaced_by", "source")
+        .only(*RDF_TOOL_FIELDS, *RDF_RELATED_TOOL_FIELDS)
+        .prefetch_related(
+            Prefetch(
+                "legal_codes",
+                queryset=LegalCode.objects.only(*RDF_LEGAL_CODE_FIELDS),
+            )
+        )
+    )
     if generate_all_licenses is True:
-        retrieved_tools = Tool.objects.all()
+        retrieved_tools = tools.all()
     else:
         if jurisdiction:
-            retrieved_tool = Tool.objects.filter(
+            retrieved_tool = tools.filter(
                 category=category,
                 unit=unit,
                 version=version,
                 jurisdiction_code=jurisdiction,
             ).first()
         else:
-            retrieved_tool = Tool.objects.filter(
+            retrieved_tool = tools.filter(
                 category=category, unit=unit, version=version
             ).first()
         retrieved_tools = []
         retrieved_tools.append(retrieved_tool)
+    return retrieved_tools
+
+
+def legal_tool_triples(tool):
+    """
+    Return the RDF triples of a legal tool (the graph of
+    generate_legal_code_rdf() and the RDF formats exported by
+    legal_tools_rdf_exports() are built from these triples).
+    """
+    triples = []
+    add = triples.append
+    legal_codes = tool.legal_codes.all()
+    license_uri = URIRef(convert_https_to_http(tool.base_url))
+
+    # set cc:License (parent)
+    add((license_uri, RDF.type, CC.License))
+
+    # set cc:deprecatedOn, if applicable
+    if tool.deprecated_on:
+        deprecated_on = Literal(tool.deprecated_on, datatype=XSD.date)
+        add((license_uri, CC.deprecatedOn, deprecated_on))
+
+    # set cc:jurisdiction, if applicable
+    if tool.jurisdiction_code:
+        jurisdiction_uri = URIRef(
+            convert_https_to_http(
+                os.path.join(
+                    tool.creator_url,
+                    "international",
+                    tool.jurisdiction_code,
+                    "",  # legacy rdf has a trailing slash
+                )
+            )
+        )
+        add((license_uri, CC.jurisdiction, jurisdiction_uri))
+
+    # add cc:legalcode
+    # (utilize LegalCode object(s) assciated with the current Tool object)
+    for lc_object in legal_codes:
+        legal_code_uri = URIRef(
+            convert_https_to_http(
+                f"{tool.creator_url}{lc_object.legal_code_url}"
+            )
+        )
+        data = Literal(legal_code_uri, lang=lc_object.language_code)
+        add((license_uri, CC.legalcode, data))
+
+    # set cc:licenseClass
+    # (trailing "" creates a trailing slash to match legacy rdf)
+    license_class_uriref = convert_https_to_http(tool.creator_url)
+    if tool.category == "publicdomain":
+        license_class_uriref = os.path.join(
+            license_class_uriref, "choose", "publicdomain", ""
+        )
+    elif "sampling" in tool.unit:
+        license_class_uriref = os.path.join(
+            license_class_uriref, "license", "sampling", ""
+        )
+    else:
+        license_class_uriref = os.path.join(
+            license_class_uriref, "license", ""
+        )
+    add((license_uri, CC.licenseClass, URIRef(license_class_uriref)))
+
+    # add cc:permits, as applicable
+    if tool.permits_derivative_works:
+        add((license_uri, CC.permits, CC.DerivativeWorks))
+    if tool.permits_distribution:
+        add((license_uri, CC.permits, CC.Distribution))
+    if tool.permits_reproduction:
+        add((license_uri, CC.permits, CC.Reproduction))
+    if tool.permits_sharing:
+        add((license_uri, CC.permits, CC.Sharing))
+
+    # add cc:prohibits, as applicable
+    if tool.prohibits_commercial_use:
+        add((license_uri, CC.prohibits, CC.CommercialUse))
+    if tool.prohibits_high_income_nation_use:
+        add((license_uri, CC.prohibits, CC.HighIncomeNationUse))
+
+    # add cc:requires, as applicable
+    if tool.requires_attribution:
+        add((license_uri, CC.requires, CC.Attribution))
+    if tool.requires_notice:
+        add((license_uri, CC.requires, CC.Notice))
+    if tool.requires_share_alike:
+        add((license_uri, CC.requires, CC.ShareAlike))
+
+    # set dcterms:creator
+    creator = URIRef(convert_https_to_http(tool.creator_url))
+    add((license_uri, DCTERMS.creator, creator))
+
+    # set dcterms:Jurisdiction
+    if tool.jurisdiction_code and tool.jurisdiction_code != "scotland":
+        if tool.jurisdiction_code == "igo":
+            jurisdiction_code = "un"
+        else:
+            jurisdiction_code = tool.jurisdiction_code
+        data = Literal(jurisdiction_code, datatype=DCTERMS.ISO3166)
+        add((license_uri, DCTERMS.Jurisdiction, data))
+
+    # set dcterms:hasVersion
+    version = Literal(f"{tool.version}")
+    add((license_uri, DCTERMS.hasVersion, version))
+
+    # set dcterms:identifier
+    add((license_uri, DCTERMS.identifier, Literal(f"{tool.unit}")))
+
+    # set dcterms:isReplacedBy, if applicable
+    if tool.is_replaced_by:
+        # Convert to Literal so that the URL string is stored instead of
+        # the object referenced
+        replaced_by = Literal(
+            URIRef(convert_https_to_http(tool.is_replaced_by.base_url))
+        )
+        add((license_uri, DCTERMS.isReplacedBy, replaced_by))
+
+    # add dcterms:LicenseDocument
+    # (utilize LegalCode object(s) assciated with the current Tool object)
+    for lc_object in legal_codes:
+        legal_code_uri = URIRef(
+            f"{tool.creator_url}{lc_object.legal_code_url}"
+        )
+        data = Literal(legal_code_uri, lang=lc_object.language_code)
+        add((license_uri, DCTERMS.LicenseDocument, data))
+
+    # set dcterms:source, if applicable
+    if tool.source:
+        # Convert to Literal so that the URL string is stored instead of
+        # the object referenced
+        source = Literal(URIRef(convert_https_to_http(tool.source.base_url)))
+        add((license_uri, DCTERMS.source, source))
+
+    # add dcterms:title
+    # (utilize LegalCode object(s) assciated with the current Tool object)
+    for lc_object in legal_codes:
+        data = Literal(lc_object.title, lang=lc_object.language_code)
+        add((license_uri, DCTERMS.title, data))
+
+    # add foaf:logo
+    logo_uris = generate_foaf_logo_uris(
+        tool.unit, tool.version, tool.jurisdiction_code
+    )
+    add((license_uri, FOAF.logo, logo_uris["large"]))
+    add((license_uri, FOAF.logo, logo_uris["small"]))
+
+    # set owl:sameAs (alias HTTPS)
+    add((license_uri, OWL.sameAs, URIRef(tool.base_url)))
 
-    # The relevant namespaces for RDF elements
-    CC = Namespace("http://creativecommons.org/ns#")
+    return triples
+
+
+def generate_legal_code_rdf(
+    category=None,
+    unit=None,
+    version=None,
+    jurisdiction=None,
+    generate_all_licenses=False,
+):
+    retrieved_tools = get_rdf_tools(
+        category, unit, version, jurisdiction, generate_all_licenses
+    )
 
     g = Graph()
 
@@ -101,150 +356,476 @@ def generate_legal_code_rdf(
     g.bind("xsd", XSD)
 
     for tool in retrieved_tools:
-        legal_code_ids = tool.legal_codes.values_list("id", flat=True)
-        license_uri = URIRef(convert_https_to_http(tool.base_url))
-
-        # set cc:License (parent)
-        g.set((license_uri, RDF.type, CC.License))
-
-        # set cc:deprecatedOn, if applicable
-        if tool.deprecated_on:
-            deprecated_on = Literal(tool.deprecated_on, datatype=XSD.date)
-            g.set((license_uri, CC.deprecatedOn, deprecated_on))
-
-        # set cc:jurisdiction, if applicable
-        if tool.jurisdiction_code:
-            jurisdiction_uri = URIRef(
-                convert_https_to_http(
-                    os.path.join(
-                        tool.creator_url,
-                        "international",
-                        tool.jurisdiction_code,
-                        "",  # legacy rdf has a trailing slash
-                    )
-                )
+        for triple in legal_tool_triples(tool):
+            g.add(triple)
+
+    return g
+
+
+def rdf_xml_property(tag, text="", attribute=None, value=""):
+    """
+    Return the sorting key (see order_rdf_xml()) and the RDF/XML of a property
+    element.
+    """
+    if attribute is None:
+        key = f"{tag} "
+        element = f"<{tag}"
+    else:
+        key = f"{tag} {attribute}:{value}"
+        value = escape(value, XML_ATTRIBUTE_ENTITIES)
+        element = f'<{tag} {attribute}="{value}"'
+    if not text:
+        return key, f"{element}/>"
+    text = escape(text, XML_TEXT_ENTITIES)
+    return key, f"{element}>{text}</{tag}>"
+
+
+def rdf_xml_literal(tag, text, language_code):
+    if language_code:
+        return rdf_xml_property(tag, text, "xml:lang", language_code)
+    return rdf_xml_property(tag, text)
+
+
+def legal_tool_rdf_xml_properties(tool):
+    """
+    Return the sorted RDF/XML property elements of a legal tool (the
+    properties added to the graph by generate_legal_code_rdf()).
+    """
+    properties = set()
+    add = properties.add
+
+    # cc:deprecatedOn
+    if tool.deprecated_on:
+        add(
+            rdf_xml_property(
+                "cc:deprecatedOn",
+                str(tool.deprecated_on),
+                "rdf:datatype",
+                str(XSD.date),
             )
-            g.set((license_uri, CC.jurisdiction, jurisdiction_uri))
-
-        # add cc:legalcode
-        # (utilize LegalCode object(s) assciated with the current Tool object)
-        for legal_code_id in legal_code_ids:
-            lc_object = LegalCode.objects.get(id=legal_code_id)
-            legal_code_uri = URIRef(
-                convert_https_to_http(
-                    f"{tool.creator_url}{lc_object.legal_code_url}"
-                )
+        )
+
+    # cc:jurisdiction
+    if tool.jurisdiction_code:
+        jurisdiction_uri = convert_https_to_http(
+            os.path.join(
+                tool.creator_url,
+                "international",
+                tool.jurisdiction_code,
+                "",  # legacy rdf has a trailing slash
             )
-            data = Literal(legal_code_uri, lang=lc_object.language_code)
-            g.add((license_uri, CC.legalcode, data))
-
-        # set cc:licenseClass
-        # (trailing "" creates a trailing slash to match legacy rdf)
-        license_class_uriref = convert_https_to_http(tool.creator_url)
-        if tool.category == "publicdomain":
-            license_class_uriref = os.path.join(
-                license_class_uriref, "choose", "publicdomain", ""
+        )
+        add(
+            rdf_xml_property(
+                "cc:jurisdiction", "", "rdf:resource", jurisdiction_uri
             )
-        elif "sampling" in tool.unit:
-            license_class_uriref = os.path.join(
-                license_class_uriref, "license", "sampling", ""
+        )
+
+    for legal_code in tool.legal_codes.all():
+        legal_code_url = f"{tool.creator_url}{legal_code.legal_code_url}"
+        # cc:legalcode
+        add(
+            rdf_xml_literal(
+                "cc:legalcode",
+                convert_https_to_http(legal_code_url),
+                legal_code.language_code,
             )
-        else:
-            license_class_uriref = os.path.join(
-                license_class_uriref, "license", ""
+        )
+        # dcterms:LicenseDocument
+        add(
+            rdf_xml_literal(
+                "dcterms:LicenseDocument",
+                legal_code_url,
+                legal_code.language_code,
             )
-        g.set((license_uri, CC.licenseClass, URIRef(license_class_uriref)))
-
-        # add cc:permits, as applicable
-        if tool.permits_derivative_works:
-            g.add((license_uri, CC.permits, CC.DerivativeWorks))
-        if tool.permits_distribution:
-            g.add((license_uri, CC.permits, CC.Distribution))
-        if tool.permits_reproduction:
-            g.add((license_uri, CC.permits, CC.Reproduction))
-        if tool.permits_sharing:
-            g.add((license_uri, CC.permits, CC.Sharing))
-
-        # add cc:prohibits, as applicable
-        if tool.prohibits_commercial_use:
-            g.add((license_uri, CC.prohibits, CC.CommercialUse))
-        if tool.prohibits_high_income_nation_use:
-            g.add((license_uri, CC.prohibits, CC.HighIncomeNationUse))
-
-        # add cc:requires, as applicable
-        if tool.requires_attribution:
-            g.add((license_uri, CC.requires, CC.Attribution))
-        if tool.requires_notice:
-            g.add((license_uri, CC.requires, CC.Notice))
-        if tool.requires_share_alike:
-            g.add((license_uri, CC.requires, CC.ShareAlike))
-
-        # set dcterms:creator
-        creator = URIRef(convert_https_to_http(tool.creator_url))
-        g.set((license_uri, DCTERMS.creator, creator))
-
-        # set dcterms:Jurisdiction
-        if tool.jurisdiction_code and tool.jurisdiction_code != "scotland":
-            if tool.jurisdiction_code == "igo":
-                jurisdiction_code = "un"
-            else:
-                jurisdiction_code = tool.jurisdiction_code
-            data = Literal(jurisdiction_code, datatype=DCTERMS.ISO3166)
-            g.set((license_uri, DCTERMS.Jurisdiction, data))
-
-        # set dcterms:hasVersion
-        version = Literal(f"{tool.version}")
-        g.set((license_uri, DCTERMS.hasVersion, version))
-
-        # set dcterms:identifier
-        g.set((license_uri, DCTERMS.identifier, Literal(f"{tool.unit}")))
-
-        # set dcterms:isReplacedBy, if applicable
-        if tool.is_replaced_by:
-            # Convert to Literal so that the URL string is stored instead of
-            # the object referenced
-            replaced_by = Literal(
-                URIRef(convert_https_to_http(tool.is_replaced_by.base_url))
+        )
+        # dcterms:title
+        add(
+            rdf_xml_literal(
+                "dcterms:title", legal_code.title, legal_code.language_code
             )
-            g.set((license_uri, DCTERMS.isReplacedBy, replaced_by))
+        )
 
-        # add dcterms:LicenseDocument
-        # (utilize LegalCode object(s) assciated with the current Tool object)
-        for legal_code_id in legal_code_ids:
-            lc_object = LegalCode.objects.get(id=legal_code_id)
-            legal_code_uri = URIRef(
-                f"{tool.creator_url}{lc_object.legal_code_url}"
+    # cc:licenseClass
+    license_class_uriref = convert_https_to_http(tool.creator_url)
+    if tool.category == "publicdomain":
+        license_class_uriref = os.path.join(
+            license_class_uriref, "choose", "publicdomain", ""
+        )
+    elif "sampling" in tool.unit:
+        license_class_uriref = os.path.join(
+            license_class_uriref, "license", "sampling", ""
+        )
+    else:
+        license_class_uriref = os.path.join(
+            license_class_uriref, "license", ""
+        )
+    add(
+        rdf_xml_property(
+            "cc:licenseClass", "", "rdf:resource", license_class_uriref
+        )
+    )
+
+    # cc:permits, cc:prohibits, and cc:requires
+    for tag, field, term in (
+        ("cc:permits", "permits_derivative_works", CC.DerivativeWorks),
+        ("cc:permits", "permits_distribution", CC.Distribution),
+        ("cc:permits", "permits_reproduction", CC.Reproduction),
+        ("cc:permits", "permits_sharing", CC.Sharing),
+        ("cc:prohibits", "prohibits_commercial_use", CC.CommercialUse),
+        (
+            "cc:prohibits",
+            "prohibits_high_income_nation_use",
+            CC.HighIncomeNationUse,
+        ),
+        ("cc:requires", "requires_attribution", CC.Attribution),
+        ("cc:requires", "requires_notice", CC.Notice),
+        ("cc:requires", "requires_share_alike", CC.ShareAlike),
+    ):
+        if getattr(tool, field):
+            add(rdf_xml_property(tag, "", "rdf:resource", str(term)))
+
+    # dcterms:creator
+    creator = convert_https_to_http(tool.creator_url)
+    add(rdf_xml_property("dcterms:creator", "", "rdf:resource", creator))
+
+    # dcterms:Jurisdiction
+    if tool.jurisdiction_code and tool.jurisdiction_code != "scotland":
+        if tool.jurisdiction_code == "igo":
+            jurisdiction_code = "un"
+        else:
+            jurisdiction_code = tool.jurisdiction_code
+        add(
+            rdf_xml_property(
+                "dcterms:Jurisdiction",
+                jurisdiction_code,
+                "rdf:datatype",
+                str(DCTERMS.ISO3166),
             )
-            data = Literal(legal_code_uri, lang=lc_object.language_code)
-            g.add((license_uri, DCTERMS.LicenseDocument, data))
-
-        # set dcterms:source, if applicable
-        if tool.source:
-            # Convert to Literal so that the URL string is stored instead of
-            # the object referenced
-            source = Literal(
-                URIRef(convert_https_to_http(tool.source.base_url))
+        )
+
+    # dcterms:hasVersion and dcterms:identifier
+    add(rdf_xml_property("dcterms:hasVersion", f"{tool.version}"))
+    add(rdf_xml_property("dcterms:identifier", f"{tool.unit}"))
+
+    # dcterms:isReplacedBy and dcterms:source
+    if tool.is_replaced_by:
+        replaced_by = convert_https_to_http(tool.is_replaced_by.base_url)
+        add(rdf_xml_property("dcterms:isReplacedBy", replaced_by))
+    if tool.source:
+        source = convert_https_to_http(tool.source.base_url)
+        add(rdf_xml_property("dcterms:source", source))
+
+    # foaf:logo
+    logo_uris = generate_foaf_logo_uris(
+        tool.unit, tool.version, tool.jurisdiction_code
+    )
+    for logo_uri in logo_uris.values():
+        add(rdf_xml_property("foaf:logo", "", "rdf:resource", logo_uri))
+
+    # owl:sameAs (alias HTTPS)
+    add(rdf_xml_property("owl:sameAs", "", "rdf:resource", tool.base_url))
+
+    return sorted(properties)
+
+
+def legal_tool_rdf_xml_data(tool):
+    """
+    Return the data of a legal tool written to its RDF/XML (the cache key of
+    its RDF/XML fragment is derived from it).
+    """
+    data = [getattr(tool, field) for field in RDF_TOOL_FIELDS]
+    data.append(tool.is_replaced_by.base_url if tool.is_replaced_by else None)
+    data.append(tool.source.base_url if tool.source else None)
+    data.append(
+        sorted(
+            (
+                legal_code.language_code,
+                legal_code.legal_code_url,
+                legal_code.title,
             )
-            g.set((license_uri, DCTERMS.source, source))
+            for legal_code in tool.legal_codes.all()
+        )
+    )
+    return repr(data).encode("utf-8")
+
+
+def legal_tool_rdf_xml_fragment(tool):
+    """
+    Return the cc:License element of a legal tool (the RDF/XML documents of
+    legal tools are the concatenation of these fragments).
+    """
+    license_uri = convert_https_to_http(tool.base_url)
+    license_uri = escape(license_uri, XML_ATTRIBUTE_ENTITIES)
+    lines = [f'  <cc:License rdf:about="{license_uri}">']
+    for _, element in legal_tool_rdf_xml_properties(tool):
+        lines.append(f"    {element}")
+    lines.append("  </cc:License>")
+    return "\n".join(lines)
+
+
+def legal_tool_rdf_xml_fragments(tools):
+    """
+    Return the cc:License element of each of the legal tools. If the RDF/XML
+    fragment cache is set, only the fragments of tools whose data is not
+    cached are written (and then cached).
+    """
+    fragment_cache = get_rdf_fragment_cache()
+    if fragment_cache is None:
+        return [legal_tool_rdf_xml_fragment(tool) for tool in tools]
+    version = str(RDF_XML_VERSION)
+    keys = [
+        fragment_cache.key(legal_tool_rdf_xml_data(tool), version)
+        for tool in tools
+    ]
+    cached = fragment_cache.get_many(keys)
+    fragments = []
+    missing = {}
+    for tool, key in zip(tools, keys):
+        if key in cached:
+            fragments.append(cached[key].decode("utf-8"))
+        else:
+            fragment = legal_tool_rdf_xml_fragment(tool)
+            missing[key] = fragment.encode("utf-8")
+            fragments.append(fragment)
+    fragment_cache.put_many(missing)
+    return fragments
 
-        # add dcterms:title
-        # (utilize LegalCode object(s) assciated with the current Tool object)
-        for legal_code_id in legal_code_ids:
-            lc_object = LegalCode.objects.get(id=legal_code_id)
-            data = Literal(lc_object.title, lang=lc_object.language_code)
-            g.add((license_uri, DCTERMS.title, data))
 
-        # add foaf:logo
-        logo_uris = generate_foaf_logo_uris(
-            tool.unit, tool.version, tool.jurisdiction_code
+def generate_legal_code_rdf_xml(
+    category=None,
+    unit=None,
+    version=None,
+    jurisdiction=None,
+    generate_all_licenses=False,
+):
+    """
+    Return the RDF/XML of the legal tools selected by the arguments (see
+    generate_legal_code_rdf()).
+
+    The RDF/XML is written directly, already in the order of order_rdf_xml().
+    It is identical to the serialization of the graph returned by
+    generate_legal_code_rdf() with rdflib's pretty-xml serializer and
+    order_rdf_xml(), without the cost of building, serializing, parsing, and
+    sorting the graph.
+    """
+    retrieved_tools = list(
+        get_rdf_tools(
+            category, unit, version, jurisdiction, generate_all_licenses
         )
-        g.add((license_uri, FOAF.logo, logo_uris["large"]))
-        g.add((license_uri, FOAF.logo, logo_uris["small"]))
+    )
+    return legal_tools_rdf_xml(retrieved_tools)
+
+
+def legal_tools_rdf_xml(retrieved_tools):
+    """
+    Return the RDF/XML of the legal tools (see generate_legal_code_rdf_xml()).
+    The document is assembled from the cc:License fragment of each legal tool
+    (see legal_tool_rdf_xml_fragments()).
+    """
+    fragments = legal_tool_rdf_xml_fragments(retrieved_tools)
+    licenses = sorted(
+        (
+            f"cc:License rdf:about:{convert_https_to_http(tool.base_url)}",
+            fragment,
+        )
+        for tool, fragment in zip(retrieved_tools, fragments)
+    )
+
+    lines = ["<?xml version='1.0' encoding='utf-8'?>"]
+    if not licenses:
+        lines.append(f'<rdf:RDF xmlns:rdf="{RDF}"/>')
+        lines.append("")
+        return "\n".join(lines)
+    namespaces = " ".join(
+        f'xmlns:{prefix}="{namespace}"'
+        for prefix, namespace in RDF_XML_NAMESPACES
+    )
+    lines.append(f"<rdf:RDF {namespaces}>")
+    lines += [fragment for _, fragment in licenses]
+    lines.append("</rdf:RDF>")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def rdf_export_term(term):
+    """
+    Return the N-Triples (and Turtle) representation of an RDF term.
+    """
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    literal = f'"{str(term).translate(NTRIPLES_ESCAPES)}"'
+    if term.language:
+        return f"{literal}@{term.language}"
+    if term.datatype:
+        return f"{literal}^^<{term.datatype}>"
+    return literal
+
+
+@lru_cache(maxsize=None)
+def rdf_export_qname(uri):
+    """
+    Return the prefixed name of a URI in one of RDF_EXPORT_NAMESPACES (or
+    None).
+    """
+    for prefix, namespace in RDF_EXPORT_NAMESPACES:
+        if uri.startswith(namespace):
+            local_name = uri.removeprefix(namespace)
+            if local_name.isalnum():
+                return f"{prefix}:{local_name}"
+    return None
+
+
+def rdf_export_nodes(tools):
+    """
+    Return the (subject, {predicate: objects}) node of each of the legal
+    tools, sorted by subject with the objects of each predicate sorted by
+    their N-Triples representation.
+    """
+    nodes = []
+    for tool in tools:
+        triples = legal_tool_triples(tool)
+        subject = triples[0][0]
+        properties = {}
+        for _, predicate, term in triples:
+            properties.setdefault(predicate, set()).add(term)
+        for predicate, terms in properties.items():
+            properties[predicate] = sorted(terms, key=rdf_export_term)
+        nodes.append((subject, properties))
+    nodes.sort(key=lambda node: str(node[0]))
+    return nodes
+
+
+def rdf_export_ntriples(nodes):
+    return rdf_canonical_ntriples(
+        (subject, predicate, term)
+        for subject, properties in nodes
+        for predicate, terms in properties.items()
+        for term in terms
+    )
 
-        # set owl:sameAs (alias HTTPS)
-        g.set((license_uri, OWL.sameAs, URIRef(tool.base_url)))
 
-    return g
+def rdf_canonical_ntriples(triples):
+    """
+    Return the sorted N-Triples of the triples. The RDF of legal tools has no
+    blank nodes, so its sorted N-Triples are canonical: they are identical
+    for identical graphs, regardless of how the graphs were serialized.
+    """
+    lines = sorted(
+        {
+            f"{rdf_export_term(subject)} {rdf_export_term(predicate)}"
+            f" {rdf_export_term(term)} ."
+            for subject, predicate, term in triples
+        }
+    )
+    lines.append("")
+    return "\n".join(lines)
+
+
+def rdf_hash(triples):
+    """
+    Return the SHA-256 digest of the canonical N-Triples of the triples (ex.
+    legal_tool_triples() or a parsed rdflib Graph).
+    """
+    ntriples = rdf_canonical_ntriples(triples)
+    return hashlib.sha256(ntriples.encode("utf-8")).hexdigest()
+
+
+def rdf_export_turtle(nodes):
+    def turtle_term(term):
+        if isinstance(term, URIRef):
+            qname = rdf_export_qname(term)
+            if qname:
+                return qname
+        elif term.datatype:
+            qname = rdf_export_qname(term.datatype)
+            if qname:
+                literal = str(term).translate(NTRIPLES_ESCAPES)
+                return f'"{literal}"^^{qname}'
+        return rdf_export_term(term)
+
+    lines = [
+        f"@prefix {prefix}: <{namespace}> ."
+        for prefix, namespace in RDF_EXPORT_NAMESPACES
+    ]
+    for subject, properties in nodes:
+        lines.append("")
+        lines.append(rdf_export_term(subject))
+        predicates = sorted(
+            properties,
+            key=lambda predicate: (
+                predicate != RDF.type,
+                turtle_term(predicate),
+            ),
+        )
+        for predicate in predicates:
+            if predicate == RDF.type:
+                verb = "a"
+            else:
+                verb = turtle_term(predicate)
+            objects = ",\n        ".join(
+                turtle_term(term) for term in properties[predicate]
+            )
+            lines.append(f"    {verb} {objects} ;")
+        lines[-1] = f"{lines[-1][:-2]} ."
+    lines.append("")
+    return "\n".join(lines)
+
+
+def rdf_export_jsonld(nodes):
+    def jsonld_value(term):
+        if isinstance(term, URIRef):
+            return {"@id": str(term)}
+        if term.language:
+            return {"@language": term.language, "@value": str(term)}
+        if term.datatype:
+            datatype = rdf_export_qname(term.datatype) or str(term.datatype)
+            return {"@type": datatype, "@value": str(term)}
+        return str(term)
+
+    graph = []
+    for subject, properties in nodes:
+        node = {"@id": str(subject)}
+        for predicate, terms in properties.items():
+            if predicate == RDF.type:
+                node["@type"] = [
+                    rdf_export_qname(term) or str(term) for term in terms
+                ]
+            else:
+                key = rdf_export_qname(predicate) or str(predicate)
+                node[key] = [jsonld_value(term) for term in terms]
+        graph.append(node)
+    # Each node is written on its own line (so that the changes to a legal
+    # tool are on a single line of the diffs of the data repository)
+    context = json.dumps(dict(RDF_EXPORT_NAMESPACES), sort_keys=True)
+    lines = [f'{{"@context": {context}, "@graph": [']
+    lines.append(
+        ",\n".join(
+            json.dumps(node, ensure_ascii=False, sort_keys=True)
+            for node in graph
+        )
+    )
+    lines.append("]}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def legal_tools_rdf_exports(tools):
+    """
+    Return the JSON-LD, N-Triples, and Turtle documents of the legal tools
+    (by file extension, see RDF_EXPORT_EXTENSIONS).
+
+    The triples of each legal tool are built once (see legal_tool_triples())
+    and the documents are written directly (without building and serializing
+    an rdflib graph), sorted so that they are stable from one publish to the
+    next. The N-Triples are sorted line by line.
+    """
+    nodes = rdf_export_nodes(tools)
+    return {
+        ".jsonld": rdf_export_jsonld(nodes),
+        ".nt": rdf_export_ntriples(nodes),
+        ".ttl": rdf_export_turtle(nodes),
+    }
 
 
 def order_rdf_xml(serialized_rdf_content):
@@ -0,0 +1,127 @@
+# Standard library
+from unittest import mock
+
+# Third-party
+from django.test import TestCase
+from django.urls import get_resolver
+
+# First-party/Local
+from legal_tools.catalog import (
+    LEGAL_CODE_FIELDS,
+    TOOL_FIELDS,
+    ToolCatalog,
+    init_tool_catalog,
+    lookup_legal_code,
+    lookup_legal_code_by_url,
+    lookup_legal_codes,
+    lookup_tool,
+    lookup_valid_legal_code,
+)
+from legal_tools.models import LegalCode, Tool
+from legal_tools.tests.factories import LegalCodeFactory, ToolFactory
+from legal_tools.utils import MockRequest
+
+
+def render_page(url):
+    match = get_resolver().resolve(url)
+    return match.func(MockRequest(url), *match.args, **match.kwargs)
+
+
+class ToolCatalogTest(TestCase):
+    def setUp(self):
+        self.by_30 = ToolFactory(
+            base_url="https://creativecommons.org/licenses/by/3.0/",
+            category="licenses",
+            unit="by",
+            version="3.0",
+        )
+        self.by_40 = ToolFactory(
+            base_url="https://creativecommons.org/licenses/by/4.0/",
+            category="licenses",
+            unit="by",
+            version="4.0",
+        )
+        self.by_30.is_replaced_by = self.by_40
+        self.by_30.save()
+        for language_code in ["en", "es", "nso"]:
+            LegalCodeFactory(
+                tool=self.by_40, language_code=language_code, html="<p>"
+            )
+        LegalCodeFactory(tool=self.by_30, language_code="en")
+        self.catalog = ToolCatalog.load()
+
+    def tearDown(self):
+        init_tool_catalog(None)
+
+    def test_fields(self):
+        self.assertEqual(
+            [field.attname for field in Tool._meta.concrete_fields],
+            list(TOOL_FIELDS),
+        )
+        self.assertEqual(
+            [
+                field.attname
+                for field in LegalCode._meta.concrete_fields
+                if field.attname != "html"
+            ],
+            list(LEGAL_CODE_FIELDS),
+        )
+
+    def test_records(self):
+        tool = self.catalog.get_tool("by", "3.0", "")
+        self.assertEqual(self.by_30.pk, tool.pk)
+        self.assertEqual(self.by_30.identifier(), tool.identifier())
+        self.assertEqual(self.by_30.resource_slug, tool.resource_slug)
+        self.assertEqual(self.by_40.pk, tool.is_replaced_by.id)
+        with self.assertRaises(AttributeError):
+            tool.unit = "by-sa"
+        with self.assertRaises(AttributeError):
+            tool.legal_codes
+        legal_code = tool.get_legal_code_for_language_code("en")
+        self.assertIs(tool, legal_code.tool)
+        with self.assertRaises(LegalCode.DoesNotExist):
+            tool.get_legal_code_for_language_code("de")
+        with self.assertRaises(Tool.DoesNotExist):
+            self.catalog.get_tool("by", "2.0", "")
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                "<p>",
+                self.catalog.get_legal_code(self.by_40.pk, "es").html,
+            )
+
+    def test_lookups_match_orm(self):
+        lookups = [
+            lambda: lookup_tool("by", "4.0", ""),
+            lambda: lookup_legal_code("licenses", "by", "4.0", "", "es"),
+            lambda: lookup_valid_legal_code(self.by_40, "en"),
+            lambda: lookup_legal_code_by_url("/licenses/by/4.0/legalcode.es"),
+        ]
+        orm_results = [lookup().pk for lookup in lookups]
+        orm_legal_codes = [lc.pk for lc in lookup_legal_codes(self.by_40)]
+        init_tool_catalog(self.catalog)
+        with self.assertNumQueries(0):
+            self.assertEqual(orm_results, [lookup().pk for lookup in lookups])
+            self.assertEqual(
+                orm_legal_codes,
+                [lc.pk for lc in lookup_legal_codes(self.by_40)],
+            )
+            # Excluded language
+            with self.assertRaises(LegalCode.DoesNotExist):
+                lookup_valid_legal_code(self.by_40, "nso")
+            with self.assertRaises(LegalCode.DoesNotExist):
+                lookup_legal_code("publicdomain", "by", "4.0", "", "es")
+
+    @mock.patch(
+        "legal_tools.views.pretty_html_bytes",
+        side_effect=lambda path, html_bytes: html_bytes,
+    )
+    def test_pages_without_queries(self, mock_pretty):
+        init_tool_catalog(self.catalog)
+        # Deed of a tool that has been replaced
+        with self.assertNumQueries(0):
+            rsp = render_page("/licenses/by/3.0/deed.en")
+        self.assertEqual(200, rsp.status_code)
+        # Only the legal code HTML is queried
+        with self.assertNumQueries(1):
+            rsp = render_page("/licenses/by/4.0/legalcode.en")
+        self.assertEqual(200, rsp.status_code)
@@ -0,0 +1,110 @@
+# Standard library
+import os
+import tempfile
+from multiprocessing import Pool
+
+# Third-party
+from django.test import TestCase
+
+# First-party/Local
+from legal_tools.format_cache import (
+    FormatCache,
+    format_cache_counters,
+    get_format_cache,
+    init_format_cache,
+)
+
+
+def use_cache(worker):
+    # Function is at top level of module so that it can be pickled by
+    # multiprocessing.
+    #
+    # Like the publish command's workers, use the (forked) cache of the parent
+    format_cache = get_format_cache()
+    for index in range(50):
+        key = format_cache.key(f"<p>{index}".encode("utf-8"), "1")
+        format_cache.put_many({key: f"<p>{index}</p>\n".encode("utf-8")})
+        format_cache.get_many([key])
+    return format_cache.drain_counters()
+
+
+class FormatCacheTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache", "format.sqlite3")
+        self.format_cache = FormatCache(self.path, max_bytes=10)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_init_format_cache(self):
+        init_format_cache(self.format_cache)
+        self.assertIs(self.format_cache, get_format_cache())
+        init_format_cache()
+        self.assertIsNone(get_format_cache())
+
+    def test_key(self):
+        key = FormatCache.key(b"<p>", "1")
+        self.assertEqual(key, FormatCache.key(b"<p>", "1"))
+        self.assertNotEqual(key, FormatCache.key(b"<p>", "2"))
+        self.assertNotEqual(key, FormatCache.key(b"<br>", "1"))
+
+    def test_get_and_put(self):
+        format_cache = self.format_cache
+        self.assertEqual({}, format_cache.get_many(["a", "b"]))
+        format_cache.put_many({"a": b"<p>a</p>\n"})
+        self.assertEqual(
+            {"a": b"<p>a</p>\n"}, format_cache.get_many(["a", "b"])
+        )
+        self.assertEqual(
+            "1 hits, 3 misses (25.0% hit rate)",
+            format_cache_counters(format_cache.drain_counters()),
+        )
+        self.assertEqual({"hits": 0, "misses": 0}, format_cache.counters)
+        # The cache is persistent
+        self.assertEqual(
+            {"a": b"<p>a</p>\n"},
+            FormatCache(self.path, max_bytes=10).get_many(["a"]),
+        )
+
+    def test_prune_least_recently_used(self):
+        format_cache = self.format_cache
+        format_cache.put_many({"a": b"aaaa"})
+        format_cache.put_many({"b": b"bbbb"})
+        format_cache.put_many({"c": b"cccc"})
+        # Access "a" so that "b" is the least recently used
+        format_cache.get_many(["a"])
+        self.assertEqual(1, format_cache.prune())
+        self.assertEqual(
+            ["a", "c"], sorted(format_cache.get_many(["a", "b", "c"]))
+        )
+
+    def test_tables(self):
+        format_cache = self.format_cache
+        other_cache = FormatCache(self.path, max_bytes=4, table="other")
+        format_cache.put_many({"a": b"aaaa", "b": b"bbbb"})
+        other_cache.put_many({"a": b"AAAA"})
+        # Each table has its own keys
+        self.assertEqual({"a": b"aaaa"}, format_cache.get_many(["a"]))
+        self.assertEqual({"a": b"AAAA"}, other_cache.get_many(["a", "b"]))
+        # and its own size budget
+        self.assertEqual(0, other_cache.prune())
+        other_cache.put_many({"c": b"CCCC"})
+        self.assertEqual(1, other_cache.prune())
+        self.assertEqual(
+            ["a", "b"], sorted(format_cache.get_many(["a", "b", "c"]))
+        )
+        self.assertEqual(0, format_cache.prune())
+
+    def test_concurrent_processes(self):
+        format_cache = self.format_cache
+        format_cache.connect()
+        init_format_cache(format_cache)
+        try:
+            with Pool(4) as pool:
+                results = pool.map(use_cache, range(4))
+        finally:
+            init_format_cache(None)
+        self.assertEqual(200, sum(counters["hits"] for counters in results))
+        key = format_cache.key(b"<p>49", "1")
+        self.assertEqual({key: b"<p>49</p>\n"}, format_cache.get_many([key]))
@@ -0,0 +1,81 @@
+# Standard library
+import os
+import tempfile
+from importlib import import_module
+
+# Third-party
+from django.test import TestCase
+
+# First-party/Local
+from legal_tools.tests.factories import LegalCodeFactory, ToolFactory
+
+load_html_files = import_module(
+    "legal_tools.management.commands.20231010_load_html_files"
+)
+
+
+class GetChangedLegalCodeIdsTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        by_40 = ToolFactory(unit="by", version="4.0", deed_only=False)
+        by_sa_40 = ToolFactory(unit="by-sa", version="4.0", deed_only=False)
+        self.legal_codes = {}
+        for tool, language_code in (
+            (by_40, "en"),
+            (by_40, "es"),
+            (by_sa_40, "en"),
+            (by_sa_40, "es"),
+        ):
+            html_file = os.path.join(
+                self.tmpdir.name, f"{tool.unit}_{language_code}.html"
+            )
+            self.write(html_file, "<html></html>")
+            legal_code = LegalCodeFactory(
+                tool=tool, language_code=language_code, html_file=html_file
+            )
+            legal_code.html_file_hash = load_html_files.get_html_file_hash(
+                legal_code
+            )
+            self.legal_codes[(tool.unit, language_code)] = legal_code
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, path, content):
+        with open(path, "wt", encoding="utf-8") as file_obj:
+            file_obj.write(content)
+
+    def get_changed_ids(self, incremental):
+        return load_html_files.get_changed_legal_code_ids(
+            list(self.legal_codes.values()), incremental
+        )
+
+    def test_not_incremental(self):
+        self.assertEqual(
+            {legal_code.id for legal_code in self.legal_codes.values()},
+            self.get_changed_ids(incremental=False),
+        )
+
+    def test_unchanged(self):
+        self.assertEqual(set(), self.get_changed_ids(incremental=True))
+
+    def test_translation_changed(self):
+        legal_code = self.legal_codes[("by", "es")]
+        self.write(legal_code.html_file, "<html>es</html>")
+        self.assertEqual(
+            {legal_code.id}, self.get_changed_ids(incremental=True)
+        )
+        self.assertEqual(
+            load_html_files.get_html_file_hash(legal_code),
+            legal_code.html_file_hash,
+        )
+
+    def test_english_changed(self):
+        # The translations of the same unit and version are imported again
+        # (the English messages are the keys of their .po files)
+        legal_code = self.legal_codes[("by", "en")]
+        self.write(legal_code.html_file, "<html>en</html>")
+        self.assertEqual(
+            {legal_code.id, self.legal_codes[("by", "es")].id},
+            self.get_changed_ids(incremental=True),
+        )
@@ -129,6 +129,17 @@ class LegalCodeModelTest(TestCase):
             f" {str(legal_code.tool)}>",
         )
 
+    def test_update_urls(self):
+        tool = ToolFactory(
+            base_url="https://creativecommons.org/licenses/by-sa/2.5/nl/"
+        )
+        legal_code = LegalCode(tool=tool, language_code="nl")
+        legal_code.update_urls()
+        self.assertEqual("/licenses/by-sa/2.5/nl/deed.nl", legal_code.deed_url)
+        self.assertEqual(
+            "/licenses/by-sa/2.5/nl/legalcode.nl", legal_code.legal_code_url
+        )
+
     def test_translation_domain(self):
         data = [
             # (expected, unit, version, jurisdiction, language)
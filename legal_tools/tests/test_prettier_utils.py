@@ -0,0 +1,309 @@
+# Standard library
+import socket
+import sys
+from unittest import mock
+
+# Third-party
+import requests
+from django.test import TestCase
+
+# First-party/Local
+from legal_tools import prettier_utils
+from legal_tools.prettier_utils import (
+    PrettierBatch,
+    PrettierClient,
+    PrettierProcessError,
+    PrettierProcessPool,
+    add_counters,
+    decode_batch,
+    encode_batch,
+    get_prettier_client,
+    new_counters,
+)
+
+ADDRESSES = ["172.18.0.3", "172.18.0.2", "172.18.0.4"]
+# Stand-in for prettier-worker.js: upper cases each framed document, fails to
+# format documents containing "BAD" and exits on documents containing "CRASH"
+WORKER = """
+import sys
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+while header := stdin.readline():
+    document = stdin.read(int(header))
+    if b"CRASH" in document:
+        sys.exit(1)
+    status = 500 if b"BAD" in document else 200
+    output = document.upper() + b"\\n"
+    stdout.write(b"%d %d\\n" % (status, len(output)) + output)
+    stdout.flush()
+"""
+
+
+def getaddrinfo(host, port, type=0):
+    return [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+        for address in ADDRESSES
+    ]
+
+
+def response(status_code=200, content=b"<p>formatted</p>\n"):
+    rsp = requests.Response()
+    rsp.status_code = status_code
+    rsp._content = content
+    return rsp
+
+
+@mock.patch("legal_tools.prettier_utils.time.sleep")
+@mock.patch(
+    "legal_tools.prettier_utils.socket.getaddrinfo", side_effect=getaddrinfo
+)
+class PrettierClientTest(TestCase):
+    def get_client(self):
+        client = PrettierClient("http://prettier:3000")
+        client.next_url_index = 0
+        client.session = mock.Mock()
+        return client
+
+    def test_round_robin(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.return_value = response()
+        for _ in range(4):
+            self.assertEqual(
+                b"<p>formatted</p>\n", client.format_html(b"<p>formatted</p>")
+            )
+        urls = [call.args[0] for call in client.session.post.call_args_list]
+        self.assertEqual(
+            [
+                "http://172.18.0.2:3000/",
+                "http://172.18.0.3:3000/",
+                "http://172.18.0.4:3000/",
+                "http://172.18.0.2:3000/",
+            ],
+            urls,
+        )
+        self.assertEqual(4, client.counters["requests"])
+        self.assertEqual(64, client.counters["bytes_sent"])
+        self.assertEqual(68, client.counters["bytes_received"])
+        mock_sleep.assert_not_called()
+
+    def test_retry_with_backoff(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.side_effect = [
+            requests.ConnectionError(),
+            requests.Timeout(),
+            response(503),
+            response(),
+        ]
+        self.assertEqual(b"<p>formatted</p>\n", client.format_html(b"<p>"))
+        self.assertEqual(
+            [mock.call(0.1), mock.call(0.2), mock.call(0.4)],
+            mock_sleep.call_args_list,
+        )
+        self.assertEqual(3, client.counters["retries"])
+        self.assertEqual(0, client.counters["failures"])
+        # Addresses are resolved again after a connection error
+        self.assertEqual(2, mock_getaddrinfo.call_count)
+
+    def test_retries_are_bounded(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            client.format_html(b"<p>")
+        self.assertEqual(5, client.session.post.call_count)
+        self.assertEqual(
+            [0.1, 0.2, 0.4, 0.8],
+            [call.args[0] for call in mock_sleep.call_args_list],
+        )
+        self.assertEqual(1, client.counters["failures"])
+
+    def test_prettier_error_is_not_retried(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.return_value = response(500, b"Prettier error")
+        with self.assertRaises(requests.HTTPError):
+            client.format_html(b"<p")
+        self.assertEqual(1, client.session.post.call_count)
+        self.assertEqual(1, client.counters["failures"])
+
+    def test_format_html_batch(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.return_value = response(
+            content=b"200 4\n<p>\n200 6\n<br>\n\n"
+        )
+        self.assertEqual(
+            [b"<p>\n", b"<br>\n\n"],
+            client.format_html_batch([b"<p>", b"<br>"]),
+        )
+        call = client.session.post.call_args
+        self.assertEqual("http://172.18.0.2:3000/batch", call.args[0])
+        self.assertEqual(b"3\n<p>4\n<br>", call.kwargs["data"])
+        self.assertEqual(1, client.counters["requests"])
+        self.assertEqual(2, client.counters["documents"])
+        # No request for an empty batch
+        self.assertEqual([], client.format_html_batch([]))
+        self.assertEqual(1, client.session.post.call_count)
+
+    def test_format_html_batch_error(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.return_value = response(
+            content=b"200 4\n<p>\n500 15\nPrettier error:"
+        )
+        with self.assertRaisesRegex(requests.HTTPError, "Batch document 1"):
+            client.format_html_batch([b"<p>", b"<p"])
+        self.assertEqual(1, client.counters["failures"])
+        # Responses with too few documents are rejected
+        client.session.post.return_value = response(content=b"200 4\n<p>\n")
+        with self.assertRaises(ValueError):
+            client.format_html_batch([b"<p>", b"<br>"])
+
+    def test_unresolved_host(self, mock_getaddrinfo, mock_sleep):
+        mock_getaddrinfo.side_effect = socket.gaierror()
+        client = self.get_client()
+        self.assertEqual(["http://prettier:3000/"], client.urls)
+        # Connection errors are not retried (the service isn't running)
+        client.session.post.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            client.format_html(b"<p>")
+        self.assertEqual(1, client.session.post.call_count)
+        mock_sleep.assert_not_called()
+        self.assertEqual(1, client.counters["failures"])
+
+    def test_resolved_after_connection_error(
+        self, mock_getaddrinfo, mock_sleep
+    ):
+        client = self.get_client()
+        # The service is stopped after the client was created
+        mock_getaddrinfo.side_effect = socket.gaierror()
+        client.session.post.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            client.format_html(b"<p>")
+        self.assertEqual(1, client.session.post.call_count)
+        self.assertEqual(["http://prettier:3000/"], client.urls)
+
+    def test_client_per_process(self, mock_getaddrinfo, mock_sleep):
+        with mock.patch.object(prettier_utils, "PRETTIER_CLIENT", None):
+            client = get_prettier_client()
+            self.assertIs(client, get_prettier_client())
+            # Tests don't wait for an unavailable service
+            self.assertEqual(0, client.retries)
+            with mock.patch("legal_tools.prettier_utils.os.getpid") as getpid:
+                getpid.return_value = client.pid + 1
+                self.assertIsNot(client, get_prettier_client())
+
+    def test_drain_and_add_counters(self, mock_getaddrinfo, mock_sleep):
+        client = self.get_client()
+        client.session.post.return_value = response()
+        client.format_html(b"<p>")
+        counters = new_counters()
+        add_counters(counters, client.drain_counters())
+        add_counters(counters, {"requests": 2, "latency_max": 0.0})
+        self.assertEqual(3, counters["requests"])
+        self.assertGreater(counters["latency_max"], 0)
+        self.assertEqual(0, client.counters["requests"])
+
+
+class BatchFramingTest(TestCase):
+    def test_encode_batch(self):
+        self.assertEqual(
+            "3\n<p>0\n9\n<p>é</p>".encode("utf-8"),
+            encode_batch([b"<p>", b"", "<p>é</p>".encode("utf-8")]),
+        )
+
+    def test_decode_batch(self):
+        self.assertEqual(
+            [(200, "<p>é</p>\n".encode("utf-8")), (200, b""), (500, b"err")],
+            decode_batch(
+                "200 10\n<p>é</p>\n200 0\n500 3\nerr".encode("utf-8")
+            ),
+        )
+        with self.assertRaises(ValueError):
+            decode_batch(b"200 10\n<p>")
+
+
+class PrettierBatchTest(TestCase):
+    def setUp(self):
+        self.formatted = {}
+        self.format_batch = mock.Mock(
+            side_effect=lambda documents: [
+                html.upper() for _, html in documents
+            ]
+        )
+        self.batch = PrettierBatch(self.format_batch)
+
+    def save(self, path):
+        def save(data):
+            self.formatted[path] = data
+
+        return save
+
+    def test_flush(self):
+        batch = self.batch
+        for path in ["/deed.en", "/deed.es"]:
+            html = batch.defer(path, f"<p>{path}".encode("utf-8"))
+            self.assertTrue(batch.add(html, self.save(path)))
+        # Data that was not deferred (ex. RDF/XML) is not added
+        self.assertFalse(batch.add(b"<rdf>", self.save("/rdf")))
+        self.assertEqual(2, len(batch))
+        self.assertEqual({}, self.formatted)
+        batch.flush()
+        self.format_batch.assert_called_once_with(
+            [("/deed.en", b"<p>/deed.en"), ("/deed.es", b"<p>/deed.es")]
+        )
+        self.assertEqual(
+            {"/deed.en": b"<P>/DEED.EN", "/deed.es": b"<P>/DEED.ES"},
+            self.formatted,
+        )
+        self.assertEqual(0, len(batch))
+        # Nothing to format
+        batch.flush()
+        self.assertEqual(1, self.format_batch.call_count)
+
+    def test_deferred_html_must_be_saved(self):
+        batch = self.batch
+        batch.defer("/deed.en", b"<p>")
+        with self.assertRaisesRegex(RuntimeError, "was not saved: /deed.en"):
+            batch.defer("/deed.es", b"<p>")
+        with self.assertRaisesRegex(RuntimeError, "was not saved: /deed.en"):
+            batch.flush()
+        with self.assertRaisesRegex(RuntimeError, "was modified: /deed.en"):
+            batch.add(b"<p>modified", self.save("/deed.en"))
+
+
+class PrettierProcessPoolTest(TestCase):
+    def setUp(self):
+        self.pool = PrettierProcessPool(
+            3, retries=2, command=[sys.executable, "-c", WORKER]
+        )
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_format_html_batch(self):
+        pool = self.pool
+        documents = [f"<p>{index} é".encode("utf-8") for index in range(8)]
+        self.assertEqual(
+            [document.upper() + b"\n" for document in documents],
+            pool.format_html_batch(documents),
+        )
+        # Processes are long-lived
+        self.assertEqual(b"<P>\n", pool.format_html(b"<p>"))
+        self.assertEqual([1, 1, 1], [p.starts for p in pool.processes])
+        self.assertEqual(9, pool.counters["documents"])
+
+    def test_prettier_error(self):
+        self.assertEqual(
+            [b"", b"<P>\n"], self.pool.format_html_batch([b"BAD", b"<p>"])
+        )
+        self.assertEqual(1, self.pool.counters["failures"])
+
+    def test_restart_after_crash(self):
+        pool = self.pool
+        pool.format_html(b"<p>")
+        process = pool.processes[0].process
+        process.kill()
+        process.wait()
+        self.assertEqual(b"<P>\n", pool.format_html(b"<p>"))
+        self.assertEqual(2, pool.processes[0].starts)
+        # Retries are bounded
+        with self.assertRaises(PrettierProcessError):
+            pool.format_html_batch([b"CRASH", b"<p>"])
+        self.assertEqual(2, pool.counters["retries"])
+        self.assertEqual(b"<P>\n", pool.format_html(b"<p>"))
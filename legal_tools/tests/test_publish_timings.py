@@ -0,0 +1,133 @@
+# Standard library
+import json
+import os
+import tempfile
+from unittest import mock
+
+# Third-party
+from django.test import TestCase
+
+# First-party/Local
+from legal_tools.publish_timings import (
+    PublishTimings,
+    get_publish_timings,
+    init_publish_timings,
+    page_timer,
+    percentile,
+    phase_timer,
+    stage_timer,
+)
+
+
+def clock(*times):
+    return mock.patch(
+        "legal_tools.publish_timings.time.perf_counter", side_effect=times
+    )
+
+
+class PublishTimingsTest(TestCase):
+    def setUp(self):
+        self.timings = PublishTimings()
+
+    def tearDown(self):
+        init_publish_timings()
+
+    def test_init_publish_timings(self):
+        init_publish_timings(self.timings)
+        self.assertIs(self.timings, get_publish_timings())
+        init_publish_timings()
+        self.assertIsNone(get_publish_timings())
+
+    def test_timers_without_timings(self):
+        with stage_timer("stage"), page_timer("/a"), phase_timer("render"):
+            pass
+        self.assertEqual({}, self.timings.stages)
+        self.assertEqual({}, self.timings.pages)
+
+    def test_phase_outside_page(self):
+        init_publish_timings(self.timings)
+        with phase_timer("write"):
+            pass
+        self.assertEqual({}, self.timings.pages)
+
+    def test_nested_phases(self):
+        init_publish_timings(self.timings)
+        # render 0-10 contains prettier 2-8, which contains cleanup 3-4
+        with clock(0, 2, 3, 4, 8, 10, 10, 11):
+            with page_timer("/a"):
+                with phase_timer("render"):
+                    with phase_timer("prettier"):
+                        with phase_timer("cleanup"):
+                            pass
+                with phase_timer("write"):
+                    pass
+        self.assertEqual(
+            {"/a": {"cleanup": 1, "prettier": 5, "render": 4, "write": 1}},
+            self.timings.pages,
+        )
+
+    def test_shared_phase(self):
+        init_publish_timings(self.timings)
+        with clock(0, 4):
+            with phase_timer("prettier", ["/a", "/b"], [1, 3]):
+                pass
+        with clock(0, 2):
+            with phase_timer("prettier", ["/a", "/b"], [0, 0]):
+                pass
+        self.assertEqual(
+            {"/a": {"prettier": 2}, "/b": {"prettier": 4}},
+            self.timings.pages,
+        )
+
+    def test_stage(self):
+        with clock(0, 1, 5, 7, 10, 12):
+            with self.timings.stage("outer"):
+                with self.timings.stage("inner"):
+                    pass
+            with self.timings.stage("inner"):
+                pass
+        self.assertEqual(["outer", "inner"], list(self.timings.stages))
+        self.assertEqual({"outer": 7, "inner": 6}, self.timings.stages)
+
+    def test_drain_and_absorb(self):
+        worker = PublishTimings()
+        worker.add("render", ["/a"], 1)
+        self.timings.add("render", ["/a"], 2)
+        self.timings.absorb(worker.drain())
+        self.assertEqual({}, worker.pages)
+        self.assertEqual({"/a": {"render": 3}}, self.timings.pages)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 0.50))
+        self.assertEqual(95, percentile(values, 0.95))
+        self.assertEqual(1, percentile([1], 0.95))
+        self.assertEqual(0, percentile([], 0.50))
+
+    def test_report(self):
+        for index in range(1, 5):
+            self.timings.add("render", [f"/{index}"], index)
+            self.timings.add("write", [f"/{index}"], 1)
+        report = self.timings.report(slowest=2)
+        self.assertEqual(
+            {"count": 4, "total": 10, "p50": 2, "p95": 4, "max": 4},
+            report["pages"]["render"],
+        )
+        self.assertEqual(0, report["pages"]["cleanup"]["count"])
+        self.assertEqual(14, report["pages"]["total"]["total"])
+        self.assertEqual(
+            [
+                {"path": "/4", "total": 5, "render": 4, "write": 1},
+                {"path": "/3", "total": 4, "render": 3, "write": 1},
+            ],
+            report["slowest_pages"],
+        )
+
+    def test_save(self):
+        self.timings.add("render", ["/a"], 1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            timings_file = os.path.join(tmpdir, "tmp", "timings.json")
+            self.timings.save(timings_file)
+            with open(timings_file, "rt", encoding="utf-8") as file_obj:
+                report = json.load(file_obj)
+        self.assertEqual("/a", report["slowest_pages"][0]["path"])
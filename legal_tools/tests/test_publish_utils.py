@@ -0,0 +1,373 @@
+# Standard library
+import os
+import tempfile
+
+# Third-party
+from django.core.cache import cache
+from django.template.base import Template
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.utils import translation
+
+# First-party/Local
+from legal_tools import utils
+from legal_tools.catalog import ToolCatalog, init_tool_catalog
+from legal_tools.models import Tool
+from legal_tools.prettier_utils import PrettierBatch, init_prettier_batch
+from legal_tools.publish_utils import (
+    DependencyRecorder,
+    PublishManifest,
+    get_changed_inputs,
+    get_publish_manifest,
+    get_publish_manifest_file,
+    init_dependency_recorder,
+    init_publish_manifest,
+)
+from legal_tools.tests.factories import LegalCodeFactory, ToolFactory
+from legal_tools.view_utils import get_legal_code_replaced_rel_path
+
+
+class PublishManifestTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmpdir.name, "docs")
+        os.makedirs(self.output_dir)
+        self.manifest_file = os.path.join(self.tmpdir.name, "manifest.json")
+
+    def tearDown(self):
+        init_publish_manifest(None)
+        self.tmpdir.cleanup()
+
+    def publish(self, files, merge=False):
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        init_publish_manifest(manifest)
+        for relpath, filebytes in files.items():
+            utils.save_bytes_to_file(
+                filebytes, os.path.join(self.output_dir, relpath)
+            )
+        manifest.prune(ignore=["CNAME"])
+        manifest.save(merge=merge)
+        init_publish_manifest(None)
+        return manifest
+
+    def test_init_publish_manifest(self):
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        self.assertFalse(manifest.loaded)
+        init_publish_manifest(manifest)
+        self.assertIs(manifest, get_publish_manifest())
+        init_publish_manifest()
+        self.assertIsNone(get_publish_manifest())
+
+    def test_unchanged_writes_are_skipped(self):
+        files = {"a/deed.en.html": b"deed", "b/legalcode.en.html": b"legal"}
+        manifest = self.publish(files)
+        self.assertEqual(2, manifest.counts["written"])
+        self.assertEqual(0, manifest.counts["unchanged"])
+        filename = os.path.join(self.output_dir, "a", "deed.en.html")
+        mtime_ns = os.stat(filename).st_mtime_ns
+
+        files["b/legalcode.en.html"] = b"legal code"
+        manifest = self.publish(files)
+        self.assertTrue(manifest.loaded)
+        self.assertEqual(1, manifest.counts["written"])
+        self.assertEqual(1, manifest.counts["unchanged"])
+        self.assertEqual(0, manifest.counts["deleted"])
+        self.assertEqual(mtime_ns, os.stat(filename).st_mtime_ns)
+        with open(os.path.join(self.output_dir, "b/legalcode.en.html")) as f:
+            self.assertEqual("legal code", f.read())
+
+    def test_modified_file_on_disk_is_rewritten(self):
+        files = {"a/deed.en.html": b"deed"}
+        self.publish(files)
+        filename = os.path.join(self.output_dir, "a", "deed.en.html")
+        with open(filename, "wb") as f:
+            f.write(b"edited")
+        manifest = self.publish(files)
+        self.assertEqual(1, manifest.counts["written"])
+        with open(filename, "rb") as f:
+            self.assertEqual(b"deed", f.read())
+
+    def test_prune_stale_files(self):
+        self.publish({"a/deed.en.html": b"deed", "b/c/rdf": b"rdf"})
+        manifest = self.publish({"a/deed.en.html": b"deed"})
+        self.assertEqual(1, manifest.counts["deleted"])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "b")))
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.output_dir, "a/deed.en.html"))
+        )
+
+    def test_prune_files_not_written(self):
+        self.publish({"a/deed.en.html": b"deed"})
+        for relpath in ("CNAME", "a/legalcode.en.html.tmp", "b/c/rdf"):
+            path = os.path.join(self.output_dir, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x")
+        os.symlink("a", os.path.join(self.output_dir, "d"))
+        manifest = self.publish({"a/deed.en.html": b"deed"})
+        self.assertEqual(3, manifest.counts["deleted"])
+        self.assertEqual(["CNAME", "a"], sorted(os.listdir(self.output_dir)))
+        self.assertEqual(
+            ["deed.en.html"],
+            os.listdir(os.path.join(self.output_dir, "a")),
+        )
+
+    def test_manifest_of_other_output_dir_is_not_loaded(self):
+        self.publish({"a/deed.en.html": b"deed"})
+        self.assertTrue(
+            PublishManifest(self.output_dir, self.manifest_file).loaded
+        )
+        # Another directory at the same path (ex. a fresh clone of the data
+        # repository)
+        os.rename(self.output_dir, f"{self.output_dir}.old")
+        os.makedirs(self.output_dir)
+        self.assertFalse(
+            PublishManifest(self.output_dir, self.manifest_file).loaded
+        )
+        self.assertFalse(
+            PublishManifest(
+                f"{self.output_dir}.old", self.manifest_file
+            ).loaded
+        )
+
+    def test_get_publish_manifest_file(self):
+        manifest_file = get_publish_manifest_file(
+            "/tmp/publish-manifest.json", self.output_dir
+        )
+        self.assertRegex(
+            manifest_file, r"^/tmp/publish-manifest-[0-9a-f]{16}\.json$"
+        )
+        self.assertEqual(
+            manifest_file,
+            get_publish_manifest_file(
+                "/tmp/publish-manifest.json", f"{self.output_dir}/"
+            ),
+        )
+        self.assertNotEqual(
+            manifest_file,
+            get_publish_manifest_file(
+                "/tmp/publish-manifest.json", self.tmpdir.name
+            ),
+        )
+
+    def test_symlinks_are_recorded(self):
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        init_publish_manifest(manifest)
+        utils.save_bytes_to_file(
+            b"deed", os.path.join(self.output_dir, "a", "deed.en.html")
+        )
+        utils.relative_symlink(self.output_dir, "a/deed.en.html", "deed.html")
+        self.assertEqual(
+            {"symlink": "deed.en.html"}, manifest.current["a/deed.html"]
+        )
+
+    def test_merge_retains_files_not_produced(self):
+        self.publish({"a/deed.en.html": b"deed", "b/rdf": b"rdf"})
+        self.publish({"a/deed.en.html": b"deed"}, merge=True)
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        self.assertEqual(
+            ["a/deed.en.html", "b/rdf"], sorted(manifest.previous.keys())
+        )
+
+    def test_drain_and_absorb(self):
+        parent = PublishManifest(self.output_dir, self.manifest_file)
+        worker = PublishManifest(self.output_dir, self.manifest_file)
+        init_publish_manifest(worker)
+        utils.save_bytes_to_file(
+            b"deed", os.path.join(self.output_dir, "deed.en.html")
+        )
+        # Files outside of the output directory are written, but not tracked
+        utils.save_bytes_to_file(
+            b"csv", os.path.join(self.tmpdir.name, "config", "tools.csv")
+        )
+        parent.absorb(worker.drain())
+        self.assertEqual(["deed.en.html"], list(parent.current.keys()))
+        self.assertEqual(2, parent.counts["written"])
+        self.assertEqual({}, worker.pending)
+        self.assertEqual(0, worker.counts["written"])
+
+    def test_deferred_writes(self):
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        init_publish_manifest(manifest)
+        batch = PrettierBatch(
+            lambda documents: [html.upper() for _, html in documents]
+        )
+        init_prettier_batch(batch)
+        try:
+            filename = os.path.join(self.output_dir, "a", "deed.en.html")
+            manifest.start_task()
+            html = batch.defer("/a/deed.en", b"<p>deed</p>")
+            utils.save_bytes_to_file(html, filename)
+            # Not deferred
+            utils.save_bytes_to_file(
+                b"rdf", os.path.join(self.output_dir, "a", "rdf")
+            )
+            manifest.record_task("deed:a:en", ["tool:1"])
+            # The directory is created for symlinks, but the file is only
+            # written once the batch is flushed
+            self.assertTrue(os.path.isdir(os.path.dirname(filename)))
+            self.assertFalse(os.path.exists(filename))
+            batch.flush()
+        finally:
+            init_prettier_batch(None)
+        with open(filename, "rb") as file_obj:
+            self.assertEqual(b"<P>DEED</P>", file_obj.read())
+        self.assertEqual(
+            {
+                "inputs": ["tool:1"],
+                "files": ["a/deed.en.html", "a/rdf"],
+            },
+            manifest.pending_tasks["deed:a:en"],
+        )
+        self.assertEqual(2, manifest.counts["written"])
+
+    def test_task_is_dirty(self):
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        manifest.previous_tasks = {
+            "deed:/licenses/by/4.0/:es-ar": {
+                "inputs": ["legalcode:by_40:es-ar", "template:deed.html"],
+                "files": ["licenses/by/4.0/deed.es-ar.html"],
+            },
+        }
+        key = "deed:/licenses/by/4.0/:es-ar"
+        self.assertFalse(manifest.task_is_dirty(key, {"locale:es-ar"}))
+        self.assertTrue(manifest.task_is_dirty(key, {"template:deed.html"}))
+        # Catalog of the generic language
+        self.assertTrue(manifest.task_is_dirty(key, {"legalcode:by_40:es"}))
+        # Tasks not recorded by a previous run
+        self.assertTrue(manifest.task_is_dirty("rdf:/licenses/by/4.0/", {}))
+
+    def test_changed_rows(self):
+        self.publish({})
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        manifest.current_rows = {"tool:1": "a", "tool:2": "b"}
+        manifest.save()
+        manifest = PublishManifest(self.output_dir, self.manifest_file)
+        manifest.current_rows = {"tool:1": "a", "tool:2": "c", "tool:3": "d"}
+        self.assertEqual({"tool:2", "tool:3"}, manifest.changed_rows())
+
+
+class DependencyRecorderTest(TestCase):
+    def setUp(self):
+        self.original_render = Template._render
+        self.recorder = DependencyRecorder()
+        init_dependency_recorder(self.recorder)
+
+    def tearDown(self):
+        init_dependency_recorder(None)
+        init_tool_catalog(None)
+        cache.clear()
+        # The hooks are uninstalled
+        self.assertIs(self.original_render, Template._render)
+
+    def test_records_inputs(self):
+        tool = ToolFactory(unit="by", version="4.0")
+        legal_code = LegalCodeFactory(tool=tool, language_code="es")
+        recorder = self.recorder
+        recorder.start()
+        Tool.objects.get(pk=tool.pk)
+        legal_code.get_translation_object()
+        with translation.override("es"):
+            render_to_string(
+                "redirect.html", {"title": "x", "destination": ""}
+            )
+        inputs = recorder.stop()
+        self.assertIn(f"tool:{tool.pk}", inputs)
+        self.assertIn(f"legalcode:{legal_code.translation_domain}:es", inputs)
+        self.assertIn(f"legalcode:{legal_code.translation_domain}:en", inputs)
+        self.assertIn("locale:es", inputs)
+        self.assertIn("template:redirect.html", inputs)
+        # Inputs are only recorded between start() and stop()
+        Tool.objects.get(pk=tool.pk)
+        self.assertIsNone(recorder.inputs)
+
+    def test_records_cached_inputs(self):
+        tool = ToolFactory(category="licenses", unit="by", version="4.0")
+        legal_code = LegalCodeFactory(
+            tool=tool, language_code="es", title="Atribución 4.0"
+        )
+        init_tool_catalog(ToolCatalog.load())
+        # Cached without recording its inputs
+        utils.get_tool_title("by", "4.0", "licenses", "", "es")
+
+        for _ in range(2):
+            self.recorder.start()
+            title = utils.get_tool_title("by", "4.0", "licenses", "", "es")
+            inputs = self.recorder.stop()
+            self.assertEqual("Atribución 4.0", title)
+            self.assertIn(f"legalcode:{legal_code.pk}", inputs)
+        # Other cached values are kept
+        cache.set("other", 1)
+        self.recorder.start()
+        self.assertEqual(1, cache.get("other"))
+
+    def test_records_cached_replaced_titles(self):
+        by_40 = ToolFactory(category="licenses", unit="by", version="4.0")
+        legal_code = LegalCodeFactory(tool=by_40, language_code="es")
+        init_tool_catalog(ToolCatalog.load())
+        # Cached without recording its inputs
+        get_legal_code_replaced_rel_path(by_40, "/", "es", "es")
+
+        for _ in range(2):
+            self.recorder.start()
+            get_legal_code_replaced_rel_path(by_40, "/", "es", "es")
+            inputs = self.recorder.stop()
+            self.assertIn("locale:es", inputs)
+        # The inputs of the deed and legal code titles are cached with them
+        prefix = f"by-4.0--{legal_code.language_code}-"
+        for title in ("replaced_deed_title", "replaced_legal_code_title"):
+            self.assertIn(
+                "locale:es", self.recorder.cached_inputs[f"{prefix}{title}"]
+            )
+
+    def test_records_related_tools(self):
+        by_40 = ToolFactory(unit="by", version="4.0")
+        by_30 = ToolFactory(unit="by", version="3.0", is_replaced_by=by_40)
+        init_tool_catalog(ToolCatalog.load())
+        tool = utils.legal_tools.catalog.lookup_tool("by", "3.0", "")
+        self.recorder.start()
+        self.assertEqual(by_40.pk, tool.is_replaced_by.id)
+        self.assertIsNone(tool.source)
+        self.assertEqual({f"tool:{by_40.pk}"}, self.recorder.stop())
+        self.assertNotEqual(by_30.pk, by_40.pk)
+
+
+class GetChangedInputsTest(TestCase):
+    def test_get_changed_inputs(self):
+        changed_inputs = get_changed_inputs(
+            ["templates/includes/footer.html", "README.md"],
+            [
+                "legalcode/es/LC_MESSAGES/by_40.po",
+                "locale/pt_BR/LC_MESSAGES/django.mo",
+                "docs/licenses/by/4.0/deed.es.html",
+            ],
+        )
+        self.assertEqual(
+            {
+                "template:includes/footer.html",
+                "legalcode:by_40:es",
+                "locale:pt-br",
+            },
+            changed_inputs,
+        )
+
+    def test_get_changed_inputs_app_code(self):
+        for path in (
+            "legal_tools/views.py",
+            "Pipfile.lock",
+            "i18n/testdata.csv",
+            "cc_legal_tools/settings/base.py",
+        ):
+            self.assertIsNone(get_changed_inputs([path], []), path)
+        self.assertEqual(
+            set(),
+            get_changed_inputs(
+                [
+                    "cc_legal_tools/static/cc-legal-tools/nav.js",
+                    "legal_tools/tests/test_views.py",
+                    "docs/translation.md",
+                    ".github/workflows/static-analysis.yml",
+                ],
+                [],
+            ),
+        )
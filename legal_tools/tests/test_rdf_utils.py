@@ -1,8 +1,28 @@
+# Standard library
+import datetime
+import os
+import tempfile
+
 # Third-party
 from django.test import TestCase
+from rdflib import Graph
+from rdflib.compare import isomorphic
 
 # First-party/Local
-from legal_tools.rdf_utils import convert_https_to_http, order_rdf_xml
+from legal_tools.format_cache import FormatCache
+from legal_tools.rdf_utils import (
+    RDF_EXPORT_EXTENSIONS,
+    convert_https_to_http,
+    generate_legal_code_rdf,
+    generate_legal_code_rdf_xml,
+    get_rdf_tools,
+    init_rdf_fragment_cache,
+    legal_tool_triples,
+    legal_tools_rdf_exports,
+    order_rdf_xml,
+    rdf_hash,
+)
+from legal_tools.tests.factories import LegalCodeFactory, ToolFactory
 
 EXPECTED_RDF_XML = """\
 <?xml version='1.0' encoding='utf-8'?>
@@ -72,6 +92,65 @@ UNORDERED_RDF_XML = """\
 </rdf:RDF>
 """
 
+GOLDEN_RDF_XML = """\
+<?xml version='1.0' encoding='utf-8'?>
+<rdf:RDF\
+ xmlns:cc="http://creativecommons.org/ns#"\
+ xmlns:dcterms="http://purl.org/dc/terms/"\
+ xmlns:foaf="http://xmlns.com/foaf/0.1/"\
+ xmlns:owl="http://www.w3.org/2002/07/owl#"\
+ xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"\
+>
+  <cc:License rdf:about="http://creativecommons.org/licenses/by-sa/3.0/igo/">
+    <cc:deprecatedOn\
+ rdf:datatype="http://www.w3.org/2001/XMLSchema#date"\
+>2011-09-12</cc:deprecatedOn>
+    <cc:jurisdiction\
+ rdf:resource="http://creativecommons.org/international/igo/"/>
+    <cc:legalcode\
+ xml:lang="fr"\
+>http://creativecommons.org/licenses/by-sa/3.0/igo/legalcode.fr</cc:legalcode>
+    <cc:licenseClass rdf:resource="http://creativecommons.org/license/"/>
+    <cc:permits rdf:resource="http://creativecommons.org/ns#Distribution"/>
+    <cc:requires rdf:resource="http://creativecommons.org/ns#Attribution"/>
+    <dcterms:Jurisdiction\
+ rdf:datatype="http://purl.org/dc/terms/ISO3166"\
+>un</dcterms:Jurisdiction>
+    <dcterms:LicenseDocument\
+ xml:lang="fr"\
+>https://creativecommons.org/licenses/by-sa/3.0/igo/legalcode.fr\
+</dcterms:LicenseDocument>
+    <dcterms:creator rdf:resource="http://creativecommons.org"/>
+    <dcterms:hasVersion>3.0</dcterms:hasVersion>
+    <dcterms:identifier>by-sa</dcterms:identifier>
+    <dcterms:isReplacedBy\
+>http://creativecommons.org/licenses/by-sa/4.0/</dcterms:isReplacedBy>
+    <dcterms:title\
+ xml:lang="fr"\
+>Attribution &amp; partage &lt;3.0&gt; IGO</dcterms:title>
+    <foaf:logo\
+ rdf:resource="http://licensebuttons.net/l/by-sa/3.0/igo/80x15.png"/>
+    <foaf:logo\
+ rdf:resource="http://licensebuttons.net/l/by-sa/3.0/igo/88x31.png"/>
+    <owl:sameAs\
+ rdf:resource="https://creativecommons.org/licenses/by-sa/3.0/igo/"/>
+  </cc:License>
+</rdf:RDF>
+"""
+
+
+def serialize_rdf_xml(*args, **kwargs):
+    """
+    Return the RDF/XML of generate_legal_code_rdf() (the RDF/XML written by
+    generate_legal_code_rdf_xml() must be identical)
+    """
+    graph = generate_legal_code_rdf(*args, **kwargs)
+    return order_rdf_xml(graph.serialize(format="pretty-xml"))
+
+
+def tool_args(tool):
+    return (tool.category, tool.unit, tool.version, tool.jurisdiction_code)
+
 
 class TestRdfUtils(TestCase):
     def test_convert_https_to_http(self):
@@ -90,3 +169,226 @@ class TestRdfUtils(TestCase):
         expected_rdf = EXPECTED_RDF_XML
         ordered_rdf = order_rdf_xml(test_rdf)
         self.assertEqual(expected_rdf, ordered_rdf)
+
+    def test_generate_legal_code_rdf_xml_golden(self):
+        replaced_by = ToolFactory(
+            base_url="https://creativecommons.org/licenses/by-sa/4.0/",
+            creator_url="https://creativecommons.org",
+        )
+        flags = dict.fromkeys(
+            [
+                "permits_derivative_works",
+                "permits_reproduction",
+                "permits_sharing",
+                "prohibits_commercial_use",
+                "prohibits_high_income_nation_use",
+                "requires_notice",
+                "requires_share_alike",
+            ],
+            False,
+        )
+        tool = ToolFactory(
+            base_url="https://creativecommons.org/licenses/by-sa/3.0/igo/",
+            category="licenses",
+            creator_url="https://creativecommons.org",
+            deprecated_on=datetime.date(2011, 9, 12),
+            is_replaced_by=replaced_by,
+            jurisdiction_code="igo",
+            permits_distribution=True,
+            requires_attribution=True,
+            unit="by-sa",
+            version="3.0",
+            **flags,
+        )
+        LegalCodeFactory(
+            tool=tool,
+            language_code="fr",
+            title="Attribution & partage <3.0> IGO",
+        )
+        rdf_xml = generate_legal_code_rdf_xml(*tool_args(tool))
+        self.assertEqual(GOLDEN_RDF_XML, rdf_xml)
+        self.assertEqual(serialize_rdf_xml(*tool_args(tool)), rdf_xml)
+
+    def create_varied_tools(self):
+        # Tools covering the optional properties and the escaped characters
+        tools = [
+            ToolFactory(category="licenses", unit="by", version="4.0"),
+            ToolFactory(category="publicdomain", unit="zero", version="1.0"),
+            ToolFactory(
+                category="licenses",
+                unit="nc-sampling+",
+                version="1.0",
+                deprecated_on=datetime.date(2011, 9, 12),
+            ),
+            ToolFactory(
+                category="licenses",
+                unit="by-nc",
+                version="2.5",
+                jurisdiction_code="scotland",
+            ),
+            ToolFactory(
+                category="licenses",
+                unit="by-nd",
+                version="3.0",
+                jurisdiction_code="de",
+            ),
+        ]
+        tools[0].source = tools[4]
+        tools[0].is_replaced_by = tools[1]
+        tools[0].save()
+        titles = ["", " ", "Namensnennung\r\n4.0", "署名 4.0 国际", '"<&>"']
+        for tool, title in zip(tools, titles):
+            for language_code in ["de", "en", "zh-hans"]:
+                LegalCodeFactory(
+                    tool=tool, language_code=language_code, title=title
+                )
+        return tools
+
+    def test_generate_legal_code_rdf_xml_identical(self):
+        tools = self.create_varied_tools()
+        for tool in tools:
+            with self.subTest(tool=tool.base_url):
+                self.assertEqual(
+                    serialize_rdf_xml(*tool_args(tool)),
+                    generate_legal_code_rdf_xml(*tool_args(tool)),
+                )
+        self.assertEqual(
+            serialize_rdf_xml(generate_all_licenses=True),
+            generate_legal_code_rdf_xml(generate_all_licenses=True),
+        )
+
+    def test_legal_tools_rdf_exports(self):
+        self.create_varied_tools()
+        graph = generate_legal_code_rdf(generate_all_licenses=True)
+        exports = legal_tools_rdf_exports(
+            list(get_rdf_tools(generate_all_licenses=True))
+        )
+        self.assertEqual(RDF_EXPORT_EXTENSIONS, sorted(exports))
+        for extension, rdf_format in (
+            (".jsonld", "json-ld"),
+            (".nt", "nt"),
+            (".ttl", "turtle"),
+        ):
+            with self.subTest(extension=extension):
+                exported = Graph().parse(
+                    data=exports[extension], format=rdf_format
+                )
+                self.assertTrue(isomorphic(graph, exported))
+
+    def test_legal_tools_rdf_exports_ntriples(self):
+        tool = ToolFactory(
+            category="licenses",
+            unit="by",
+            version="4.0",
+            creator_url="https://creativecommons.org",
+        )
+        LegalCodeFactory(
+            tool=tool, language_code="de", title='"Namensnennung"\r\n4.0'
+        )
+        ntriples = legal_tools_rdf_exports([tool])[".nt"]
+        lines = ntriples.splitlines()
+        self.assertEqual(sorted(lines), lines)
+        self.assertIn(
+            "<http://creativecommons.org/licenses/by/4.0>"
+            " <http://purl.org/dc/terms/title>"
+            ' "\\"Namensnennung\\"\\r\\n4.0"@de .',
+            lines,
+        )
+        self.assertTrue(ntriples.endswith(" .\n"))
+
+    def test_rdf_hash(self):
+        tools = self.create_varied_tools()
+        rdf_tools = list(get_rdf_tools(generate_all_licenses=True))
+        for tool in rdf_tools:
+            with self.subTest(tool=tool.base_url):
+                # The hash of the triples of a legal tool is the hash of its
+                # graph parsed from the RDF/XML
+                graph = Graph().parse(
+                    data=generate_legal_code_rdf_xml(*tool_args(tool)),
+                    format="xml",
+                )
+                self.assertEqual(
+                    rdf_hash(legal_tool_triples(tool)), rdf_hash(graph)
+                )
+        tool = get_rdf_tools(*tool_args(tools[0]))[0]
+        digest = rdf_hash(legal_tool_triples(tool))
+        legal_code = tools[0].legal_codes.first()
+        legal_code.title = "Changed"
+        legal_code.save()
+        tool = get_rdf_tools(*tool_args(tools[0]))[0]
+        self.assertNotEqual(digest, rdf_hash(legal_tool_triples(tool)))
+
+    def test_generate_legal_code_rdf_xml_no_tools(self):
+        self.assertEqual(
+            serialize_rdf_xml(generate_all_licenses=True),
+            generate_legal_code_rdf_xml(generate_all_licenses=True),
+        )
+
+    def test_generate_legal_code_rdf_queries(self):
+        tools = []
+        for version in ["1.0", "2.0", "2.5", "3.0", "4.0"]:
+            tool = ToolFactory(category="licenses", unit="by", version=version)
+            for language_code in ["de", "en", "fr"]:
+                LegalCodeFactory(tool=tool, language_code=language_code)
+            tools.append(tool)
+        for tool, newer in zip(tools, tools[1:]):
+            tool.is_replaced_by = newer
+            tool.source = newer
+            tool.save()
+        # One query for the tools (joined with the tools they are replaced by
+        # or sourced from) and one query for their legal codes
+        for generate in (generate_legal_code_rdf, generate_legal_code_rdf_xml):
+            with self.subTest(generate=generate.__name__):
+                with self.assertNumQueries(2):
+                    generate(generate_all_licenses=True)
+                with self.assertNumQueries(2):
+                    generate(*tool_args(tools[0]))
+
+    def test_generate_legal_code_rdf_xml_fragment_cache(self):
+        tools = [
+            ToolFactory(category="licenses", unit="by", version=version)
+            for version in ["2.0", "3.0", "4.0"]
+        ]
+        for tool in tools:
+            LegalCodeFactory(tool=tool, language_code="en")
+        expected = generate_legal_code_rdf_xml(generate_all_licenses=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fragment_cache = FormatCache(
+                os.path.join(tmpdir, "cache.sqlite3"),
+                max_bytes=2**20,
+                table="rdf_fragments",
+            )
+            init_rdf_fragment_cache(fragment_cache)
+            try:
+                rdf_xml = generate_legal_code_rdf_xml(*tool_args(tools[0]))
+                self.assertEqual(
+                    {"hits": 0, "misses": 1}, fragment_cache.drain_counters()
+                )
+                # The fragment cached by the RDF/XML of the tool is reused by
+                # the RDF/XML of all of the tools
+                self.assertEqual(
+                    expected,
+                    generate_legal_code_rdf_xml(generate_all_licenses=True),
+                )
+                self.assertEqual(
+                    {"hits": 1, "misses": 2}, fragment_cache.drain_counters()
+                )
+                self.assertEqual(
+                    rdf_xml, generate_legal_code_rdf_xml(*tool_args(tools[0]))
+                )
+                self.assertEqual(
+                    {"hits": 1, "misses": 0}, fragment_cache.drain_counters()
+                )
+                # Changes to the data of a tool invalidate its fragment
+                legal_code = tools[1].legal_codes.get()
+                legal_code.title = "Changed"
+                legal_code.save()
+                self.assertEqual(
+                    serialize_rdf_xml(generate_all_licenses=True),
+                    generate_legal_code_rdf_xml(generate_all_licenses=True),
+                )
+                self.assertEqual(
+                    {"hits": 2, "misses": 1}, fragment_cache.drain_counters()
+                )
+            finally:
+                init_rdf_fragment_cache()
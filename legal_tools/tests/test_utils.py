@@ -42,6 +42,9 @@ class SaveURLAsStaticFileTest(TestCase):
             with open(filename, "rb") as f:
                 contents = f.read()
             self.assertEqual(b"abcxyz", contents)
+            self.assertEqual(
+                ["level2"], os.listdir(os.path.join(tmpdir.name, "level1"))
+            )
         finally:
             tmpdir.cleanup()
 
@@ -196,31 +199,48 @@ class SaveURLAsStaticFileTest(TestCase):
 
     def test_relative_symlink_overwrite_file(self):
         """
-        Attempt to write symlink over file
+        Write symlink over file
+        """
+        try:
+            utils.init_utils_logger()
+            tmpdir = tempfile.TemporaryDirectory()
+            # symlink file => source and verify by reading file
+            source_contents = b"first test string 123"
+            source = os.path.join(tmpdir.name, "source")
+            with open(source, "wb") as f:
+                f.write(source_contents)
+            file = os.path.join(tmpdir.name, "file")
+            with open(file, "wb") as f:
+                f.write(b"second test string 456")
+            with self.assertLogs(utils.LOG, level="DEBUG") as log_context:
+                utils.relative_symlink(tmpdir.name, source, "file")
+                self.assertEqual(
+                    log_context.output[0],
+                    "DEBUG:legal_tools.utils:overwriting file: file",
+                )
+            self.assertTrue(os.path.islink(file))
+            with open(file, "rb") as f:
+                contents = f.read()
+            self.assertEqual(source_contents, contents)
+        finally:
+            tmpdir.cleanup()
+
+    def test_relative_symlink_overwrite_directory(self):
+        """
+        Attempt to write symlink over directory
         """
         try:
             tmpdir = tempfile.TemporaryDirectory()
-            # symlink file => source and verify by reading source and file
             with self.assertRaisesMessage(
-                FileExistsError, "[Errno 17] File exists: 'source' -> 'file'"
+                FileExistsError, "[Errno 17] File exists: 'source' -> 'dir'"
             ):
                 with self.assertLogs(utils.LOG, level="ERROR"):
-                    source_contents = b"first test string 123"
                     source = os.path.join(tmpdir.name, "source")
                     with open(source, "wb") as f:
-                        f.write(source_contents)
-                    file_contents = b"second test string 456"
-                    file = os.path.join(tmpdir.name, "file")
-                    with open(file, "wb") as f:
-                        f.write(file_contents)
-                    utils.relative_symlink(tmpdir.name, source, "file")
-                    with open(os.path.join(tmpdir.name, "source"), "rb") as f:
-                        contents = f.read()
-                    self.assertEqual(source_contents, contents)
-                    with open(os.path.join(tmpdir.name, "file"), "rb") as f:
-                        contents = f.read()
-                    self.assertEqual(file_contents, contents)
-
+                        f.write(b"first test string 123")
+                    os.mkdir(os.path.join(tmpdir.name, "dir"))
+                    utils.relative_symlink(tmpdir.name, source, "dir")
+            self.assertTrue(os.path.isdir(os.path.join(tmpdir.name, "dir")))
         finally:
             tmpdir.cleanup()
 
@@ -537,8 +557,9 @@ class UpdatePropertiesTest(TestCase):
         license1by = ToolFactory(category="licenses", unit="by", version="1.0")
         license1xx = ToolFactory(category="licenses", unit="xx", version="1.0")
 
-        # First run
-        utils.update_is_replaced_by()
+        # First run (one query to select the tools and one to update them)
+        with self.assertNumQueries(2):
+            utils.update_is_replaced_by()
         license4by.refresh_from_db()
         self.assertIsNone(license4by.is_replaced_by)
         license4bysa.refresh_from_db()
@@ -552,8 +573,9 @@ class UpdatePropertiesTest(TestCase):
         license1xx.refresh_from_db()
         self.assertIsNone(license1xx.is_replaced_by)
 
-        # Subsequent run
-        utils.update_is_replaced_by()
+        # Subsequent run (nothing to update)
+        with self.assertNumQueries(1):
+            utils.update_is_replaced_by()
         license4by.refresh_from_db()
         self.assertIsNone(license4by.is_replaced_by)
         license4bysa.refresh_from_db()
@@ -609,8 +631,10 @@ class UpdatePropertiesTest(TestCase):
         tool_object.save()
 
         # Test
-        def validate_udpate_source():
-            utils.update_source()
+        def validate_udpate_source(num_queries):
+            # One query to select the tools (and one to update them)
+            with self.assertNumQueries(num_queries):
+                utils.update_source()
 
             self.assertEqual(tool("by", "4.0").source, tool("by", "3.0"))
             self.assertEqual(tool("by", "3.0").source, tool("by", "2.0"))
@@ -624,11 +648,11 @@ class UpdatePropertiesTest(TestCase):
             self.assertIsNone(tool("by-nc", "1.0").source)
 
         # First run
-        validate_udpate_source()
+        validate_udpate_source(2)
 
         # Subsequent run to test with wrong data and verify behavior of
         # repeated runs
-        validate_udpate_source()
+        validate_udpate_source(1)
 
 
 class TitleTest(TestCase):
@@ -689,7 +713,7 @@ class TitleTest(TestCase):
     def test_update_titles_dryrun(self):
         self.setup()
 
-        with self.assertNumQueries(9):
+        with self.assertNumQueries(1):
             results = utils.update_title({"dryrun": True})
 
         self.assertEqual(
@@ -699,7 +723,7 @@ class TitleTest(TestCase):
     def test_update_titles_with_updates(self):
         self.setup()
 
-        with self.assertNumQueries(13):
+        with self.assertNumQueries(2):
             results = utils.update_title({"dryrun": False})
 
         self.assertEqual(
@@ -1,9 +1,15 @@
+# Standard library
+import os
+import tempfile
+from unittest import mock
+
 # Third-party
 from django.core.cache import cache
 from django.test import TestCase, override_settings
 
 # First-party/Local
 from i18n.utils import get_default_language_for_jurisdiction_deed
+from legal_tools.format_cache import FormatCache, init_format_cache
 from legal_tools.models import Tool
 from legal_tools.tests.test_views import ToolsTestsMixin
 from legal_tools.view_utils import (
@@ -11,6 +17,7 @@ from legal_tools.view_utils import (
     get_deed_rel_path,
     get_legal_code_replaced_rel_path,
     normalize_path_and_lang,
+    pretty_html_bytes_batch,
 )
 
 
@@ -110,3 +117,65 @@ class ViewHelperFunctionsTest(ToolsTestsMixin, TestCase):
         )
         self.assertEqual(norm_request_path, f"{request_path}.de")
         self.assertEqual(norm_language_code, "de")
+
+
+@override_settings(PRETTIER_SLOW=False)
+@mock.patch(
+    "legal_tools.view_utils.get_formatter_version", return_value="1 test"
+)
+@mock.patch("legal_tools.view_utils.get_prettier_client")
+class PrettyHtmlBytesBatchTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.format_cache = FormatCache(
+            os.path.join(self.tmpdir.name, "format.sqlite3"), 2**20
+        )
+
+    def tearDown(self):
+        init_format_cache(None)
+        self.tmpdir.cleanup()
+
+    def test_batch(self, mock_client, mock_version):
+        client = mock_client.return_value
+        client.format_html_batch.return_value = [b"formatted 1", b"2"]
+        self.assertEqual(
+            [b"formatted 1", b"2"],
+            pretty_html_bytes_batch([("/a", "<p>1"), ("/b", b"<p>2")]),
+        )
+        client.format_html_batch.assert_called_once_with(
+            [
+                b"<html><body><p>1</p></body></html>",
+                b"<html><body><p>2</p></body></html>",
+            ]
+        )
+        # A single document uses the single document endpoint
+        client.format_html.return_value = b"formatted 3"
+        self.assertEqual(
+            [b"formatted 3"], pretty_html_bytes_batch([("/c", b"<p>3")])
+        )
+        mock_version.assert_not_called()
+
+    def test_format_cache(self, mock_client, mock_version):
+        init_format_cache(self.format_cache)
+        client = mock_client.return_value
+        client.format_html.return_value = b"formatted 1"
+        pretty_html_bytes_batch([("/a", b"<p>1")])
+        # Only the documents that are not cached are formatted
+        client.format_html.return_value = b"formatted 2"
+        self.assertEqual(
+            [b"formatted 1", b"formatted 2"],
+            pretty_html_bytes_batch([("/a", b"<p>1"), ("/b", b"<p>2")]),
+        )
+        client.format_html.assert_called_with(
+            b"<html><body><p>2</p></body></html>"
+        )
+        client.format_html_batch.assert_not_called()
+        self.assertEqual(
+            {"hits": 1, "misses": 2}, self.format_cache.drain_counters()
+        )
+        # The formatter version is part of the key
+        mock_version.return_value = "2 test"
+        client.format_html.return_value = b"formatted again"
+        self.assertEqual(
+            [b"formatted again"], pretty_html_bytes_batch([("/a", b"<p>1")])
+        )
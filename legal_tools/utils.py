@@ -2,6 +2,7 @@
 import logging
 import os
 import posixpath
+from functools import partial
 
 # Third-party
 from colorlog.escape_codes import escape_codes
@@ -11,17 +12,36 @@ from django.urls import get_resolver
 from django.utils import translation
 
 # First-party/Local
+import legal_tools.catalog
 import legal_tools.models
 from i18n import UNIT_NAMES
 from i18n.utils import (
     active_translation,
+    format_translation_object_counters,
     get_default_language_for_jurisdiction_naive,
     get_jurisdiction_name,
     get_translation_object,
+    get_translation_object_counters,
     map_legacy_to_django_language_code,
 )
+from legal_tools.prettier_utils import get_prettier_batch
+from legal_tools.publish_timings import page_timer, phase_timer
+from legal_tools.publish_utils import (
+    caching,
+    get_cached,
+    get_publish_manifest,
+)
 
 LOG = logging.getLogger(__name__)
+# Fields of the legal codes (and their tools) read by update_title()
+TITLE_LEGAL_CODE_FIELDS = [
+    "language_code",
+    "title",
+    "tool__category",
+    "tool__jurisdiction_code",
+    "tool__unit",
+    "tool__version",
+]
 
 
 class MockRequest:
@@ -42,12 +62,50 @@ def init_utils_logger(logger: logging.Logger = None):
 
 
 def save_bytes_to_file(filebytes, output_filename):
+    with phase_timer("write"):
+        _save_bytes_to_file(filebytes, output_filename)
+
+
+def _save_bytes_to_file(filebytes, output_filename):
     dirname = os.path.dirname(output_filename)
     if os.path.isfile(dirname):
         os.remove(dirname)
     os.makedirs(dirname, mode=0o755, exist_ok=True)
-    with open(output_filename, "wb") as f:
+    manifest = get_publish_manifest()
+    # Defer the write of HTML whose formatting has been deferred by the
+    # Prettier batch of a publish worker (it is written once formatted). The
+    # directory is created regardless, so that symlinks can be created.
+    batch = get_prettier_batch()
+    if batch is not None and batch.add(
+        filebytes, partial(save_bytes_to_file, output_filename=output_filename)
+    ):
+        if manifest is not None:
+            manifest.expect(output_filename)
+        return
+    # Skip the write if the publish manifest shows the file on disk already
+    # contains these bytes
+    if manifest is not None:
+        digest = manifest.digest(filebytes)
+        if manifest.is_unchanged(output_filename, digest):
+            return
+    # Write to a temporary file that then replaces the output file, so that an
+    # interrupted publish does not leave a truncated file
+    temp_file = f"{output_filename}.tmp"
+    with open(temp_file, "wb") as f:
         f.write(filebytes)
+    os.replace(temp_file, output_filename)
+    if manifest is not None:
+        manifest.record(output_filename, digest)
+
+
+def copy_file_to_output(source, destination):
+    """
+    Copy a file using save_bytes_to_file (so that the publish manifest is
+    honored). Suitable for use as the copy_function of shutil.copytree().
+    """
+    with open(source, "rb") as f:
+        save_bytes_to_file(f.read(), destination)
+    return destination
 
 
 def save_url_as_static_file(output_dir, url, relpath):
@@ -63,11 +121,15 @@ def save_url_as_static_file(output_dir, url, relpath):
     LOG.debug(f"    {relpath}")
     resolver = get_resolver()
     match = resolver.resolve(url)  # ResolverMatch
-    rsp = match.func(request=MockRequest(url), *match.args, **match.kwargs)
-    if rsp.status_code != 200:
-        raise ValueError(f"ERROR: Status {rsp.status_code} for url {url}")
-    output_filename = os.path.join(output_dir, relpath)
-    save_bytes_to_file(rsp.content, output_filename)
+    with page_timer(url):
+        with phase_timer("render"):
+            rsp = match.func(
+                request=MockRequest(url), *match.args, **match.kwargs
+            )
+        if rsp.status_code != 200:
+            raise ValueError(f"ERROR: Status {rsp.status_code} for url {url}")
+        output_filename = os.path.join(output_dir, relpath)
+        save_bytes_to_file(rsp.content, output_filename)
 
 
 def relative_symlink(src1, src2, dst):
@@ -84,14 +146,22 @@ def relative_symlink(src1, src2, dst):
     try:
         os.symlink(src_file, dst, dir_fd=dir_fd)
         LOG.debug(f"    {padding}^{dst}")
+        manifest = get_publish_manifest()
+        if manifest is not None:
+            manifest.record_symlink(os.path.join(dir_path, dst))
     except FileExistsError:
-        # If symlink destination is a symlink, remove it and try again
+        # If symlink destination is a symlink or a file (ex. a page published
+        # by a previous run that is now a symlink), remove it and try again
         dst_path = os.path.join(dir_path, dst)
         small_path = os.path.relpath(dst_path, start=src1)
         if os.path.islink(dst_path):
             LOG.debug(f"overwriting symlink: {small_path}")
             os.remove(dst, dir_fd=dir_fd)
             relative_symlink(src1, src2, dst)
+        elif os.path.isfile(dst_path):
+            LOG.debug(f"overwriting file: {small_path}")
+            os.remove(dst, dir_fd=dir_fd)
+            relative_symlink(src1, src2, dst)
         else:
             LOG.error(f"unable to create symlink, file exists: {small_path}")
             raise
@@ -107,6 +177,34 @@ def save_redirect(output_dir, redirect_file, redirect_content):
     save_bytes_to_file(redirect_content, output_filename)
 
 
+def save_rdf_documents(output_dir, relpath, documents):
+    """
+    Save the RDF documents (by file extension, ex. the RDF/XML and the
+    exports of legal_tools.rdf_utils.legal_tools_rdf_exports()) at relpath.
+    """
+    for extension, document in documents.items():
+        output_filename = os.path.join(output_dir, f"{relpath}{extension}")
+        save_bytes_to_file(document.encode("utf-8"), output_filename)
+
+
+def get_unique_rss():
+    """
+    Return the unique set size of the current process in bytes: the resident
+    memory that is private to it (ex. not shared copy-on-write with its parent
+    process). Return None if it is unavailable (it is read from Linux's
+    /proc/self/smaps_rollup).
+    """
+    unique_rss = 0
+    try:
+        with open("/proc/self/smaps_rollup", "rt") as file_obj:
+            for line in file_obj:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    unique_rss += int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return unique_rss
+
+
 def parse_legal_code_filename(filename):
     """
     Given the filename where the HTML text of a legal code is stored,
@@ -300,34 +398,40 @@ def get_tool_title(unit, version, category, jurisdiction, language_code):
     3. Translate title using Deeds & UX translation domain
     """
     prefix = f"{unit}-{version}-{jurisdiction}-{language_code}-"
-    tool_title = cache.get(f"{prefix}title", "")
+    tool_title = get_cached(f"{prefix}title", "")
     if tool_title:
         return tool_title
 
+    # The inputs of the title (ex. the legal code) are cached with it, see
+    # legal_tools.publish_utils.get_cached()
+    with caching(f"{prefix}title"):
+        tool_title = _get_tool_title(
+            unit, version, category, jurisdiction, language_code
+        )
+    cache.add(f"{prefix}title", tool_title)
+    return tool_title
+
+
+def _get_tool_title(unit, version, category, jurisdiction, language_code):
     # English is easy given it is the default
     tool_title_en = get_tool_title_en(unit, version, category, jurisdiction)
     if language_code == "en":
-        tool_title = tool_title_en  # already applied clean_string()
-        cache.add(f"{prefix}title", tool_title)
-        return tool_title
+        return tool_title_en  # already applied clean_string()
 
     # Use the legal code title, if it exists
     try:
-        legal_code = legal_tools.models.LegalCode.objects.get(
-            tool__category=category,
-            tool__version=version,
-            tool__unit=unit,
-            tool__jurisdiction_code=jurisdiction,
-            language_code=language_code,
+        legal_code = legal_tools.catalog.lookup_legal_code(
+            category, unit, version, jurisdiction, language_code
         )
-    except legal_tools.models.LegalCode.DoesNotExist:
+    except (
+        legal_tools.models.Tool.DoesNotExist,
+        legal_tools.models.LegalCode.DoesNotExist,
+    ):
         legal_code = False
     if legal_code:
         tool_title_db = clean_string(legal_code.title)
         if tool_title_db and tool_title_db != tool_title_en:
-            tool_title = tool_title_db
-            cache.add(f"{prefix}title", tool_title)
-            return tool_title
+            return tool_title_db
 
     # Translate title using Deeds & UX translation domain
     with translation.override(language_code):
@@ -335,10 +439,7 @@ def get_tool_title(unit, version, category, jurisdiction, language_code):
         jurisdiction_name = get_jurisdiction_name(
             category, unit, version, jurisdiction
         )
-        tool_title = clean_string(f"{tool_name} {version} {jurisdiction_name}")
-
-    cache.add(f"{prefix}title", tool_title)
-    return tool_title
+        return clean_string(f"{tool_name} {version} {jurisdiction_name}")
 
 
 def get_tool_title_en(unit, version, category, jurisdiction):
@@ -366,6 +467,17 @@ def get_tool_title_en(unit, version, category, jurisdiction):
     return tool_title_en
 
 
+def get_tool_index(tools):
+    """
+    Return a dictionary of the tools keyed by (category, unit, version,
+    jurisdiction_code).
+    """
+    return {
+        (tool.category, tool.unit, tool.version, tool.jurisdiction_code): tool
+        for tool in tools
+    }
+
+
 def update_is_replaced_by():
     """
     Update the is_replaced_by property of all licenses by doing simple unit
@@ -374,7 +486,7 @@ def update_is_replaced_by():
     Since version 4.0, the licenses are international, so no jurisdiction
     comparison is made.
     """
-    tool_objects = (
+    tools = list(
         legal_tools.models.Tool.objects.all()
         .filter(category="licenses")
         .order_by(
@@ -384,23 +496,18 @@ def update_is_replaced_by():
             "jurisdiction_code",
         )
     )
+    tool_index = get_tool_index(tools)
+    tools_updated = []
     version_latest = None
-    for tool in tool_objects:
+    for tool in tools:
         if not version_latest:
             version_latest = tool.version
             continue
         if tool.version == version_latest:
             continue
-        try:
-            latest = legal_tools.models.Tool.objects.get(
-                category="licenses",
-                version=version_latest,
-                unit=tool.unit,
-            )
-        except legal_tools.models.Tool.DoesNotExist:
-            latest = False
+        latest = tool_index.get(("licenses", tool.unit, version_latest, ""))
         if latest:
-            if tool.is_replaced_by == latest:
+            if tool.is_replaced_by_id == latest.id:
                 LOG.debug(
                     f"{tool.resource_name} is_replaced_by already set to"
                     " correct value"
@@ -410,7 +517,11 @@ def update_is_replaced_by():
                 f"{tool.resource_name} is_replaced_by {latest.resource_name}"
             )
             tool.is_replaced_by = latest
-            tool.save()
+            tools_updated.append(tool)
+    if tools_updated:
+        legal_tools.models.Tool.objects.bulk_update(
+            tools_updated, ["is_replaced_by"]
+        )
 
 
 def update_source():
@@ -419,9 +530,12 @@ def update_source():
     and version comparisons.
     """
     versions = sorted(legal_tools.models.TOOLS_VERSIONS, reverse=True)
-    tool_objects = legal_tools.models.Tool.objects.all()
+    tools = list(legal_tools.models.Tool.objects.all())
+    tool_index = get_tool_index(tools)
+    tools_by_id = {tool.id: tool for tool in tools}
+    tools_updated = []
 
-    for tool in tool_objects:
+    for tool in tools:
         version_index = versions.index(tool.version)
         source = None
 
@@ -435,17 +549,13 @@ def update_source():
                     # versions as the tool itself
                     continue
 
-                try:
-                    source = legal_tools.models.Tool.objects.get(
-                        unit=tool.unit,
-                        version=version,
-                        jurisdiction_code="",
-                    )
+                source = tool_index.get(
+                    (tool.category, tool.unit, version, "")
+                )
+                if source:
                     break
-                except legal_tools.models.Tool.DoesNotExist:
-                    continue
 
-        if tool.source == source:
+        if tool.source_id == (source.id if source else None):
             if source:
                 source_value = source.resource_name
             else:
@@ -453,14 +563,19 @@ def update_source():
             LOG.debug(f"No-op: {tool.resource_name} source: {source_value}")
         elif source:
             tool.source = source
-            tool.save()
+            tools_updated.append(tool)
             LOG.info(
                 f"Set {tool.resource_name} source: {source.resource_name}"
             )
         else:
-            LOG.info(f"Remove {tool.resource_name} source: '{tool.source}'")
+            LOG.info(
+                f"Remove {tool.resource_name} source:"
+                f" '{tools_by_id.get(tool.source_id)}'"
+            )
             tool.source = None
-            tool.save()
+            tools_updated.append(tool)
+    if tools_updated:
+        legal_tools.models.Tool.objects.bulk_update(tools_updated, ["source"])
 
 
 def update_title(options):
@@ -482,7 +597,14 @@ def update_title(options):
         message = "changed"
 
     LOG.info("Updating legal code object titles in database")
-    legal_code_objects = legal_tools.models.LegalCode.objects.all()
+    counters_before = get_translation_object_counters()
+    legal_code_objects = legal_tools.models.LegalCode.objects.select_related(
+        "tool"
+    ).only(*TITLE_LEGAL_CODE_FIELDS)
+    # Language names are shared by many legal codes (as are translation
+    # objects, which are cached by get_translation_object())
+    language_names = {}
+    legal_codes_updated = []
     for legal_code in legal_code_objects:
         tool = legal_code.tool
         category = tool.category
@@ -490,7 +612,11 @@ def update_title(options):
         unit = tool.unit
         jurisdiction = tool.jurisdiction_code
         language_code = legal_code.language_code
-        language_name = translation.get_language_info(language_code)["name"]
+        if language_code not in language_names:
+            language_names[language_code] = translation.get_language_info(
+                language_code
+            )["name"]
+        language_name = language_names[language_code]
         full_identifier = f"{bold}{tool.identifier()} {language_name}{reset}"
         old_title = legal_code.title
         new_title = None
@@ -550,7 +676,7 @@ def update_title(options):
                 results["records_requiring_update"] += 1
             else:
                 legal_code.title = new_title
-                legal_code.save()
+                legal_codes_updated.append(legal_code)
                 results["records_updated"] += 1
             LOG.info(
                 f"{full_identifier} title {message}:"
@@ -558,11 +684,23 @@ def update_title(options):
                 f'\n{pad}{green}+ "{reset}{new_title}{green}"{reset}'
             )
 
+    if legal_codes_updated:
+        legal_tools.models.LegalCode.objects.bulk_update(
+            legal_codes_updated, ["title"]
+        )
+
     if options["dryrun"]:
         count = results["records_requiring_update"]
         LOG.info(f"legal code object titles requiring an update: {count}")
     else:
         count = results["records_updated"]
         LOG.info(f"legal code object titles updated: {count}")
+    counters = {
+        name: count - counters_before[name]
+        for name, count in get_translation_object_counters().items()
+    }
+    LOG.debug(
+        f"Translation objects: {format_translation_object_counters(counters)}"
+    )
 
     return results
@@ -1,24 +1,38 @@
 # Standard library
 import os
-import subprocess
+from functools import lru_cache
 from operator import itemgetter
 from typing import Iterable
 
 # Third-party
-import requests
+import bs4
 from bs4 import BeautifulSoup
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import translation
+from lxml import etree
 
 # First-party/Local
 from i18n.utils import (
     get_default_language_for_jurisdiction_deed,
     get_default_language_for_jurisdiction_naive,
 )
+from legal_tools.catalog import lookup_valid_legal_code
+from legal_tools.format_cache import get_format_cache
 from legal_tools.models import LegalCode
+from legal_tools.prettier_utils import (
+    get_prettier_batch,
+    get_prettier_client,
+    get_prettier_process_pool,
+)
+from legal_tools.publish_timings import phase_timer
+from legal_tools.publish_utils import caching, get_cached
 from legal_tools.utils import get_tool_title
 
+# Increment if clean_html_bytes() is changed (the formatter version is part of
+# the key of the formatted HTML cache)
+FORMAT_VERSION = 1
+
 
 def get_category_and_category_title(category=None, tool=None):
     # category
@@ -122,20 +136,14 @@ def get_legal_code_replaced_rel_path(
         return None, None, None, None
     try:
         # Same language
-        legal_code = LegalCode.objects.valid().get(
-            tool=tool, language_code=language_code
-        )
+        legal_code = lookup_valid_legal_code(tool, language_code)
     except LegalCode.DoesNotExist:
         try:
             # Jurisdiction default language
-            legal_code = LegalCode.objects.valid().get(
-                tool=tool, language_code=language_default
-            )
+            legal_code = lookup_valid_legal_code(tool, language_default)
         except LegalCode.DoesNotExist:
             # Global default language
-            legal_code = LegalCode.objects.valid().get(
-                tool=tool, language_code=settings.LANGUAGE_CODE
-            )
+            legal_code = lookup_valid_legal_code(tool, settings.LANGUAGE_CODE)
     title = get_tool_title(
         tool.unit,
         tool.version,
@@ -147,10 +155,13 @@ def get_legal_code_replaced_rel_path(
         f"{tool.unit}-{tool.version}-"
         f"{tool.jurisdiction_code}-{legal_code.language_code}-"
     )
-    replaced_deed_title = cache.get(f"{prefix}replaced_deed_title", "")
+    # The inputs of the titles (ex. the Deeds & UX translation) are cached
+    # with them, see legal_tools.publish_utils.get_cached()
+    replaced_deed_title = get_cached(f"{prefix}replaced_deed_title", "")
     if not replaced_deed_title:
-        with translation.override(legal_code.language_code):
-            deed_str = translation.gettext("Deed")
+        with caching(f"{prefix}replaced_deed_title"):
+            with translation.override(legal_code.language_code):
+                deed_str = translation.gettext("Deed")
         replaced_deed_title = f"{deed_str} - {title}"
         cache.add(f"{prefix}replaced_deed_title", replaced_deed_title)
     replaced_deed_path = get_deed_rel_path(
@@ -159,12 +170,13 @@ def get_legal_code_replaced_rel_path(
         language_code,
         language_default,
     )
-    replaced_legal_code_title = cache.get(
+    replaced_legal_code_title = get_cached(
         f"{prefix}replaced_legal_code_title", ""
     )
     if not replaced_legal_code_title:
-        with translation.override(legal_code.language_code):
-            legal_code_str = translation.gettext("Legal Code")
+        with caching(f"{prefix}replaced_legal_code_title"):
+            with translation.override(legal_code.language_code):
+                legal_code_str = translation.gettext("Legal Code")
         replaced_legal_code_title = f"{legal_code_str} - {title}"
         cache.add(
             f"{prefix}replaced_legal_code_title", replaced_legal_code_title
@@ -221,32 +233,46 @@ def normalize_path_and_lang(request_path, jurisdiction, language_code):
     return request_path, language_code
 
 
+def clean_html_bytes(html_bytes):
+    """
+    Clean-up HTML using BeautifulSoup4
+    """
+    if not isinstance(html_bytes, bytes):
+        html_bytes = html_bytes.encode("utf-8")
+    return BeautifulSoup(html_bytes, features="lxml").encode()
+
+
+@lru_cache(maxsize=None)
+def get_formatter_version():
+    """
+    Return the version of the HTML clean-up and formatting (part of the key of
+    the formatted HTML cache).
+    """
+    if settings.PRETTIER_SLOW:
+        prettier_version = get_prettier_process_pool().get_version()
+    else:
+        prettier_version = get_prettier_client().get_version()
+    return (
+        f"{FORMAT_VERSION} bs4/{bs4.__version__} lxml/{etree.__version__}"
+        f" prettier/{prettier_version}"
+    )
+
+
 def pretty_html_bytes(path, html_bytes):  # pragma: no cover
     """
     1. Clean-up HTML using BeautifulSoup4
     2. Format HTML using Prettier
+
+    If a Prettier batch is set (see legal_tools.prettier_utils.PrettierBatch)
+    the HTML is returned as is and both steps are deferred until the batch is
+    flushed.
     """
     if not isinstance(html_bytes, bytes):
         html_bytes = html_bytes.encode("utf-8")
-    data = BeautifulSoup(html_bytes, features="lxml").encode()
-    if settings.PRETTIER_SLOW:
-        # This logic path should only used by GitHub Actions
-        # (The multiple Prettier container model, below, is about 25% faster)
-        cmd = "prettier --parser html".split()
-        completed = subprocess.run(cmd, input=data, capture_output=True)
-        return completed.stdout
-    else:
-        url = "http://prettier:3000"
-        headers = {"Content-Type": "text/html"}
-        timeout = 5
-        response = requests.post(
-            url,
-            data=data,
-            headers=headers,
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        return response.content
+    batch = get_prettier_batch()
+    if batch is not None:
+        return batch.defer(path, html_bytes)
+    return pretty_html_bytes_batch([(path, html_bytes)])[0]
     # This function is currently expected to complete without error. The
     # primary downside is that HTML syntax errors are not currently exposed. A
     # new function and command line should be created to test validity of HTML
@@ -254,3 +280,60 @@ def pretty_html_bytes(path, html_bytes):  # pragma: no cover
     #
     # except requests.HTTPError as e:
     #     LOG.warning(f"{path}: {e.response.text}")
+
+
+def pretty_html_bytes_batch(documents):
+    """
+    Batched variant of pretty_html_bytes(): return the formatted HTML of each
+    of the (path, html_bytes) documents, in order, using a single request to
+    the Prettier service.
+
+    If the formatted HTML cache is set (see legal_tools.format_cache), only
+    the documents that are not cached are formatted (and then cached).
+    """
+    paths = [path for path, _ in documents]
+    html = [
+        (
+            html_bytes
+            if isinstance(html_bytes, bytes)
+            else html_bytes.encode("utf-8")
+        )
+        for _, html_bytes in documents
+    ]
+    with phase_timer("prettier", paths, [len(data) for data in html]):
+        return _pretty_html_bytes_batch(paths, html)
+
+
+def _pretty_html_bytes_batch(paths, html):
+    formatted = [None] * len(html)
+    format_cache = get_format_cache()
+    if format_cache is not None:
+        version = get_formatter_version()
+        keys = [format_cache.key(html_bytes, version) for html_bytes in html]
+        cached = format_cache.get_many(keys)
+        formatted = [cached.get(key) for key in keys]
+    missing = [index for index, data in enumerate(formatted) if data is None]
+    data = []
+    for index in missing:
+        with phase_timer("cleanup", [paths[index]]):
+            data.append(clean_html_bytes(html[index]))
+    if settings.PRETTIER_SLOW:
+        # This logic path should only used by GitHub Actions and when the
+        # Prettier service isn't available
+        results = get_prettier_process_pool().format_html_batch(data)
+    elif len(data) == 1:
+        results = [get_prettier_client().format_html(data[0])]
+    else:
+        results = get_prettier_client().format_html_batch(data)
+    for index, result in zip(missing, results):
+        formatted[index] = result
+    if format_cache is not None:
+        # Empty output is a Prettier error (see PrettierProcessPool)
+        format_cache.put_many(
+            {
+                keys[index]: formatted[index]
+                for index in missing
+                if formatted[index]
+            }
+        )
+    return formatted
@@ -7,7 +7,7 @@ from operator import itemgetter
 # Third-party
 from django.conf import settings
 from django.http import Http404, HttpResponse
-from django.shortcuts import get_object_or_404, render
+from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.utils import translation
 
@@ -20,6 +20,11 @@ from i18n.utils import (
     load_deeds_ux_translations,
     map_django_to_transifex_language_code,
 )
+from legal_tools.catalog import (
+    lookup_legal_code_by_url,
+    lookup_legal_codes,
+    lookup_tool,
+)
 from legal_tools.models import (
     UNITS_LICENSES,
     LegalCode,
@@ -28,7 +33,7 @@ from legal_tools.models import (
 )
 from legal_tools.rdf_utils import (
     generate_images_rdf,
-    generate_legal_code_rdf,
+    generate_legal_code_rdf_xml,
     order_rdf_xml,
 )
 from legal_tools.utils import get_tool_title
@@ -290,9 +295,7 @@ def view_deed(
     language_default = get_default_language_for_jurisdiction_deed(jurisdiction)
 
     try:
-        tool = Tool.objects.get(
-            unit=unit, version=version, jurisdiction_code=jurisdiction
-        )
+        tool = lookup_tool(unit, version, jurisdiction)
     except Tool.DoesNotExist as e:
         translation.activate(language_code)
         return view_page_not_found(request, e)
@@ -422,10 +425,10 @@ def view_legal_code(
     #         legal_code_url=request.path,
     #     )
 
-    legal_code = get_object_or_404(
-        LegalCode,
-        legal_code_url=request.path,
-    )
+    try:
+        legal_code = lookup_legal_code_by_url(request.path)
+    except LegalCode.DoesNotExist:
+        raise Http404("No LegalCode matches the given query.")
 
     # Use Deeds & UX translations for title instead of Legal Code
     if language_code in settings.LANGUAGES_MOSTLY_TRANSLATED:
@@ -459,7 +462,7 @@ def view_legal_code(
 
         languages_and_links = get_languages_and_links_for_legal_codes(
             path_start=path_start,
-            legal_codes=tool.legal_codes.all(),
+            legal_codes=lookup_legal_codes(tool),
             selected_language_code=language_code,
         )
 
@@ -675,14 +678,13 @@ def view_legal_tool_rdf(
     request, category=None, unit=None, version=None, jurisdiction=None
 ):
     if category:
-        rdf_content = generate_legal_code_rdf(
+        serialized_rdf_content = generate_legal_code_rdf_xml(
             category, unit, version, jurisdiction
         )
     else:
-        rdf_content = generate_legal_code_rdf(generate_all_licenses=True)
-
-    serialized_rdf_content = rdf_content.serialize(format="pretty-xml")
-    serialized_rdf_content = order_rdf_xml(serialized_rdf_content)
+        serialized_rdf_content = generate_legal_code_rdf_xml(
+            generate_all_licenses=True
+        )
     response = HttpResponse(
         serialized_rdf_content, content_type="application/rdf+xml"
     )
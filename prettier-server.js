@@ -6,9 +6,47 @@ const app = express();
 // https://expressjs.com/en/5x/api.html#express.text
 //
 // As of 2025-11-19, the largest file in cc-legal-tools-data/docs is 7.5K
-app.use(express.text({ limit: "2mb", type: "*/*" }));
+const textParser = express.text({ limit: "2mb", type: "*/*" });
+// https://expressjs.com/en/5x/api.html#express.raw
+const rawParser = express.raw({ limit: "64mb", type: "*/*" });
 
-app.post("/", async (req, res) => {
+// Batch framing (request and response bodies):
+//
+// Each request document is its length in bytes (decimal ASCII), a newline,
+// and the UTF-8 bytes of the document. Each response document is its status
+// (200 or 500), a space, its length in bytes, a newline, and the formatted
+// document (or the Prettier error message). Response documents are in the
+// same order as the request documents.
+function decodeBatch(body) {
+  const documents = [];
+  let offset = 0;
+  while (offset < body.length) {
+    const newline = body.indexOf(0x0a, offset);
+    if (newline === -1) {
+      throw new Error(`Invalid frame header at byte ${offset}`);
+    }
+    const header = body.toString("ascii", offset, newline);
+    const length = Number(header);
+    const start = newline + 1;
+    if (!/^[0-9]+$/.test(header) || start + length > body.length) {
+      throw new Error(`Invalid frame length at byte ${offset}`);
+    }
+    documents.push(body.toString("utf8", start, start + length));
+    offset = start + length;
+  }
+  return documents;
+}
+
+function encodeBatch(results) {
+  const chunks = [];
+  for (const [status, text] of results) {
+    const data = Buffer.from(text, "utf8");
+    chunks.push(Buffer.from(`${status} ${data.length}\n`, "ascii"), data);
+  }
+  return Buffer.concat(chunks);
+}
+
+app.post("/", textParser, async (req, res) => {
   try {
     const formatted = await prettier.format(req.body, { parser: "html" });
     res.type("text/html").send(formatted);
@@ -20,6 +58,31 @@ app.post("/", async (req, res) => {
   }
 });
 
+app.post("/batch", rawParser, async (req, res) => {
+  let documents;
+  try {
+    const body = Buffer.isBuffer(req.body) ? req.body : Buffer.alloc(0);
+    documents = decodeBatch(body);
+  } catch (error) {
+    res.status(400).type("text/plain").send(error.message);
+    return;
+  }
+  const results = await Promise.all(
+    documents.map((document) =>
+      prettier.format(document, { parser: "html" }).then(
+        (formatted) => [200, formatted],
+        (error) => [500, `Prettier error:\n${error.message}`],
+      ),
+    ),
+  );
+  res.type("application/octet-stream").send(encodeBatch(results));
+});
+
+// The Prettier version is part of the key of cached formatted HTML
+app.get("/version", (req, res) => {
+  res.type("text/plain").send(prettier.version);
+});
+
 const server = app.listen(3000);
 
 process.on("SIGINT", () => {
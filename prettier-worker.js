@@ -0,0 +1,51 @@
+// Long-lived Prettier process used when PRETTIER_SLOW is enabled (see
+// legal_tools/prettier_utils.py PrettierProcess)
+//
+// Framing (stdin and stdout):
+//
+// Each request document is its length in bytes (decimal ASCII), a newline, and
+// the UTF-8 bytes of the document. Each response document is its status (200
+// or 500), a space, its length in bytes, a newline, and the formatted document
+// (or the Prettier error message). Responses are written in request order.
+const prettier = require("prettier");
+
+let buffer = Buffer.alloc(0);
+let queue = Promise.resolve();
+
+function respond(status, text) {
+  const data = Buffer.from(text, "utf8");
+  process.stdout.write(
+    Buffer.concat([Buffer.from(`${status} ${data.length}\n`, "ascii"), data]),
+  );
+}
+
+async function format(document) {
+  try {
+    respond(200, await prettier.format(document, { parser: "html" }));
+  } catch (error) {
+    respond(500, `Prettier error:\n${error.message}`);
+  }
+}
+
+process.stdin.on("data", (chunk) => {
+  buffer = Buffer.concat([buffer, chunk]);
+  for (;;) {
+    const newline = buffer.indexOf(0x0a);
+    if (newline === -1) {
+      return;
+    }
+    const header = buffer.toString("ascii", 0, newline);
+    if (!/^[0-9]+$/.test(header)) {
+      process.stderr.write(`Invalid frame header: ${header}\n`);
+      process.exit(1);
+    }
+    const start = newline + 1;
+    const end = start + Number(header);
+    if (buffer.length < end) {
+      return;
+    }
+    const document = buffer.toString("utf8", start, end);
+    buffer = buffer.subarray(end);
+    queue = queue.then(() => format(document));
+  }
+});